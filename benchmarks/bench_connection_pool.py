@@ -0,0 +1,101 @@
+"""
+Measures the per-call latency saved by reusing pooled keep-alive connections
+in ApiClient.
+
+A local fake LanguageCloud API is started on a random port and the same
+sequence of get_project() calls is made with keep-alive enabled and disabled
+(`KEEP_ALIVE: False` sends `Connection: close`, which forces a new TCP
+connection per call, like the module-level `requests.get` calls did).
+
+Usage:
+
+    python benchmarks/bench_connection_pool.py [--calls 500]
+
+The fake server speaks plain HTTP, so the numbers only include the TCP
+handshake. Against the real API every new connection also pays for a TLS
+handshake, so the savings are larger.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Write responses straight to the socket, so nothing is left in a buffer
+    # when the connection closes. Disabling Nagle's algorithm keeps delayed
+    # ACKs from adding ~40ms to every keep-alive response.
+    wbufsize = 0
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = json.dumps({"id": "fakeproject", "status": "inProgress"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def setup_django(api_base):
+    from django.conf import settings
+
+    settings.configure(
+        WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={"API_BASE": api_base},
+    )
+
+
+def run(calls, keep_alive):
+    from django.conf import settings
+    from django.test import override_settings
+
+    from wagtail_localize_rws_languagecloud.rws_client import ApiClient
+
+    lc_settings = {**settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD}
+    lc_settings["KEEP_ALIVE"] = keep_alive
+    with override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD=lc_settings):
+        client = ApiClient()
+        client.is_authenticated = True
+        client.headers = {}
+
+        # warm up
+        client.get_project("fakeproject")
+
+        start = time.perf_counter()
+        for _ in range(calls):
+            client.get_project("fakeproject")
+        return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeApiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    setup_django(f"http://127.0.0.1:{server.server_address[1]}")
+
+    without_pool = run(args.calls, keep_alive=False)
+    with_pool = run(args.calls, keep_alive=True)
+    server.shutdown()
+
+    print(f"calls per run:           {args.calls}")
+    print(f"new connection per call: {without_pool * 1000:.3f} ms/call")
+    print(f"pooled keep-alive:       {with_pool * 1000:.3f} ms/call")
+    print(f"saved:                   {(without_pool - with_pool) * 1000:.3f} ms/call")
+
+
+if __name__ == "__main__":
+    main()
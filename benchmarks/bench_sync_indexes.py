@@ -0,0 +1,258 @@
+"""
+Shows the query plans and timings of the sync_rws selection queries with and
+without the indexes added in migration 0012.
+
+A throwaway test database is created with the test project's settings and
+seeded with --projects LanguageCloud projects, one file and one project
+settings each. Most projects are already imported or archived, like on a
+site that has been using the integration for a while. The indexes are
+dropped, each query is explained and timed, then the indexes are created
+again and the queries are run a second time.
+
+Usage:
+
+    python benchmarks/bench_sync_indexes.py [--projects 100000] [--runs 5]
+
+Uses SQLite by default. Set DATABASE_URL to run against PostgreSQL, which
+also uses the partial indexes covering only pending rows, e.g.
+
+    DATABASE_URL=postgres://localhost/wagtail_localize_rws python benchmarks/bench_sync_indexes.py
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BATCH_SIZE = 5000
+
+
+def setup_django():
+    import django
+
+    os.environ.setdefault(
+        "DJANGO_SETTINGS_MODULE", "wagtail_localize_rws_languagecloud.test.settings"
+    )
+    django.setup()
+
+
+def seed(count):
+    from django.utils import timezone
+
+    from wagtail_localize.models import Translation
+    from wagtail_localize_rws_languagecloud.models import (
+        LanguageCloudFile,
+        LanguageCloudProject,
+        LanguageCloudProjectSettings,
+        LanguageCloudStatus,
+    )
+    from wagtail_localize_rws_languagecloud.tests.helpers import create_test_page
+
+    try:
+        from wagtail.models import Locale
+    except ImportError:
+        from wagtail.core.models import Locale
+
+    _, source = create_test_page(
+        title="Test page", slug="test-page", test_charfield="Some content"
+    )
+    translation = Translation.objects.create(
+        source=source, target_locale=Locale.objects.create(language_code="fr")
+    )
+    now = timezone.now()
+    start = now - datetime.timedelta(days=365)
+
+    def project(i):
+        # 80% imported, 10% archived, 5% in progress, 4% waiting to be
+        # started and 1% still to be created in LanguageCloud
+        bucket = i % 100
+        fields = {
+            "translation_source": source,
+            "source_last_updated_at": start + datetime.timedelta(seconds=i),
+            "lc_project_id": f"project-{i}",
+            "files_total": 1,
+            "files_created": 1,
+        }
+        if bucket < 80:
+            fields.update(
+                internal_status=LanguageCloudProject.STATUS_IMPORTED,
+                lc_project_status=LanguageCloudStatus.COMPLETED,
+                files_imported=1,
+            )
+        elif bucket < 90:
+            fields.update(lc_project_status=LanguageCloudStatus.ARCHIVED)
+        elif bucket < 95:
+            fields.update(
+                lc_project_status=LanguageCloudStatus.IN_PROGRESS,
+                next_poll_at=now + datetime.timedelta(minutes=i % 120 - 60),
+            )
+        elif bucket < 99:
+            fields.update(lc_project_status=LanguageCloudStatus.CREATED)
+        else:
+            fields.update(lc_project_id="", files_created=0)
+        return LanguageCloudProject(**fields)
+
+    for offset in range(0, count, BATCH_SIZE):
+        projects = LanguageCloudProject.objects.bulk_create(
+            [project(i) for i in range(offset, min(offset + BATCH_SIZE, count))]
+        )
+        if projects[0].pk is None:  # backends that don't return primary keys
+            projects = list(
+                LanguageCloudProject.objects.filter(
+                    source_last_updated_at__in=[
+                        p.source_last_updated_at for p in projects
+                    ]
+                )
+            )
+        LanguageCloudFile.objects.bulk_create(
+            [
+                LanguageCloudFile(
+                    translation=translation,
+                    project=p,
+                    internal_status=p.internal_status,
+                    lc_source_file_id="" if p.lc_project_id == "" else "file",
+                )
+                for p in projects
+            ]
+        )
+        LanguageCloudProjectSettings.objects.bulk_create(
+            [
+                LanguageCloudProjectSettings(
+                    translation_source=source,
+                    source_last_updated_at=p.source_last_updated_at,
+                    lc_project=p,
+                    name=f"Project {p.pk}",
+                    due_date=now,
+                    template_id="template",
+                )
+                for p in projects
+            ]
+        )
+
+    # a few settings still waiting for their local project
+    LanguageCloudProjectSettings.objects.bulk_create(
+        [
+            LanguageCloudProjectSettings(
+                translation_source=source,
+                source_last_updated_at=now + datetime.timedelta(seconds=i),
+                name=f"Unprocessed {i}",
+                due_date=now,
+                template_id="template",
+            )
+            for i in range(max(count // 1000, 1))
+        ]
+    )
+
+
+def get_queries():
+    from django.utils import timezone
+
+    from wagtail_localize_rws_languagecloud.models import (
+        LanguageCloudFile,
+        LanguageCloudProject,
+        LanguageCloudProjectSettings,
+    )
+    from wagtail_localize_rws_languagecloud.sync import (
+        _get_projects_to_export,
+        _get_projects_to_import,
+        _get_projects_to_start,
+    )
+
+    in_progress = (
+        _get_projects_to_import(timezone.now()).values_list("pk", flat=True).first()
+    )
+    return {
+        "unprocessed project settings": LanguageCloudProjectSettings.objects.filter(
+            lc_project_id__isnull=True
+        ).order_by("pk"),
+        "projects to export": _get_projects_to_export(),
+        "projects to start": _get_projects_to_start(),
+        "projects due for a poll": _get_projects_to_import(timezone.now()),
+        "files to import": LanguageCloudFile.objects.filter(project_id=in_progress)
+        .exclude(internal_status=LanguageCloudFile.STATUS_IMPORTED)
+        .exclude(lc_source_file_id="")
+        .order_by("id"),
+        "report, first page": LanguageCloudFile.objects.select_related("project")[:50],
+        "claimed projects": LanguageCloudProject.objects.filter(claimed_by="worker"),
+    }
+
+
+def get_indexes():
+    from wagtail_localize_rws_languagecloud.models import (
+        LanguageCloudFile,
+        LanguageCloudProject,
+        LanguageCloudProjectSettings,
+    )
+
+    return [
+        (model, index)
+        for model in [
+            LanguageCloudProject,
+            LanguageCloudFile,
+            LanguageCloudProjectSettings,
+        ]
+        for index in model._meta.indexes
+    ]
+
+
+def analyze():
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def measure(label, runs):
+    print(f"\n=== {label} ===")
+    timings = {}
+    for name, queryset in get_queries().items():
+        print(f"\n--- {name}")
+        print(queryset.explain())
+        best = None
+        for _ in range(runs):
+            start = time.perf_counter()
+            list(queryset.all())
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = best
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--projects", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        print(f"seeding {args.projects} projects on {connection.vendor}...")
+        seed(args.projects)
+
+        with connection.schema_editor() as editor:
+            for model, index in get_indexes():
+                editor.remove_index(model, index)
+        analyze()
+        before = measure("without indexes", args.runs)
+
+        with connection.schema_editor() as editor:
+            for model, index in get_indexes():
+                editor.add_index(model, index)
+        analyze()
+        after = measure("with indexes", args.runs)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(f"\n{'query':<32}{'before (ms)':>12}{'after (ms)':>12}")
+    for name in before:
+        print(f"{name:<32}{before[name] * 1000:>12.2f}{after[name] * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
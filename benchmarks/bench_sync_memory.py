@@ -0,0 +1,197 @@
+"""
+Measures the peak memory used by the sync_rws import as the backlog of
+projects grows, with projects fetched in chunks and all at once.
+
+For each backlog size, a temporary SQLite database is seeded with that many
+in progress projects, each with project settings and an imported file. The
+import then runs against a stub API client in a fresh process, once with the
+default SYNC_CHUNK_SIZE and once with a chunk size larger than the backlog,
+which loads every project up front like the sync used to. The increase of
+the peak RSS of the process during the import is reported.
+
+Usage:
+
+    python benchmarks/bench_sync_memory.py [--projects 1000 5000 20000]
+"""
+import argparse
+import datetime
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BATCH_SIZE = 5000
+
+
+class StubApiClient:
+    def list_project_statuses(self):
+        return {}
+
+    def get_project(self, project_id, fields=None):
+        return {"status": "inProgress"}
+
+    def list_target_files(self, project_id):
+        return {}
+
+    def complete_project(self, project_id):
+        pass
+
+
+def setup_django(db_path):
+    import django
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault(
+        "DJANGO_SETTINGS_MODULE", "wagtail_localize_rws_languagecloud.test.settings"
+    )
+    django.setup()
+
+
+def seed(count):
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    from wagtail_localize.models import Translation
+    from wagtail_localize_rws_languagecloud.models import (
+        LanguageCloudFile,
+        LanguageCloudProject,
+        LanguageCloudProjectSettings,
+        LanguageCloudStatus,
+    )
+    from wagtail_localize_rws_languagecloud.tests.helpers import create_test_page
+
+    try:
+        from wagtail.models import Locale
+    except ImportError:
+        from wagtail.core.models import Locale
+
+    call_command("migrate", verbosity=0)
+    _, source = create_test_page(
+        title="Test page", slug="test-page", test_charfield="Some content"
+    )
+    translation = Translation.objects.create(
+        source=source, target_locale=Locale.objects.create(language_code="fr")
+    )
+    now = timezone.now()
+
+    for offset in range(0, count, BATCH_SIZE):
+        projects = LanguageCloudProject.objects.bulk_create(
+            [
+                LanguageCloudProject(
+                    translation_source=source,
+                    source_last_updated_at=now + datetime.timedelta(seconds=i),
+                    lc_project_id=f"project-{i}",
+                    lc_project_status=LanguageCloudStatus.IN_PROGRESS,
+                    files_total=1,
+                    files_created=1,
+                    files_imported=1,
+                )
+                for i in range(offset, min(offset + BATCH_SIZE, count))
+            ]
+        )
+        LanguageCloudFile.objects.bulk_create(
+            [
+                LanguageCloudFile(
+                    translation=translation,
+                    project=project,
+                    lc_source_file_id="file",
+                    internal_status=LanguageCloudFile.STATUS_IMPORTED,
+                )
+                for project in projects
+            ]
+        )
+        LanguageCloudProjectSettings.objects.bulk_create(
+            [
+                LanguageCloudProjectSettings(
+                    translation_source=source,
+                    source_last_updated_at=project.source_last_updated_at,
+                    lc_project=project,
+                    name=f"Project {project.pk}",
+                    description="A project waiting to be imported",
+                    due_date=now,
+                    template_id="template",
+                )
+                for project in projects
+            ]
+        )
+
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_import(chunk_size):
+    from django.conf import settings
+    from django.test import override_settings
+
+    from wagtail_localize_rws_languagecloud.models import LanguageCloudProject
+    from wagtail_localize_rws_languagecloud.sync import _import
+
+    logging.disable()
+    lc_settings = {**settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD}
+    if chunk_size is not None:
+        lc_settings["SYNC_CHUNK_SIZE"] = chunk_size
+    # DEBUG would keep a log of the queries
+    with override_settings(DEBUG=False, WAGTAILLOCALIZE_RWS_LANGUAGECLOUD=lc_settings):
+        before = peak_rss_kb()
+        _import(StubApiClient(), logging.getLogger(__name__))
+        after = peak_rss_kb()
+
+    remaining = LanguageCloudProject.objects.exclude(
+        internal_status=LanguageCloudProject.STATUS_IMPORTED
+    ).count()
+    assert remaining == 0, f"{remaining} projects were not imported"
+    return after - before
+
+
+def child(args):
+    setup_django(args.db)
+    if args.seed is not None:
+        seed(args.seed)
+    else:
+        print(run_import(args.chunk_size))
+
+
+def run_child(*args):
+    return subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *map(str, args)],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--projects", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--seed", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--chunk-size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.db:
+        child(args)
+        return
+
+    print(f"{'projects':>10}{'chunked (MB)':>16}{'all at once (MB)':>20}")
+    for count in args.projects:
+        results = []
+        # the default chunk size, then every project in one chunk
+        for chunk_args in [[], ["--chunk-size", count + 1]]:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                db = os.path.join(tmpdir, "bench.db")
+                run_child("--db", db, "--seed", count)
+                peak_kb = int(run_child("--db", db, *chunk_args))
+            results.append(peak_kb / 1024)
+        print(f"{count:>10}{results[0]:>16.1f}{results[1]:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
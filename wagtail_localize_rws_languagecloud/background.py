@@ -0,0 +1,160 @@
+import logging
+import traceback
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .locking import SyncLease
+from .models import SyncJob
+
+
+DEFAULT_SYNC_BACKEND = "wagtail_localize_rws_languagecloud.background.InlineBackend"
+
+
+def get_sync_backend():
+    """
+    Returns the backend set by the SYNC_BACKEND setting, constructed with the
+    SYNC_BACKEND_OPTIONS setting as keyword arguments
+    """
+    lc_settings = settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD
+    backend_class = import_string(lc_settings.get("SYNC_BACKEND", DEFAULT_SYNC_BACKEND))
+    return backend_class(**lc_settings.get("SYNC_BACKEND_OPTIONS", {}))
+
+
+def _claim_queued_jobs():
+    with transaction.atomic():
+        jobs = dict(
+            SyncJob.objects.select_for_update(skip_locked=True)
+            .filter(status=SyncJob.STATUS_QUEUED)
+            .values_list("pk", "scope")
+        )
+        SyncJob.objects.filter(pk__in=jobs).update(
+            status=SyncJob.STATUS_RUNNING, started_at=timezone.now()
+        )
+    return jobs
+
+
+def run_queued_jobs(logger=None, concurrency=1, requeue=True):
+    """
+    Runs one sync for all the queued SyncJobs and records its outcome on
+    them. Returns the number of jobs that were run.
+
+    If all the jobs were queued by webhooks, the sync only imports the
+    projects they reported, see webhooks.py.
+
+    The jobs go back to the queue if another sync holds the sync lock, or
+    are marked as skipped without `requeue`, when nothing would pick them up
+    again.
+    """
+    # imported here as sync.py imports this module
+    from .sync import SyncManager
+
+    logger = logger or logging.getLogger(__name__)
+    jobs = _claim_queued_jobs()
+    if not jobs:
+        return 0
+    job_ids = list(jobs)
+    sync_kwargs = {"concurrency": concurrency}
+    if all(scope == SyncJob.SCOPE_EVENTS for scope in jobs.values()):
+        sync_kwargs["events_only"] = True
+
+    status = SyncJob.STATUS_FAILED
+    error = ""
+    try:
+        if SyncManager(logger=logger).sync(**sync_kwargs) is False:
+            status = SyncJob.STATUS_QUEUED if requeue else SyncJob.STATUS_SKIPPED
+        else:
+            status = SyncJob.STATUS_FINISHED
+    except Exception:  # noqa
+        logger.exception("Sync failed")
+        error = traceback.format_exc()
+    finally:
+        if status == SyncJob.STATUS_QUEUED:
+            SyncJob.objects.filter(pk__in=job_ids).update(
+                status=status, started_at=None
+            )
+        else:
+            SyncJob.objects.filter(pk__in=job_ids).update(
+                status=status, finished_at=timezone.now(), error=error
+            )
+    return 0 if status == SyncJob.STATUS_QUEUED else len(job_ids)
+
+
+class SyncBackend:
+    """
+    Runs the syncs requested with SyncManager.trigger().
+
+    Requests are recorded as SyncJobs, which report whether a sync is queued
+    or running whatever runs them. A trigger while a sync is already queued
+    doesn't queue another one, unless a full sync is requested while only
+    syncs of webhook events are queued. Subclasses implement enqueue() to get
+    run_queued_jobs() called.
+    """
+
+    # whether enqueue() runs the sync in the process that triggered it
+    runs_inline = False
+
+    def __init__(self, concurrency=1):
+        self.concurrency = concurrency
+
+    def trigger(self, scope=SyncJob.SCOPE_ALL):
+        with transaction.atomic():
+            queued_jobs = SyncJob.objects.filter(status=SyncJob.STATUS_QUEUED)
+            if scope == SyncJob.SCOPE_ALL:
+                queued_jobs = queued_jobs.filter(scope=SyncJob.SCOPE_ALL)
+            job = queued_jobs.first()
+            if job is not None:
+                return job
+            job = SyncJob.objects.create(scope=scope)
+        self.enqueue()
+        return job
+
+    def enqueue(self):
+        raise NotImplementedError
+
+    def is_queued(self):
+        return SyncJob.objects.filter(status=SyncJob.STATUS_QUEUED).exists()
+
+    def is_running(self):
+        return SyncLease.is_held()
+
+
+class InlineBackend(SyncBackend):
+    """
+    Runs the sync straight away, in the process that triggered it. Syncs
+    that can't take the sync lock are skipped, as no worker would run them
+    later.
+    """
+
+    runs_inline = True
+
+    def enqueue(self):
+        run_queued_jobs(concurrency=self.concurrency, requeue=False)
+
+
+class DatabaseQueueBackend(SyncBackend):
+    """
+    Leaves the sync queued in the database for the rws_worker management
+    command to run
+    """
+
+    def enqueue(self):
+        pass
+
+
+class CallableBackend(SyncBackend):
+    """
+    Hands the sync over to a task runner. `enqueue` is a callable, or its
+    dotted path, which should schedule a task that calls run_queued_jobs().
+    """
+
+    def __init__(self, enqueue, **kwargs):
+        super().__init__(**kwargs)
+        self.enqueue_callable = (
+            import_string(enqueue) if isinstance(enqueue, str) else enqueue
+        )
+
+    def enqueue(self):
+        self.enqueue_callable()
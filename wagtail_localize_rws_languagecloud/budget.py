@@ -0,0 +1,138 @@
+import time
+
+from .models import SyncCheckpoint
+
+
+class BudgetExhausted(Exception):
+    """
+    Raised between units of work once a sync used up its time budget
+    """
+
+
+class SyncBudget:
+    """
+    Stops a sync once it has run for `max_seconds` or worked on
+    `max_projects` projects, and keeps track of the last object each phase
+    processed so that the next sync can resume from there.
+
+    check() raises BudgetExhausted once the budget is used up. It is called
+    by the heartbeat returned by wrap_heartbeat(), between units of work.
+    Phases process objects in primary key order, calling processed() after
+    each of them, and the phase that was running is saved as a
+    SyncCheckpoint by save_checkpoint(). They call worked_on() for the
+    projects they did something for, which count once however many phases
+    work on them.
+
+    The next sync runs the phase it stopped in first, see order_phases(),
+    starting after the last object processed and wrapping around to the
+    ones before it, see resume_after(). So objects early in the queue that
+    keep failing can't starve the ones after them. Without a
+    `checkpoint_name`, checkpoints are neither loaded nor saved.
+    """
+
+    def __init__(
+        self,
+        max_seconds=None,
+        max_projects=None,
+        checkpoint_name="sync",
+        clock=time.monotonic,
+    ):
+        self.clock = clock
+        self.max_seconds = max_seconds
+        self.deadline = None if max_seconds is None else clock() + max_seconds
+        self.max_projects = max_projects
+        self.projects_worked_on = set()
+        self.checkpoint_name = checkpoint_name
+        self.resume_phase = ""
+        self.resume_pk = None
+        if checkpoint_name:
+            checkpoint = SyncCheckpoint.objects.filter(name=checkpoint_name).first()
+            if checkpoint is not None:
+                self.resume_phase = checkpoint.phase
+                self.resume_pk = checkpoint.last_pk
+        self.phase = ""
+        self.last_pk = None
+
+    @property
+    def projects(self):
+        return len(self.projects_worked_on)
+
+    @property
+    def projects_exhausted(self):
+        return self.max_projects is not None and self.projects >= self.max_projects
+
+    @property
+    def remaining_projects(self):
+        """
+        The number of projects left before the budget runs out, or None
+        without `max_projects`
+        """
+        if self.max_projects is None:
+            return None
+        return max(self.max_projects - self.projects, 0)
+
+    def check(self):
+        if self.projects_exhausted:
+            raise BudgetExhausted(f"Worked on {self.projects} projects")
+        if self.deadline is not None and self.clock() >= self.deadline:
+            raise BudgetExhausted(f"Ran out of time after {self.max_seconds}s")
+
+    def wrap_heartbeat(self, heartbeat=None):
+        def budget_heartbeat():
+            # renew the lease even once out of budget, while the sync stops
+            if heartbeat:
+                heartbeat()
+            self.check()
+
+        return budget_heartbeat
+
+    def order_phases(self, phases):
+        """
+        Returns (name, phase) pairs starting with the phase the last sync
+        stopped in, if any
+        """
+        names = [name for name, _ in phases]
+        if self.resume_phase not in names:
+            return phases
+        index = names.index(self.resume_phase)
+        return phases[index:] + phases[:index]
+
+    def start(self, phase):
+        self.phase = phase
+        # stopping before processing anything keeps the phase's checkpoint
+        self.last_pk = self.resume_after(phase)
+
+    def resume_after(self, phase):
+        """
+        Returns the primary key after which `phase` should start, if the
+        last sync stopped in it
+        """
+        if phase == self.resume_phase:
+            return self.resume_pk
+        return None
+
+    def processed(self, pk):
+        """
+        Records that the objects of the current phase up to `pk` were
+        processed
+        """
+        self.last_pk = pk
+
+    def worked_on(self, project_pk):
+        """
+        Records that the current phase did something for the
+        LanguageCloudProject with the primary key `project_pk`
+        """
+        self.projects_worked_on.add(project_pk)
+
+    def save_checkpoint(self):
+        if not self.checkpoint_name or not self.phase:
+            return
+        SyncCheckpoint.objects.update_or_create(
+            name=self.checkpoint_name,
+            defaults={"phase": self.phase, "last_pk": self.last_pk},
+        )
+
+    def clear_checkpoint(self):
+        if self.checkpoint_name:
+            SyncCheckpoint.objects.filter(name=self.checkpoint_name).delete()
@@ -0,0 +1,223 @@
+import datetime
+import os
+import socket
+import time
+import uuid
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import LanguageCloudProject, SyncLock
+
+
+DEFAULT_LEASE_SECONDS = 10 * 60
+DEFAULT_CLAIM_BATCH_SIZE = 10
+
+
+class LeaseLost(Exception):
+    """
+    Raised by a heartbeat when the lease expired and was taken over
+    """
+
+
+class SyncLease:
+    """
+    A lease on a SyncLock row, held by at most one process across all nodes
+    sharing the database.
+
+    The lease expires `timeout` seconds after it was last renewed, after
+    which another process can take it over. heartbeat() renews it and
+    should be called between units of work. It only writes to the
+    database once a tenth of the timeout has passed since the last renewal.
+
+    A lease also records what its sync works on: a sharding.Shard, whether
+    it is a worker of a parallel sync, and its `phase`, "import" or "export"
+    or empty for both. It can't be acquired while a lease it conflicts with
+    is held, see conflicts_with().
+    """
+
+    def __init__(
+        self,
+        name="sync",
+        timeout=None,
+        clock=time.monotonic,
+        shard=None,
+        parallel=False,
+        phase="",
+    ):
+        if timeout is None:
+            timeout = settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD.get(
+                "SYNC_LOCK_TIMEOUT", DEFAULT_LEASE_SECONDS
+            )
+        self.name = name
+        self.timeout = timeout
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.clock = clock
+        self.shard = shard
+        self.parallel = parallel
+        self.phase = phase
+        self.renewed_at = None
+
+    @classmethod
+    def is_held(cls, name=None):
+        """
+        Returns True if the lease called `name`, or any lease without a name,
+        is held
+        """
+        leases = SyncLock.objects.filter(expires_at__gt=timezone.now())
+        if name is not None:
+            leases = leases.filter(name=name)
+        return leases.exists()
+
+    def _expires_at(self, now):
+        return now + datetime.timedelta(seconds=self.timeout)
+
+    def _scope(self):
+        return {
+            "shard_index": None if self.shard is None else self.shard.index,
+            "shard_count": None if self.shard is None else self.shard.count,
+            "parallel": self.parallel,
+            "phase": self.phase,
+        }
+
+    def conflicts_with(self, lock):
+        """
+        Returns True if the sync holding this lease can't run alongside the
+        one holding the SyncLock `lock`.
+
+        Syncs of different phases never conflict. The workers of a parallel
+        sync share the work by claiming projects, so they don't exclude each
+        other, but they exclude any other sync. Shards of the same count
+        don't exclude each other, but they exclude unsharded syncs and
+        shards of another count, whose projects overlap theirs.
+        """
+        if self.phase and lock.phase and self.phase != lock.phase:
+            return False
+        if self.parallel or lock.parallel:
+            return self.parallel != lock.parallel
+        if self.shard is not None and lock.shard_count == self.shard.count:
+            return lock.shard_index == self.shard.index
+        return True
+
+    def acquire(self):
+        """
+        Takes the lease if it is free or expired. Returns False, without
+        waiting, if another process holds it or a conflicting lease.
+        """
+        now = timezone.now()
+        taken = (
+            SyncLock.objects.filter(name=self.name)
+            .filter(Q(expires_at__lte=now) | Q(owner=self.owner))
+            .update(
+                owner=self.owner,
+                acquired_at=now,
+                expires_at=self._expires_at(now),
+                **self._scope(),
+            )
+        )
+        if not taken:
+            try:
+                with transaction.atomic():
+                    SyncLock.objects.create(
+                        name=self.name,
+                        owner=self.owner,
+                        acquired_at=now,
+                        expires_at=self._expires_at(now),
+                        **self._scope(),
+                    )
+            except IntegrityError:
+                return False
+
+        # checked once the lease is taken, so of two processes taking
+        # conflicting leases at once at least one sees the other's
+        held = SyncLock.objects.filter(expires_at__gt=now).exclude(name=self.name)
+        if any(self.conflicts_with(lock) for lock in held):
+            self.release()
+            return False
+
+        self.renewed_at = self.clock()
+        return True
+
+    def heartbeat(self):
+        """
+        Renews the lease. Raises LeaseLost if another process took it over.
+        """
+        if self.renewed_at is None:
+            raise LeaseLost(f"{self.name} lease is not held")
+        if self.clock() - self.renewed_at < self.timeout / 10:
+            return
+
+        renewed = SyncLock.objects.filter(name=self.name, owner=self.owner).update(
+            expires_at=self._expires_at(timezone.now())
+        )
+        if not renewed:
+            self.renewed_at = None
+            raise LeaseLost(f"{self.name} lease was taken over")
+        self.renewed_at = self.clock()
+
+    def release(self):
+        SyncLock.objects.filter(name=self.name, owner=self.owner).delete()
+        self.renewed_at = None
+
+
+class ProjectClaims:
+    """
+    Claims LanguageCloudProjects for one of several workers running a sync in
+    parallel, so that each project is processed by a single worker.
+
+    Projects are claimed `batch_size` at a time, by locking unclaimed rows
+    with SELECT ... FOR UPDATE SKIP LOCKED and marking them with a lease that
+    expires `timeout` seconds later. Rows locked by another worker are
+    skipped before the batch is limited, so a worker only gets an empty batch
+    once no unclaimed project is left. heartbeat() renews the leases of the
+    projects held, and the projects of a worker that stops heartbeating go
+    back to the pool once their leases expire.
+    """
+
+    def __init__(self, timeout=None, batch_size=None, clock=time.monotonic):
+        lc_settings = settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD
+        if timeout is None:
+            timeout = lc_settings.get("SYNC_LOCK_TIMEOUT", DEFAULT_LEASE_SECONDS)
+        if batch_size is None:
+            batch_size = lc_settings.get("CLAIM_BATCH_SIZE", DEFAULT_CLAIM_BATCH_SIZE)
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.clock = clock
+        self.renewed_at = clock()
+
+    def _held(self):
+        return LanguageCloudProject.objects.filter(claimed_by=self.owner)
+
+    def claim(self, queryset):
+        """
+        Claims up to batch_size unclaimed projects from queryset, and
+        returns them as evaluated by queryset.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            # only the project rows are locked, not those of related models
+            # joined by queryset
+            projects = list(
+                queryset.filter(
+                    Q(claimed_until__isnull=True) | Q(claimed_until__lte=now)
+                ).select_for_update(skip_locked=True, of=("self",))[: self.batch_size]
+            )
+            LanguageCloudProject.objects.filter(
+                pk__in=[project.pk for project in projects]
+            ).update(claimed_by=self.owner, claimed_until=self._expires_at(now))
+        return projects
+
+    def _expires_at(self, now):
+        return now + datetime.timedelta(seconds=self.timeout)
+
+    def heartbeat(self):
+        if self.clock() - self.renewed_at < self.timeout / 10:
+            return
+        self._held().update(claimed_until=self._expires_at(timezone.now()))
+        self.renewed_at = self.clock()
+
+    def release(self):
+        self._held().update(claimed_by="", claimed_until=None)
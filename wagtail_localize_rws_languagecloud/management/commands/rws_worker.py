@@ -0,0 +1,69 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...background import run_queued_jobs
+from ...models import SyncJob
+
+
+class Command(BaseCommand):
+    help = "Run the syncs queued with the DatabaseQueueBackend sync backend"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            default=False,
+            help="Run the queued syncs, if any, then exit",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=5,
+            help="Seconds to wait between checks for queued syncs",
+        )
+        parser.add_argument(
+            "--max-sleep",
+            type=float,
+            default=300,
+            help=(
+                "Longest wait between retries of syncs requeued because "
+                "another sync held the lock"
+            ),
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Number of files to transfer to and from LanguageCloud at once",
+        )
+
+    def handle(self, **options):
+        log_level = logging.INFO
+        if options["verbosity"] > 1:
+            log_level = logging.DEBUG
+
+        logger = logging.getLogger(__name__)
+
+        # Enable logging to console
+        console = logging.StreamHandler()
+        console.setLevel(log_level)
+        console.setFormatter(logging.Formatter("%(levelname)s - %(message)s"))
+        logger.addHandler(console)
+        logger.setLevel(log_level)
+
+        sleep = options["sleep"]
+        while True:
+            run = run_queued_jobs(logger=logger, concurrency=options["concurrency"])
+            if options["once"]:
+                return
+            if run:
+                sleep = options["sleep"]
+                continue
+            if SyncJob.objects.filter(status=SyncJob.STATUS_QUEUED).exists():
+                # requeued as another sync holds the lock, so back off
+                sleep = min(sleep * 2, options["max_sleep"])
+            else:
+                sleep = options["sleep"]
+            time.sleep(sleep)
@@ -0,0 +1,65 @@
+import json
+
+import requests
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from ... import views, webhooks
+
+
+class Command(BaseCommand):
+    help = (
+        "Send a signed LanguageCloud webhook event, to test the webhook endpoint "
+        "without LanguageCloud"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_id", help="The LanguageCloud project id")
+        parser.add_argument(
+            "--event-type",
+            default="PROJECT.STATUS.CHANGED",
+            help="The eventType of the event",
+        )
+        parser.add_argument(
+            "--status", default="", help="The new status of the project, if any"
+        )
+        parser.add_argument(
+            "--url",
+            help=(
+                "URL of the webhook endpoint to post the event to. "
+                "Defaults to calling the view in this process"
+            ),
+        )
+
+    def handle(self, **options):
+        secret = settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD.get("WEBHOOK_SECRET")
+        if not secret:
+            raise CommandError("The WEBHOOK_SECRET setting is not set")
+
+        data = {"projectId": options["project_id"]}
+        if options["status"]:
+            data["status"] = options["status"]
+        body = json.dumps({"eventType": options["event_type"], "data": data}).encode()
+        signature = webhooks.get_signature(secret, body)
+
+        if options["url"]:
+            response = requests.post(
+                options["url"],
+                data=body,
+                headers={
+                    "Content-Type": "application/json",
+                    webhooks.SIGNATURE_HEADER: signature,
+                },
+            )
+        else:
+            request = RequestFactory().post(
+                "/",
+                data=body,
+                content_type="application/json",
+                HTTP_X_LC_SIGNATURE=signature,
+            )
+            response = views.webhook(request)
+
+        self.stdout.write(f"{response.status_code} {response.content.decode()}")
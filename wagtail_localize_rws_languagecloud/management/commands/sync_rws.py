@@ -1,12 +1,119 @@
+import argparse
 import logging
 
 from django.core.management.base import BaseCommand
 
+from ...planning import plan_sync
+from ...selection import ProjectSelection
+from ...sharding import Shard
 from ...sync import SyncManager
 
 
+def shard(value):
+    try:
+        return Shard.parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
 class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help=(
+                "Number of source files to upload, and target files to download, "
+                "at once"
+            ),
+        )
+        parser.add_argument(
+            "--parallel",
+            action="store_true",
+            default=False,
+            help=(
+                "Share the work with other syncs running at the same time, "
+                "instead of skipping the sync if another one is running"
+            ),
+        )
+        parser.add_argument(
+            "--max-seconds",
+            type=float,
+            default=None,
+            help=(
+                "Stop between projects once the sync has run for this long. "
+                "The next sync carries on where this one stopped"
+            ),
+        )
+        parser.add_argument(
+            "--shard",
+            type=shard,
+            default=None,
+            metavar="INDEX/COUNT",
+            help=(
+                "Only sync the projects of one of COUNT shards, e.g. 0/4, so "
+                "that COUNT syncs can run side by side"
+            ),
+        )
+        phases = parser.add_mutually_exclusive_group()
+        phases.add_argument(
+            "--import-only",
+            action="store_true",
+            default=False,
+            help="Only import translations from LanguageCloud",
+        )
+        phases.add_argument(
+            "--export-only",
+            action="store_true",
+            default=False,
+            help="Only export translations to LanguageCloud",
+        )
+        parser.add_argument(
+            "--project",
+            type=int,
+            action="append",
+            dest="project_ids",
+            metavar="PK",
+            help="Only sync the project with this primary key. Can be repeated",
+        )
+        parser.add_argument(
+            "--lc-project-id",
+            action="append",
+            dest="lc_project_ids",
+            metavar="ID",
+            help="Only sync the project with this LanguageCloud id. Can be repeated",
+        )
+        parser.add_argument(
+            "--locale",
+            action="append",
+            dest="locales",
+            metavar="LANGUAGE_CODE",
+            help="Only sync projects translated into this locale. Can be repeated",
+        )
+        parser.add_argument(
+            "--max-projects",
+            type=int,
+            default=None,
+            help=(
+                "Stop once this many projects have been worked on. "
+                "The next sync carries on where this one stopped"
+            ),
+        )
+        parser.add_argument(
+            "--plan",
+            action="store_true",
+            default=False,
+            help=(
+                "Report the work waiting for a sync with these options, and how "
+                "long it should take, without syncing or calling the API"
+            ),
+        )
+
     def handle(self, **options):
+        if options["plan"]:
+            self.print_plan(options)
+            return
+
         log_level = logging.INFO
         if options["verbosity"] > 1:
             log_level = logging.DEBUG
@@ -20,4 +127,64 @@ class Command(BaseCommand):
         logger.addHandler(console)
         logger.setLevel(log_level)
 
-        SyncManager(logger=logger).sync()
+        SyncManager(logger=logger).sync(
+            concurrency=options["concurrency"],
+            parallel=options["parallel"],
+            max_seconds=options["max_seconds"],
+            shard=options["shard"],
+            import_only=options["import_only"],
+            export_only=options["export_only"],
+            project_ids=options["project_ids"],
+            lc_project_ids=options["lc_project_ids"],
+            locales=options["locales"],
+            max_projects=options["max_projects"],
+        )
+
+    def print_plan(self, options):
+        plan = plan_sync(
+            concurrency=options["concurrency"],
+            import_only=options["import_only"],
+            export_only=options["export_only"],
+            selection=ProjectSelection(
+                options["shard"],
+                options["project_ids"],
+                options["lc_project_ids"],
+                options["locales"],
+            ),
+        )
+        counts = plan.counts
+        if not options["import_only"]:
+            self.stdout.write(
+                f"Projects to create: {counts['projects_to_create']} "
+                f"({counts['local_projects_to_create']} from new project settings)"
+            )
+            self.stdout.write(f"Source files to upload: {counts['files_to_upload']}")
+            self.stdout.write(f"Projects to start: {counts['projects_to_start']}")
+        if not options["export_only"]:
+            self.stdout.write(
+                f"Projects to poll: {counts['projects_to_poll']} "
+                f"(and {counts['projects_reported']} reported by webhooks)"
+            )
+            self.stdout.write(
+                f"Target files to download: {counts['files_to_download']}"
+            )
+
+        self.stdout.write(f"API calls: {plan.total_api_calls}")
+        for family, calls in sorted(plan.api_calls.items()):
+            if family in plan.latencies:
+                self.stdout.write(
+                    f"  {family}: {calls}, {plan.latencies[family]:.3f}s per call"
+                )
+            else:
+                self.stdout.write(f"  {family}: {calls}, no recent latency data")
+
+        seconds = plan.estimated_seconds
+        if seconds is None:
+            self.stdout.write(
+                "Estimated duration: unknown, no recent sync made any API calls"
+            )
+            return
+        estimate = f"Estimated duration: {seconds:.0f}s"
+        if plan.unknown_latencies:
+            estimate += f", not counting {', '.join(plan.unknown_latencies)} calls"
+        self.stdout.write(estimate)
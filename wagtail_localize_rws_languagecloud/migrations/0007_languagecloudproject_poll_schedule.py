@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wagtail_localize_rws_languagecloud", "0006_languagecloudfile_revision"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="languagecloudproject",
+            name="status_changed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="languagecloudproject",
+            name="next_poll_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wagtail_localize_rws_languagecloud", "0008_syncjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncLock",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("owner", models.CharField(max_length=255)),
+                ("acquired_at", models.DateTimeField()),
+                ("expires_at", models.DateTimeField()),
+            ],
+        ),
+    ]
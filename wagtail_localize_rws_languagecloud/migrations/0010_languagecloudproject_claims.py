@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wagtail_localize_rws_languagecloud", "0009_synclock"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="languagecloudproject",
+            name="claimed_by",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="languagecloudproject",
+            name="claimed_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,67 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_file_counts(apps, schema_editor):
+    LanguageCloudProject = apps.get_model(
+        "wagtail_localize_rws_languagecloud", "LanguageCloudProject"
+    )
+    LanguageCloudFile = apps.get_model(
+        "wagtail_localize_rws_languagecloud", "LanguageCloudFile"
+    )
+
+    def count_files(*filters):
+        return Coalesce(
+            Subquery(
+                LanguageCloudFile.objects.filter(*filters, project=OuterRef("pk"))
+                .order_by()
+                .values("project")
+                .annotate(count=Count("pk"))
+                .values("count")
+            ),
+            0,
+        )
+
+    LanguageCloudProject.objects.update(
+        files_total=count_files(),
+        files_created=count_files(~Q(lc_source_file_id="")),
+        files_imported=count_files(Q(internal_status="imported")),
+        files_errored=count_files(Q(internal_status="error")),
+        files_exceeding_create_attempts=count_files(Q(create_attempts__gte=3)),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wagtail_localize_rws_languagecloud", "0010_languagecloudproject_claims"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="languagecloudproject",
+            name="files_created",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="languagecloudproject",
+            name="files_errored",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="languagecloudproject",
+            name="files_exceeding_create_attempts",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="languagecloudproject",
+            name="files_imported",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="languagecloudproject",
+            name="files_total",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_file_counts, migrations.RunPython.noop),
+    ]
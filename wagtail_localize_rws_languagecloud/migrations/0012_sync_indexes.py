@@ -0,0 +1,92 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wagtail_localize_rws_languagecloud", "0011_languagecloudproject_file_counts"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="languagecloudfile",
+            index=models.Index(
+                fields=["project", "internal_status"], name="lc_file_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="languagecloudfile",
+            index=models.Index(
+                condition=models.Q(
+                    models.Q(("internal_status", "imported"), _negated=True),
+                    models.Q(("lc_source_file_id", ""), _negated=True),
+                ),
+                fields=["project"],
+                name="lc_file_import_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="languagecloudproject",
+            index=models.Index(
+                fields=["internal_status", "lc_project_status"],
+                name="lc_project_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="languagecloudproject",
+            index=models.Index(
+                fields=["lc_project_id", "create_attempts"],
+                name="lc_project_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="languagecloudproject",
+            index=models.Index(
+                fields=["-source_last_updated_at"], name="lc_project_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="languagecloudproject",
+            index=models.Index(
+                condition=models.Q(
+                    models.Q(("internal_status", "imported"), _negated=True),
+                    models.Q(
+                        (
+                            "lc_project_status__in",
+                            ["inProgress", "completed", "archived"],
+                        ),
+                        _negated=True,
+                    ),
+                ),
+                fields=["id"],
+                name="lc_project_export_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="languagecloudproject",
+            index=models.Index(
+                condition=models.Q(
+                    models.Q(("internal_status", "imported"), _negated=True),
+                    models.Q(("lc_project_status", "archived"), _negated=True),
+                    models.Q(("lc_project_id", ""), _negated=True),
+                ),
+                fields=["next_poll_at"],
+                name="lc_project_import_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="languagecloudproject",
+            index=models.Index(
+                condition=models.Q(("claimed_by", ""), _negated=True),
+                fields=["claimed_by"],
+                name="lc_project_claimed_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="languagecloudprojectsettings",
+            index=models.Index(
+                condition=models.Q(("lc_project__isnull", True)),
+                fields=["id"],
+                name="lc_settings_unprocessed_idx",
+            ),
+        ),
+    ]
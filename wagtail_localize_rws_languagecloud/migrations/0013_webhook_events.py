@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wagtail_localize_rws_languagecloud", "0012_sync_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="languagecloudproject",
+            name="event_received_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="syncjob",
+            name="scope",
+            field=models.CharField(
+                choices=[("all", "all"), ("events", "events")],
+                default="all",
+                max_length=255,
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wagtail_localize_rws_languagecloud", "0013_webhook_events"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncRun",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "running"),
+                            ("finished", "finished"),
+                            ("failed", "failed"),
+                            ("skipped", "skipped"),
+                            ("stopped", "stopped"),
+                        ],
+                        default="running",
+                        max_length=255,
+                    ),
+                ),
+                ("started_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("phase_durations", models.JSONField(default=dict)),
+                ("api_calls", models.PositiveIntegerField(default=0)),
+                ("api_bytes_sent", models.BigIntegerField(default=0)),
+                ("api_bytes_received", models.BigIntegerField(default=0)),
+                ("api_stats", models.JSONField(default=dict)),
+                ("rows_written", models.PositiveIntegerField(default=0)),
+                ("failures", models.PositiveIntegerField(default=0)),
+                ("error", models.TextField(blank=True)),
+            ],
+            options={
+                "ordering": ["-started_at", "-id"],
+            },
+        ),
+    ]
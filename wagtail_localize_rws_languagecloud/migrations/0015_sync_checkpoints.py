@@ -0,0 +1,44 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wagtail_localize_rws_languagecloud", "0014_sync_runs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("phase", models.CharField(max_length=255)),
+                ("last_pk", models.PositiveIntegerField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="syncrun",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("running", "running"),
+                    ("finished", "finished"),
+                    ("failed", "failed"),
+                    ("skipped", "skipped"),
+                    ("stopped", "stopped"),
+                    ("out_of_time", "out_of_time"),
+                ],
+                default="running",
+                max_length=255,
+            ),
+        ),
+    ]
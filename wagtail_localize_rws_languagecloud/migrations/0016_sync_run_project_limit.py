@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wagtail_localize_rws_languagecloud", "0015_sync_checkpoints"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="syncrun",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("running", "running"),
+                    ("finished", "finished"),
+                    ("failed", "failed"),
+                    ("skipped", "skipped"),
+                    ("stopped", "stopped"),
+                    ("out_of_time", "out_of_time"),
+                    ("project_limit", "project_limit"),
+                ],
+                default="running",
+                max_length=255,
+            ),
+        ),
+    ]
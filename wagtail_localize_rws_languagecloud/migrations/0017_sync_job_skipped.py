@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wagtail_localize_rws_languagecloud", "0016_sync_run_project_limit"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="syncjob",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("queued", "queued"),
+                    ("running", "running"),
+                    ("finished", "finished"),
+                    ("failed", "failed"),
+                    ("skipped", "skipped"),
+                ],
+                default="queued",
+                max_length=255,
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wagtail_localize_rws_languagecloud", "0017_sync_job_skipped"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="synclock",
+            name="parallel",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="synclock",
+            name="phase",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="synclock",
+            name="shard_count",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="synclock",
+            name="shard_index",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
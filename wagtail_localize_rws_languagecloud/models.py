@@ -1,5 +1,9 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy
 from wagtail import VERSION as WAGTAIL_VERSION
@@ -42,6 +46,69 @@ class StatusModel(models.Model):
     class Meta:
         abstract = True
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_db_values(field_names)
+        return instance
+
+    def remember_db_values(self, field_names=None):
+        """
+        Records the current values of the given fields (all by default) as
+        the values stored in the database, see get_changed_fields()
+        """
+        if not hasattr(self, "_db_values"):
+            self._db_values = {}
+        if field_names is None:
+            attnames = [field.attname for field in self._meta.concrete_fields]
+        else:
+            attnames = [self._meta.get_field(name).attname for name in field_names]
+        for attname in attnames:
+            if attname in self.__dict__:
+                self._db_values[attname] = self.__dict__[attname]
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        fields = args[1] if len(args) > 1 else kwargs.get("fields")
+        self.remember_db_values(fields)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.remember_db_values(kwargs.get("update_fields"))
+
+    def get_changed_fields(self):
+        """
+        Returns the names of the fields changed since the instance was loaded
+        from, or last saved to, the database. Returns None for new instances.
+        """
+        if self._state.adding:
+            return None
+        db_values = getattr(self, "_db_values", {})
+        return [
+            field.name
+            for field in self._meta.concrete_fields
+            if not field.primary_key
+            and field.attname in self.__dict__
+            and (
+                field.attname not in db_values
+                or self.__dict__[field.attname] != db_values[field.attname]
+            )
+        ]
+
+    def save_changes(self):
+        """
+        Saves the fields returned by get_changed_fields() with update_fields,
+        or nothing if none of them changed. Returns True if a row was written.
+        """
+        changed_fields = self.get_changed_fields()
+        if changed_fields is None:
+            self.save()
+            return True
+        if not changed_fields:
+            return False
+        self.save(update_fields=changed_fields)
+        return True
+
 
 class LanguageCloudStatus(models.TextChoices):
     CREATED = "created", gettext_lazy("Created")
@@ -50,6 +117,71 @@ class LanguageCloudStatus(models.TextChoices):
     ARCHIVED = "archived", gettext_lazy("Archived")
 
 
+def file_count_subquery(file_model, condition=None):
+    """
+    A subquery counting the files of the outer LanguageCloudProject that
+    match condition
+    """
+    files = file_model.objects.filter(project=OuterRef("pk"))
+    if condition is not None:
+        files = files.filter(condition)
+    return Coalesce(
+        Subquery(
+            files.order_by()
+            .values("project")
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+FILE_COUNT_FIELDS = [
+    "files_total",
+    "files_created",
+    "files_imported",
+    "files_errored",
+    "files_exceeding_create_attempts",
+]
+
+# the LanguageCloudFile fields the counters depend on
+FILE_COUNTED_FIELDS = {
+    "project",
+    "lc_source_file_id",
+    "internal_status",
+    "create_attempts",
+}
+
+
+def file_count_subqueries(file_model):
+    """
+    Returns the counters maintained on LanguageCloudProject, as subqueries
+    counting its files
+    """
+    return {
+        "files_total": file_count_subquery(file_model),
+        "files_created": file_count_subquery(file_model, ~Q(lc_source_file_id="")),
+        "files_imported": file_count_subquery(
+            file_model, Q(internal_status=StatusModel.STATUS_IMPORTED)
+        ),
+        "files_errored": file_count_subquery(
+            file_model, Q(internal_status=StatusModel.STATUS_ERROR)
+        ),
+        "files_exceeding_create_attempts": file_count_subquery(
+            file_model, Q(create_attempts__gte=3)
+        ),
+    }
+
+
+class LanguageCloudProjectQuerySet(models.QuerySet):
+    def refresh_file_counts(self):
+        """
+        Recomputes the file counters of the projects from their files,
+        in a single UPDATE
+        """
+        return self.update(**file_count_subqueries(LanguageCloudFile))
+
+
 class LanguageCloudProject(StatusModel):
     translation_source = models.ForeignKey(TranslationSource, on_delete=models.CASCADE)
     source_last_updated_at = models.DateTimeField()
@@ -61,29 +193,101 @@ class LanguageCloudProject(StatusModel):
     or empty string
     """
     lc_project_status = models.CharField(blank=True, max_length=255)
+    status_changed_at = models.DateTimeField(null=True, blank=True)
+    # when sync_rws should next check the project's status. NULL means
+    # the next run, see polling.get_next_poll_at()
+    next_poll_at = models.DateTimeField(null=True, blank=True)
+    # set while a worker processes the project in a parallel sync,
+    # see locking.ProjectClaims
+    claimed_by = models.CharField(blank=True, max_length=255)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    # set when a LanguageCloud webhook reported a change, so the next sync
+    # imports the project without polling its status, see webhooks.py
+    event_received_at = models.DateTimeField(null=True, blank=True)
+
+    # counts of the project's files, kept up to date by LanguageCloudFile
+    files_total = models.IntegerField(default=0, editable=False)
+    files_created = models.IntegerField(default=0, editable=False)
+    files_imported = models.IntegerField(default=0, editable=False)
+    files_errored = models.IntegerField(default=0, editable=False)
+    files_exceeding_create_attempts = models.IntegerField(default=0, editable=False)
+
+    objects = LanguageCloudProjectQuerySet.as_manager()
 
     class Meta:
         unique_together = [
             ("translation_source", "source_last_updated_at"),
         ]
         ordering = ["-source_last_updated_at"]
+        indexes = [
+            models.Index(
+                fields=["internal_status", "lc_project_status"],
+                name="lc_project_status_idx",
+            ),
+            models.Index(
+                fields=["lc_project_id", "create_attempts"],
+                name="lc_project_created_idx",
+            ),
+            models.Index(
+                fields=["-source_last_updated_at"], name="lc_project_updated_idx"
+            ),
+            # partial indexes only covering the projects sync_rws still has
+            # to look at. Skipped on databases without partial indexes
+            models.Index(
+                fields=["id"],
+                name="lc_project_export_idx",
+                condition=~Q(internal_status=StatusModel.STATUS_IMPORTED)
+                & ~Q(
+                    lc_project_status__in=[
+                        LanguageCloudStatus.IN_PROGRESS,
+                        LanguageCloudStatus.COMPLETED,
+                        LanguageCloudStatus.ARCHIVED,
+                    ]
+                ),
+            ),
+            models.Index(
+                fields=["next_poll_at"],
+                name="lc_project_import_idx",
+                condition=~Q(internal_status=StatusModel.STATUS_IMPORTED)
+                & ~Q(lc_project_status=LanguageCloudStatus.ARCHIVED)
+                & ~Q(lc_project_id=""),
+            ),
+            models.Index(
+                fields=["claimed_by"],
+                name="lc_project_claimed_idx",
+                condition=~Q(claimed_by=""),
+            ),
+        ]
+
+    def save(
+        self, force_insert=False, force_update=False, using=None, update_fields=None
+    ):
+        if update_fields is None and not self._state.adding:
+            # the file counters are maintained by LanguageCloudFile.save(),
+            # don't overwrite them with the values loaded with this instance
+            update_fields = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in FILE_COUNT_FIELDS
+            ]
+        super().save(
+            force_insert=force_insert,
+            force_update=force_update,
+            using=using,
+            update_fields=update_fields,
+        )
 
     @property
     def all_files_imported(self):
-        children_imported = [
-            f.internal_status == LanguageCloudFile.STATUS_IMPORTED
-            for f in self.languagecloudfile_set.all()
-        ]
-        return len(children_imported) > 0 and False not in children_imported
+        return self.files_total > 0 and self.files_imported == self.files_total
 
     @property
     def is_created(self):
         # True if project AND all source files created in LanguageCloud
-        children_created = [f.is_created for f in self.languagecloudfile_set.all()]
         return (
             self.lc_project_id != ""
-            and len(children_created) > 0
-            and False not in children_created
+            and self.files_total > 0
+            and self.files_created == self.files_total
         )
 
     @property
@@ -121,6 +325,34 @@ class LanguageCloudFile(StatusModel):
             ("translation", "project"),
         ]
         ordering = ["-project__source_last_updated_at"]
+        indexes = [
+            models.Index(
+                fields=["project", "internal_status"], name="lc_file_status_idx"
+            ),
+            # files that still have to be imported
+            models.Index(
+                fields=["project"],
+                name="lc_file_import_idx",
+                condition=~Q(internal_status=StatusModel.STATUS_IMPORTED)
+                & ~Q(lc_source_file_id=""),
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not FILE_COUNTED_FIELDS.intersection(
+            update_fields
+        ):
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            LanguageCloudProject.objects.filter(
+                pk=self.project_id
+            ).refresh_file_counts()
+        if LanguageCloudFile.project.is_cached(self):
+            self.project.refresh_from_db(fields=FILE_COUNT_FIELDS)
 
     @property
     def is_created(self):
@@ -199,6 +431,12 @@ class LanguageCloudFile(StatusModel):
         return gettext_lazy("Unknown")
 
 
+@receiver(post_delete, sender=LanguageCloudFile)
+def refresh_project_file_counts(sender, instance, **kwargs):
+    # runs in the transaction deleting the file
+    LanguageCloudProject.objects.filter(pk=instance.project_id).refresh_file_counts()
+
+
 @register_translation_component(
     heading=gettext_lazy("Send translation to RWS Language Cloud"),
     help_text=gettext_lazy(
@@ -246,6 +484,14 @@ class LanguageCloudProjectSettings(models.Model):
         unique_together = [
             ("translation_source", "source_last_updated_at"),
         ]
+        indexes = [
+            # settings still waiting for a local project to be created
+            models.Index(
+                fields=["id"],
+                name="lc_settings_unprocessed_idx",
+                condition=Q(lc_project__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         return f"LanguageCloudProjectSettings ({self.pk}): {self.name}"
@@ -284,3 +530,157 @@ class LanguageCloudProjectSettings(models.Model):
             translation.target_locale.language_code
             for translation in self.translations.all().select_related("target_locale")
         ]
+
+
+class SyncJob(models.Model):
+    """
+    A sync requested from the admin, run by a background backend.
+    See background.py
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_FINISHED = "finished"
+    STATUS_FAILED = "failed"
+    # another sync held the sync lock, and nothing would run the job later
+    STATUS_SKIPPED = "skipped"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, STATUS_QUEUED),
+        (STATUS_RUNNING, STATUS_RUNNING),
+        (STATUS_FINISHED, STATUS_FINISHED),
+        (STATUS_FAILED, STATUS_FAILED),
+        (STATUS_SKIPPED, STATUS_SKIPPED),
+    ]
+    status = models.CharField(
+        max_length=255, choices=STATUS_CHOICES, default=STATUS_QUEUED
+    )
+    # a full sync, or only the import of the projects reported by webhooks
+    SCOPE_ALL = "all"
+    SCOPE_EVENTS = "events"
+    SCOPE_CHOICES = [
+        (SCOPE_ALL, SCOPE_ALL),
+        (SCOPE_EVENTS, SCOPE_EVENTS),
+    ]
+    scope = models.CharField(max_length=255, choices=SCOPE_CHOICES, default=SCOPE_ALL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+
+    def __str__(self):
+        return f"SyncJob ({self.pk}): {self.status}"
+
+
+class SyncLock(models.Model):
+    """
+    A lease held by a running sync, see locking.py
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    owner = models.CharField(max_length=255)
+    acquired_at = models.DateTimeField()
+    expires_at = models.DateTimeField()
+    # what the sync works on, to tell which syncs can run at once
+    shard_index = models.PositiveIntegerField(null=True, blank=True)
+    shard_count = models.PositiveIntegerField(null=True, blank=True)
+    parallel = models.BooleanField(default=False)
+    # "import" or "export", or empty for both
+    phase = models.CharField(max_length=255, blank=True)
+
+    def __str__(self):
+        return f"SyncLock ({self.name}): {self.owner}"
+
+
+class SyncCheckpoint(models.Model):
+    """
+    Where the last sync stopped when it ran out of time: the phase it was
+    in and the last object that phase processed. See budget.py
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    phase = models.CharField(max_length=255)
+    last_pk = models.PositiveIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"SyncCheckpoint ({self.name}): {self.phase} after {self.last_pk}"
+
+
+class SyncRun(models.Model):
+    """
+    A record of a SyncManager.sync() call: the time taken by each of its
+    phases and the work it did. Listed in the "LanguageCloud syncs" report.
+    """
+
+    STATUS_RUNNING = "running"
+    STATUS_FINISHED = "finished"
+    STATUS_FAILED = "failed"
+    # another sync held the sync lock, or took it over part way through
+    STATUS_SKIPPED = "skipped"
+    STATUS_STOPPED = "stopped"
+    # the sync used up its time budget or processed as many projects as it
+    # was allowed to, see budget.py
+    STATUS_OUT_OF_TIME = "out_of_time"
+    STATUS_PROJECT_LIMIT = "project_limit"
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, STATUS_RUNNING),
+        (STATUS_FINISHED, STATUS_FINISHED),
+        (STATUS_FAILED, STATUS_FAILED),
+        (STATUS_SKIPPED, STATUS_SKIPPED),
+        (STATUS_STOPPED, STATUS_STOPPED),
+        (STATUS_OUT_OF_TIME, STATUS_OUT_OF_TIME),
+        (STATUS_PROJECT_LIMIT, STATUS_PROJECT_LIMIT),
+    ]
+    PHASE_CHOICES = [
+        ("auth", gettext_lazy("Authentication")),
+        ("import_poll", gettext_lazy("Status polls")),
+        ("download", gettext_lazy("Downloads")),
+        ("import", gettext_lazy("Imports")),
+        ("local_create", gettext_lazy("Local projects")),
+        ("remote_create", gettext_lazy("Remote projects")),
+        ("upload", gettext_lazy("Uploads")),
+        ("start", gettext_lazy("Project starts")),
+    ]
+
+    status = models.CharField(
+        max_length=255, choices=STATUS_CHOICES, default=STATUS_RUNNING
+    )
+    started_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # seconds spent in each phase, keyed by the names in PHASE_CHOICES.
+    # Downloads add up the time spent in each download thread
+    phase_durations = models.JSONField(default=dict)
+    api_calls = models.PositiveIntegerField(default=0)
+    api_bytes_sent = models.BigIntegerField(default=0)
+    api_bytes_received = models.BigIntegerField(default=0)
+    # calls, bytes_sent, bytes_received and seconds by API endpoint family
+    api_stats = models.JSONField(default=dict)
+    rows_written = models.PositiveIntegerField(default=0)
+    # the number of errors logged, e.g. failed uploads or downloads
+    failures = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-started_at", "-id"]
+
+    def __str__(self):
+        return f"SyncRun ({self.pk}): {self.status}"
+
+    @property
+    def duration(self):
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def get_phase_durations(self):
+        """
+        Returns (label, seconds) pairs for the phases that ran
+        """
+        return [
+            (label, self.phase_durations[phase])
+            for phase, label in self.PHASE_CHOICES
+            if phase in self.phase_durations
+        ]
@@ -0,0 +1,195 @@
+import math
+
+from collections import Counter, defaultdict
+
+from django.utils import timezone
+
+from .models import (
+    LanguageCloudFile,
+    LanguageCloudProject,
+    LanguageCloudProjectSettings,
+    LanguageCloudStatus,
+    SyncRun,
+)
+from .rws_client import PAGE_SIZE
+from .selection import ProjectSelection
+from .sync import (
+    _get_projects_to_export,
+    _get_projects_to_import,
+    _get_projects_to_start,
+    _single_source_file_per_project,
+)
+
+
+RECENT_RUNS = 10
+
+# API endpoint families called from `concurrency` threads at once
+CONCURRENT_FAMILIES = ["source_file", "target_file"]
+
+
+def get_recent_latencies(runs=RECENT_RUNS):
+    """
+    Returns the average time taken by an API call of each endpoint family,
+    in seconds, over the last `runs` SyncRuns that made API calls
+    """
+    totals = defaultdict(lambda: {"calls": 0, "seconds": 0})
+    recent_runs = SyncRun.objects.filter(api_calls__gt=0).values_list(
+        "api_stats", flat=True
+    )[:runs]
+    for api_stats in recent_runs:
+        for family, stats in api_stats.items():
+            totals[family]["calls"] += stats.get("calls", 0)
+            totals[family]["seconds"] += stats.get("seconds", 0)
+    return {
+        family: total["seconds"] / total["calls"]
+        for family, total in totals.items()
+        if total["calls"]
+    }
+
+
+class SyncPlan:
+    """
+    What the next sync is expected to do, worked out from the database alone:
+    the work waiting in each phase, the API calls it takes and how long they
+    should take given the latency of recent syncs.
+
+    Estimates assume every API call succeeds, and that the projects due for
+    a poll keep the status recorded by the last sync.
+    """
+
+    def __init__(self, counts, api_calls, latencies, concurrency=1):
+        self.counts = counts
+        self.api_calls = api_calls
+        self.latencies = latencies
+        self.concurrency = concurrency
+
+    @property
+    def total_api_calls(self):
+        return sum(self.api_calls.values())
+
+    @property
+    def unknown_latencies(self):
+        """
+        The families with API calls but no recent latency data
+        """
+        return sorted(
+            family
+            for family, calls in self.api_calls.items()
+            if calls and family not in self.latencies
+        )
+
+    @property
+    def estimated_seconds(self):
+        """
+        The time the API calls should take, leaving out the families without
+        recent latency data. None if there is no latency data at all.
+        """
+        if not self.latencies:
+            return None
+        seconds = 0
+        for family, calls in self.api_calls.items():
+            family_seconds = calls * self.latencies.get(family, 0)
+            if family in CONCURRENT_FAMILIES:
+                family_seconds /= self.concurrency
+            seconds += family_seconds
+        return seconds
+
+
+def plan_sync(
+    concurrency=1,
+    import_only=False,
+    export_only=False,
+    selection=None,
+    now=None,
+):
+    """
+    Returns the SyncPlan of a sync run with the same options, without any
+    API calls
+    """
+    selection = selection or ProjectSelection()
+    now = now or timezone.now()
+    counts = Counter()
+    api_calls = Counter()
+
+    if not export_only:
+        projects_to_import = _get_projects_to_import(now, selection=selection)
+        counts["projects_reported"] = projects_to_import.filter(
+            event_received_at__isnull=False
+        ).count()
+        counts["projects_to_poll"] = (
+            projects_to_import.count() - counts["projects_reported"]
+        )
+        files_to_download = (
+            LanguageCloudFile.objects.filter(
+                project__in=projects_to_import.filter(
+                    lc_project_status__in=[
+                        LanguageCloudStatus.IN_PROGRESS,
+                        LanguageCloudStatus.COMPLETED,
+                    ]
+                ).values("pk")
+            )
+            .exclude(internal_status=LanguageCloudFile.STATUS_IMPORTED)
+            .exclude(lc_source_file_id="")
+        )
+        counts["files_to_download"] = files_to_download.count()
+        if counts["projects_to_poll"]:
+            # one listing of all the projects known to LanguageCloud
+            remote_projects = LanguageCloudProject.objects.exclude(
+                lc_project_id=""
+            ).count()
+            api_calls["project"] += max(math.ceil(remote_projects / PAGE_SIZE), 1)
+        # target files are listed once per project
+        api_calls["target_file"] += (
+            files_to_download.values("project_id").distinct().count()
+            + counts["files_to_download"]
+        )
+
+    if not import_only:
+        project_settings = selection.filter_settings(
+            LanguageCloudProjectSettings.objects.filter(lc_project_id__isnull=True)
+        )
+        Translations = LanguageCloudProjectSettings.translations.through
+        new_files = Translations.objects.filter(
+            languagecloudprojectsettings__in=project_settings.values("pk"),
+            translation__enabled=True,
+        )
+        projects_to_export = _get_projects_to_export(selection)
+        pending_files = LanguageCloudFile.objects.filter(
+            project__in=projects_to_export.values("pk"),
+            lc_source_file_id="",
+            translation__enabled=True,
+        )
+
+        counts["local_projects_to_create"] = project_settings.count()
+        counts["projects_to_create"] = (
+            counts["local_projects_to_create"]
+            + projects_to_export.filter(lc_project_id="").count()
+        )
+        if _single_source_file_per_project():
+            counts["files_to_upload"] = (
+                new_files.values("languagecloudprojectsettings_id").distinct().count()
+                + pending_files.values("project_id").distinct().count()
+            )
+        else:
+            counts["files_to_upload"] = new_files.count() + pending_files.count()
+        # the projects exported by this sync are started once uploaded
+        counts["projects_to_start"] = (
+            counts["local_projects_to_create"]
+            + projects_to_export.count()
+            + _get_projects_to_start(selection).count()
+        )
+
+        if counts["projects_to_create"]:
+            # project templates
+            api_calls["project"] += 1
+        api_calls["project"] += counts["projects_to_create"]
+        api_calls["project"] += counts["projects_to_start"]
+        api_calls["source_file"] += counts["files_to_upload"]
+
+    if api_calls:
+        # unless a token is cached
+        api_calls["auth"] += 1
+
+    return SyncPlan(
+        counts, dict(api_calls), get_recent_latencies(), concurrency=concurrency
+    )
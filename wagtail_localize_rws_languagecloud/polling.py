@@ -0,0 +1,53 @@
+import datetime
+
+from django.conf import settings
+
+from .models import LanguageCloudStatus
+
+
+DEFAULT_MIN_POLL_INTERVAL = datetime.timedelta(minutes=10)
+DEFAULT_MAX_POLL_INTERVAL = datetime.timedelta(hours=24)
+
+# Poll a project about four times over the time it has been idle, and over
+# the time left until it is due.
+BACKOFF_DIVISOR = 4
+
+
+def get_poll_intervals():
+    """
+    Returns the (minimum, maximum) poll intervals from the MIN_POLL_INTERVAL
+    and MAX_POLL_INTERVAL settings, in seconds
+    """
+    lc_settings = settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD
+    min_interval = lc_settings.get(
+        "MIN_POLL_INTERVAL", DEFAULT_MIN_POLL_INTERVAL.total_seconds()
+    )
+    max_interval = lc_settings.get(
+        "MAX_POLL_INTERVAL", DEFAULT_MAX_POLL_INTERVAL.total_seconds()
+    )
+    return min_interval, max(min_interval, max_interval)
+
+
+def get_next_poll_at(status, now, status_changed_at=None, due_date=None):
+    """
+    Returns when a project with the given LanguageCloud status should next
+    be polled.
+
+    Completed projects and projects with an unknown status are polled again
+    after MIN_POLL_INTERVAL, so a project whose import keeps failing isn't
+    polled on every run. Otherwise the interval backs off with the time
+    since the status last changed, and tightens as the due date approaches,
+    within the MIN_POLL_INTERVAL and MAX_POLL_INTERVAL settings.
+    """
+    min_interval, max_interval = get_poll_intervals()
+    min_delta = datetime.timedelta(seconds=min_interval)
+    if status not in (LanguageCloudStatus.CREATED, LanguageCloudStatus.IN_PROGRESS):
+        return now + min_delta
+
+    idle = (now - (status_changed_at or now)).total_seconds()
+    interval = min(max_interval, idle / BACKOFF_DIVISOR)
+    if due_date is not None:
+        until_due = (due_date - now).total_seconds()
+        interval = min(interval, until_due / BACKOFF_DIVISOR)
+
+    return now + datetime.timedelta(seconds=max(interval, min_interval))
@@ -0,0 +1,160 @@
+import threading
+import time
+
+from email.utils import parsedate_to_datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+
+ENDPOINT_FAMILIES = ["auth", "project", "source_file", "target_file"]
+
+# Back off for this long when LanguageCloud throttles us without a Retry-After
+# header. Doubled on each consecutive throttled attempt.
+DEFAULT_BACKOFF_SECONDS = 1
+MAX_BACKOFF_SECONDS = 60
+
+
+def parse_retry_after(value):
+    """
+    Returns the number of seconds to wait from a Retry-After header value,
+    which can either be a number of seconds or an HTTP date.
+    Returns None if the value is missing or can't be parsed.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - timezone.now()).total_seconds(), 0)
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket.
+
+    Tokens are added at `rate` per second up to `burst` tokens and each request
+    takes one. A rate of None means the bucket never runs dry.
+
+    When throttled the bucket blocks all requests until the back-off delay has
+    passed and halves its rate. Each successful request then adds back a
+    twentieth of the configured rate, so throughput climbs back to the
+    configured maximum while LanguageCloud keeps accepting requests.
+    """
+
+    def __init__(self, rate=None, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.burst
+        self.updated_at = clock()
+        self.blocked_until = 0
+        self.lock = threading.Lock()
+
+    def _reserve(self):
+        """
+        Takes a token and returns how long the caller has to wait for it
+        """
+        with self.lock:
+            now = self.clock()
+            delay = max(self.blocked_until - now, 0)
+            if self.rate is None:
+                return delay
+
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+            self.tokens -= 1
+            if self.tokens < 0:
+                delay = max(delay, -self.tokens / self.rate)
+            return delay
+
+    def acquire(self):
+        """
+        Blocks until a request is allowed. Returns the number of seconds waited.
+        """
+        delay = self._reserve()
+        if delay > 0:
+            self.sleep(delay)
+        return delay
+
+    def throttle(self, delay):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, self.clock() + delay)
+            if self.rate is not None:
+                self.rate = max(self.rate / 2, self.max_rate / 16)
+
+    def succeed(self):
+        with self.lock:
+            if self.rate is not None and self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class RateLimiter:
+    """
+    Holds a TokenBucket for each API endpoint family and keeps track of the
+    time spent waiting for each of them.
+    """
+
+    def __init__(self, limits=None, clock=time.monotonic, sleep=time.sleep):
+        limits = limits or {}
+        self.buckets = {
+            family: TokenBucket(clock=clock, sleep=sleep, **limits.get(family, {}))
+            for family in ENDPOINT_FAMILIES
+        }
+        self.wait_time = dict.fromkeys(ENDPOINT_FAMILIES, 0)
+        self.throttled_count = dict.fromkeys(ENDPOINT_FAMILIES, 0)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, **kwargs):
+        """
+        Builds a RateLimiter from the RATE_LIMITS setting, e.g.
+        {"project": {"rate": 5, "burst": 10}}. Rates are requests per second.
+
+        Families without a configured limit fall back to one request every
+        API_SLEEP_SECONDS, or no limit at all if that isn't set either.
+        """
+        lc_settings = settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD
+        limits = dict(lc_settings.get("RATE_LIMITS", {}))
+        sleep_seconds = lc_settings.get("API_SLEEP_SECONDS", 0)
+        if sleep_seconds:
+            for family in ENDPOINT_FAMILIES:
+                limits.setdefault(family, {"rate": 1 / sleep_seconds, "burst": 1})
+        return cls(limits, **kwargs)
+
+    def wait(self, family):
+        waited = self.buckets[family].acquire()
+        if waited:
+            with self.lock:
+                self.wait_time[family] += waited
+        return waited
+
+    def throttled(self, family, retry_after=None, attempt=0):
+        """
+        Records that a request was throttled and backs off the whole family.
+        Returns the back-off delay that will be applied to the next request.
+        """
+        if retry_after is None:
+            retry_after = min(
+                DEFAULT_BACKOFF_SECONDS * 2**attempt, MAX_BACKOFF_SECONDS
+            )
+        self.buckets[family].throttle(retry_after)
+        with self.lock:
+            self.throttled_count[family] += 1
+        return retry_after
+
+    def succeeded(self, family):
+        self.buckets[family].succeed()
+
+    @property
+    def total_wait_time(self):
+        return sum(self.wait_time.values())
@@ -1,13 +1,21 @@
+import hashlib
 import json
 import logging
 import os
 import re
+import threading
+import time
 
-from time import sleep
+from collections import defaultdict
 
 import requests
 
 from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+from .rate_limit import RateLimiter, parse_retry_after
+from .stats import ApiStats
 
 
 safe_characters = re.compile(r"[^\w\- ]+")
@@ -34,10 +42,76 @@ class NotFound(Exception):
 
 REQUEST_TIMEOUT = 10
 
+# Number of times a throttled (HTTP 429) request is retried before giving up
+DEFAULT_MAX_RETRIES = 3
+
+# Number of items requested per page from list endpoints
+PAGE_SIZE = 100
+
+# Access tokens are cached and shared between processes until shortly
+# before they expire
+TOKEN_CACHE_KEY_PREFIX = "RWS_ACCESS_TOKEN"
+TOKEN_EXPIRY_MARGIN_SECONDS = 60 * 5
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+_session = None
+_session_config = None
+_session_lock = threading.Lock()
+
+
+def _get_session_config():
+    lc_settings = settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD
+    return (
+        lc_settings.get("POOL_CONNECTIONS", DEFAULT_POOL_CONNECTIONS),
+        lc_settings.get("POOL_MAXSIZE", DEFAULT_POOL_MAXSIZE),
+        lc_settings.get("KEEP_ALIVE", True),
+    )
+
+
+def build_session(pool_connections, pool_maxsize, keep_alive=True):
+    """
+    Returns a new requests.Session backed by a connection pool.
+
+    pool_connections is the number of per-host pools to keep around and
+    pool_maxsize is the number of connections kept open to each host.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def get_session():
+    """
+    Returns the process-wide session used to talk to LanguageCloud.
+
+    The session is shared by every ApiClient in the process so TCP/TLS
+    connections are kept alive and reused across API calls, sync runs and
+    admin form renders. It is rebuilt if the pool settings change.
+    """
+    global _session, _session_config
+
+    config = _get_session_config()
+    with _session_lock:
+        if _session is None or _session_config != config:
+            if _session is not None:
+                _session.close()
+            _session = build_session(*config)
+            _session_config = config
+        return _session
+
 
 class ApiClient:
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, session=None, rate_limiter=None):
         self.logger = logger or logging.getLogger(__name__)
+        self.session = session or get_session()
+        self.rate_limiter = rate_limiter or RateLimiter.from_settings()
+        self.stats = ApiStats()
         self.auth_base = settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD.get(
             "AUTH_BASE",
             "https://sdl-prod.eu.auth0.com/oauth/token",
@@ -51,30 +125,108 @@ class ApiClient:
             "https://lc-api.sdl.com/public-api/v1",
         )
         self.is_authenticated = False
-        self.api_sleep_seconds = settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD.get(
-            "API_SLEEP_SECONDS", 0
+        self.max_retries = settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD.get(
+            "RATE_LIMIT_MAX_RETRIES", DEFAULT_MAX_RETRIES
         )
 
-    def authenticate(self):
-        self.logger.debug("authenticate")
-        r = requests.post(
-            self.auth_base,
-            {
-                "grant_type": "client_credentials",
-                "audience": self.auth_audience,
-                "client_id": settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD["CLIENT_ID"],
-                "client_secret": settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD[
-                    "CLIENT_SECRET"
-                ],
-            },
-            timeout=REQUEST_TIMEOUT,
+    def _request(self, family, method, url, rate_limited=True, **kwargs):
+        """
+        Sends a request through the shared session, waiting for the rate limiter
+        of the given endpoint family first.
+
+        Throttled (HTTP 429) requests back off the whole family, honouring
+        the Retry-After header, and are retried up to `max_retries` times.
+        A request rejected with HTTP 401 is retried once with a fresh token.
+        Every request sent, retries included, is recorded in `stats`.
+        """
+        attempt = 0
+        reauthenticated = False
+        while True:
+            if rate_limited:
+                self.rate_limiter.wait(family)
+            start = time.monotonic()
+            r = self.session.request(method, url, timeout=REQUEST_TIMEOUT, **kwargs)
+            self.stats.record(family, r, time.monotonic() - start)
+            self.logger.debug(r.text)
+            if r.status_code == 401 and family != "auth" and not reauthenticated:
+                # The cached token was revoked or expired early
+                self.logger.info("Access token rejected, re-authenticating")
+                self.authenticate(force=True)
+                kwargs["headers"] = self.headers
+                reauthenticated = True
+                continue
+            if r.status_code == 429 and attempt < self.max_retries:
+                delay = self.rate_limiter.throttled(
+                    family, parse_retry_after(r.headers.get("Retry-After")), attempt
+                )
+                self.logger.warning(
+                    f"Throttled by LanguageCloud, retrying in {delay:.1f}s"
+                )
+                attempt += 1
+                continue
+            r.raise_for_status()
+            self.rate_limiter.succeeded(family)
+            return r
+
+    @property
+    def token_cache_key(self):
+        credentials = "|".join(
+            [
+                self.auth_base,
+                self.auth_audience,
+                settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD["CLIENT_ID"],
+            ]
         )
-        self.logger.debug(r.text)
-        r.raise_for_status()
-        sleep(self.api_sleep_seconds)
+        digest = hashlib.sha256(credentials.encode()).hexdigest()
+        return f"{TOKEN_CACHE_KEY_PREFIX}_{digest}"
+
+    def _get_cached_token(self):
+        cached = cache.get(self.token_cache_key)
+        if not cached:
+            return None
+        if cached["expires_at"] - TOKEN_EXPIRY_MARGIN_SECONDS <= time.time():
+            return None
+        return cached["access_token"]
+
+    def authenticate(self, force=False):
+        """
+        Sets up the client with an OAuth access token.
+
+        Tokens are valid for 24 hours, so they are stored in the Django cache
+        and reused by every client until shortly before they expire. Pass
+        force=True to ignore the cached token and request a new one.
+        """
+        self.logger.debug("authenticate")
+        token = None if force else self._get_cached_token()
+        if token is None:
+            r = self._request(
+                "auth",
+                "POST",
+                self.auth_base,
+                data={
+                    "grant_type": "client_credentials",
+                    "audience": self.auth_audience,
+                    "client_id": settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD[
+                        "CLIENT_ID"
+                    ],
+                    "client_secret": settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD[
+                        "CLIENT_SECRET"
+                    ],
+                },
+            )
+            auth_response = r.json()
+            token = auth_response["access_token"]
+            expires_in = auth_response.get("expires_in", 60 * 60 * 24)
+            timeout = expires_in - TOKEN_EXPIRY_MARGIN_SECONDS
+            if timeout > 0:
+                cache.set(
+                    self.token_cache_key,
+                    {"access_token": token, "expires_at": time.time() + expires_in},
+                    timeout,
+                )
 
         self.is_authenticated = True
-        self.token = r.json()["access_token"]
+        self.token = token
         self.headers = {
             "Authorization": f"Bearer {self.token}",
             "X-LC-Tenant": settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD["ACCOUNT_ID"],
@@ -120,15 +272,13 @@ class ApiClient:
                 ],
             }
         )
-        r = requests.post(
+        r = self._request(
+            "project",
+            "POST",
             f"{self.api_base}/projects",
-            body,
+            data=body,
             headers=self.headers,
-            timeout=REQUEST_TIMEOUT,
         )
-        self.logger.debug(r.text)
-        r.raise_for_status()
-        sleep(self.api_sleep_seconds)
         return r.json()
 
     def start_project(self, project_id):
@@ -140,20 +290,20 @@ class ApiClient:
         if not self.is_authenticated:
             raise NotAuthenticated()
 
-        r = requests.put(
+        self._request(
+            "project",
+            "PUT",
             f"{self.api_base}/projects/{project_id}/start",
             headers=self.headers,
-            timeout=REQUEST_TIMEOUT,
         )
-        self.logger.debug(r.text)
-        r.raise_for_status()
-        sleep(self.api_sleep_seconds)
 
     def create_source_file(
         self, project_id, po_file, filename, source_locale, target_locale
     ):
         """
         Adds a source file to a project.
+        target_locale can be a single locale or a list of locales to translate
+        the file into.
         https://languagecloud.sdl.com/lc/api-docs/rest-api/source-file/addsourcefile
         """
         self.logger.debug("create_source_file")
@@ -174,6 +324,11 @@ class ApiClient:
             safe_characters.sub("", filename_sans_ext) + f"{os.extsep}{ext}"
         )
 
+        if isinstance(target_locale, (list, tuple)):
+            target_locales = target_locale
+        else:
+            target_locales = [target_locale]
+
         body = {
             "properties": json.dumps(
                 {
@@ -181,21 +336,21 @@ class ApiClient:
                     "role": "translatable",
                     "type": "native",
                     "language": rws_language_code(source_locale),
-                    "targetLanguages": [rws_language_code(target_locale)],
+                    "targetLanguages": [
+                        rws_language_code(locale) for locale in target_locales
+                    ],
                 }
             )
         }
         files = {"file": (cleaned_filename, po_file, "text/plain")}
-        r = requests.post(
+        r = self._request(
+            "source_file",
+            "POST",
             f"{self.api_base}/projects/{project_id}/source-files",
             data=body,
             files=files,
             headers=self.headers,
-            timeout=REQUEST_TIMEOUT,
         )
-        self.logger.debug(r.text)
-        r.raise_for_status()
-        sleep(self.api_sleep_seconds)
         return r.json()
 
     def get_project(self, project_id):
@@ -207,15 +362,13 @@ class ApiClient:
         if not self.is_authenticated:
             raise NotAuthenticated()
 
-        r = requests.get(
+        r = self._request(
+            "project",
+            "GET",
             f"{self.api_base}/projects/{project_id}",
             params={"fields": "id,name,description,dueBy,createdAt,status"},
             headers=self.headers,
-            timeout=REQUEST_TIMEOUT,
         )
-        self.logger.debug(r.text)
-        r.raise_for_status()
-        sleep(self.api_sleep_seconds)
         return r.json()
 
     def complete_project(self, project_id):
@@ -227,53 +380,110 @@ class ApiClient:
         if not self.is_authenticated:
             raise NotAuthenticated()
 
-        r = requests.put(
+        self._request(
+            "project",
+            "PUT",
             f"{self.api_base}/projects/{project_id}/complete",
             headers=self.headers,
-            timeout=REQUEST_TIMEOUT,
         )
-        self.logger.debug(r.text)
-        r.raise_for_status()
-        sleep(self.api_sleep_seconds)
 
-    def download_target_file(self, project_id, source_file_id):
+    def _paginate(self, family, url, params):
+        """
+        Yields the items of a paginated list endpoint, following `skip` until
+        `itemCount` items have been fetched.
+        """
+        skip = 0
+        while True:
+            r = self._request(
+                family,
+                "GET",
+                url,
+                params={**params, "top": PAGE_SIZE, "skip": skip},
+                headers=self.headers,
+            )
+            page = r.json()
+            items = page["items"]
+            yield from items
+            skip += len(items)
+            if not items or skip >= page.get("itemCount", 0):
+                return
+
+    def list_project_statuses(self):
         """
-        Retrieves a targer file for the project
+        Lists the status of all projects, indexed by project id.
+        https://languagecloud.sdl.com/lc/api-docs/rest-api/project/listprojects
+        """
+        self.logger.debug("list_project_statuses")
+        if not self.is_authenticated:
+            raise NotAuthenticated()
+
+        return {
+            project["id"]: project["status"]
+            for project in self._paginate(
+                "project", f"{self.api_base}/projects", {"fields": "id,status"}
+            )
+        }
+
+    def list_target_files(self, project_id):
+        """
+        Lists the native target files of a project, indexed by source file id.
         https://languagecloud.sdl.com/lc/api-docs/rest-api/target-file/listtargetfiles
+        """
+        self.logger.debug(f"list_target_files {project_id}")
+        if not self.is_authenticated:
+            raise NotAuthenticated()
+
+        target_files = defaultdict(list)
+        for target_file in self._paginate(
+            "target_file",
+            f"{self.api_base}/projects/{project_id}/target-files",
+            {"fields": "sourceFile,latestVersion,languageDirection"},
+        ):
+            if target_file["latestVersion"]["type"] == "native":
+                target_files[target_file["sourceFile"]["id"]].append(target_file)
+        return dict(target_files)
+
+    def download_target_file(
+        self, project_id, source_file_id, target_files=None, target_locale=None
+    ):
+        """
+        Retrieves a target file for the project
+
+        target_files is the result of list_target_files() for the project. Pass
+        it in when downloading several files from the same project so the
+        target files are only listed once.
+
+        target_locale picks the target file to download when a source file was
+        uploaded with several target languages.
         https://languagecloud.sdl.com/lc/api-docs/rest-api/target-file/downloadfileversion
         """
         self.logger.debug("download_target_file")
         if not self.is_authenticated:
             raise NotAuthenticated()
 
-        list_req = requests.get(
-            f"{self.api_base}/projects/{project_id}/target-files",
-            params={"fields": "sourceFile,latestVersion"},
-            headers=self.headers,
-            timeout=REQUEST_TIMEOUT,
-        )
-        self.logger.debug(list_req.text)
-        list_req.raise_for_status()
-        sleep(self.api_sleep_seconds)
-        target_files = list_req.json()
-
-        matches = [
-            tf
-            for tf in target_files["items"]
-            if tf["sourceFile"]["id"] == source_file_id
-            and tf["latestVersion"]["type"] == "native"
-        ]
+        if target_files is None:
+            target_files = self.list_target_files(project_id)
+
+        matches = target_files.get(source_file_id, [])
+        if len(matches) > 1 and target_locale is not None:
+            language_code = rws_language_code(target_locale)
+            matches = [
+                tf
+                for tf in matches
+                if tf.get("languageDirection", {})
+                .get("targetLanguage", {})
+                .get("languageCode")
+                == language_code
+            ]
         if len(matches) != 1:
             raise NotFound(f"Expected 1 target file, found {len(matches)}")
 
-        download_req = requests.get(
+        download_req = self._request(
+            "target_file",
+            "GET",
             f"{self.api_base}/projects/{project_id}/target-files/{matches[0]['id']}/versions/{matches[0]['latestVersion']['id']}/download",
             headers=self.headers,
-            timeout=REQUEST_TIMEOUT,
         )
-        self.logger.debug(download_req.text)
-        download_req.raise_for_status()
-        sleep(self.api_sleep_seconds)
 
         return download_req.text
 
@@ -281,21 +491,22 @@ class ApiClient:
         """
         Fetches project templates.
         https://languagecloud.sdl.com/lc/api-docs/rest-api/project-template/listprojecttemplates
+
+        Pass should_sleep=False to skip waiting for the rate limiter, e.g. when
+        rendering a form.
         """
         self.logger.debug("get_project_templates")
         if not self.is_authenticated:
             raise NotAuthenticated()
 
-        r = requests.get(
+        r = self._request(
+            "project",
+            "GET",
             f"{self.api_base}/project-templates",
+            rate_limited=should_sleep,
             params={"fields": "id,name,location"},
             headers=self.headers,
-            timeout=REQUEST_TIMEOUT,
         )
-        self.logger.debug(r.text)
-        r.raise_for_status()
-        if should_sleep:
-            sleep(self.api_sleep_seconds)
         return r.json()
 
     def _get(self, url):
@@ -307,11 +518,10 @@ class ApiClient:
         if not self.is_authenticated:
             raise NotAuthenticated()
 
-        r = requests.get(
+        r = self._request(
+            "project",
+            "GET",
             f"{self.api_base}/{url}",
             headers=self.headers,
-            timeout=REQUEST_TIMEOUT,
         )
-        self.logger.debug(r.text)
-        r.raise_for_status()
         return r.json()
@@ -0,0 +1,64 @@
+from .models import LanguageCloudFile, LanguageCloudProjectSettings
+
+
+class ProjectSelection:
+    """
+    Restricts a sync to some of the projects: the projects of a
+    sharding.Shard, with one of the given primary keys or LanguageCloud
+    project ids, or translated into one of the given locales (language
+    codes). Each criterion given narrows the selection down further.
+
+    Project settings are selected by their shard and target locales. They
+    don't have a project yet, so none are selected when selecting projects
+    by id.
+    """
+
+    def __init__(self, shard=None, project_ids=None, lc_project_ids=None, locales=None):
+        self.shard = shard
+        self.project_ids = list(project_ids or [])
+        self.lc_project_ids = list(lc_project_ids or [])
+        self.locales = list(locales or [])
+
+    @property
+    def is_partial(self):
+        """
+        True if projects are selected by id or locale, rather than just
+        split between shards
+        """
+        return bool(self.project_ids or self.lc_project_ids or self.locales)
+
+    def filter_projects(self, queryset):
+        """
+        Filters a queryset of LanguageCloudProjects down to the selection
+        """
+        if self.shard is not None:
+            queryset = self.shard.filter(queryset)
+        if self.project_ids:
+            queryset = queryset.filter(pk__in=self.project_ids)
+        if self.lc_project_ids:
+            queryset = queryset.filter(lc_project_id__in=self.lc_project_ids)
+        if self.locales:
+            # a subquery rather than a join, so projects aren't repeated
+            queryset = queryset.filter(
+                pk__in=LanguageCloudFile.objects.filter(
+                    translation__target_locale__language_code__in=self.locales
+                ).values("project_id")
+            )
+        return queryset
+
+    def filter_settings(self, queryset):
+        """
+        Filters a queryset of LanguageCloudProjectSettings down to the
+        selection
+        """
+        if self.project_ids or self.lc_project_ids:
+            return queryset.none()
+        if self.shard is not None:
+            queryset = self.shard.filter(queryset)
+        if self.locales:
+            queryset = queryset.filter(
+                pk__in=LanguageCloudProjectSettings.objects.filter(
+                    translations__target_locale__language_code__in=self.locales
+                ).values("pk")
+            )
+        return queryset
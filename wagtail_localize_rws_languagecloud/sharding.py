@@ -0,0 +1,60 @@
+from django.db.models.functions import Mod
+
+
+class Shard:
+    """
+    One of `count` disjoint slices of the sync's work, for syncs split across
+    workers that each run their own slice: the projects and project settings
+    whose translation source id modulo `count` is `index`.
+
+    Every object belongs to exactly one shard of a given count, and always
+    the same one, so shards of the same count never process the same
+    project. Their syncs still exclude unsharded syncs and shards of other
+    counts, see locking.SyncLease.conflicts_with(). Sharding by translation
+    source keeps project settings in the same shard as the projects created
+    from them.
+    """
+
+    def __init__(self, index, count):
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"Invalid shard {index}/{count}")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def parse(cls, value):
+        """
+        Returns the Shard described by "index/count", e.g. "0/4"
+        """
+        try:
+            index, count = (int(part) for part in value.split("/"))
+        except ValueError:
+            raise ValueError(
+                f"Invalid shard {value!r}, expected INDEX/COUNT, e.g. 0/4"
+            ) from None
+        return cls(index, count)
+
+    @property
+    def name(self):
+        return f"shard-{self.index}-{self.count}"
+
+    def filter(self, queryset):
+        """
+        Filters a queryset of LanguageCloudProjects or
+        LanguageCloudProjectSettings down to this shard
+        """
+        return queryset.alias(
+            shard_index=Mod("translation_source_id", self.count)
+        ).filter(shard_index=self.index)
+
+    def __eq__(self, other):
+        return isinstance(other, Shard) and (self.index, self.count) == (
+            other.index,
+            other.count,
+        )
+
+    def __repr__(self):
+        return f"Shard({self.index}, {self.count})"
+
+    def __str__(self):
+        return f"{self.index}/{self.count}"
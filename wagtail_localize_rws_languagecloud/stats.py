@@ -0,0 +1,77 @@
+import logging
+import threading
+import time
+
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class PhaseTimer:
+    """
+    Adds up the time spent in each phase of a sync, in seconds.
+
+    Phases can be timed from several threads at once, in which case their
+    duration is the sum of the time spent in each thread, e.g. downloads.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.durations = defaultdict(float)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            elapsed = self.clock() - start
+            with self.lock:
+                self.durations[name] += elapsed
+
+
+class ApiStats:
+    """
+    Counts the requests an ApiClient made to each API endpoint family, the
+    bytes they sent and received and the time they took
+    """
+
+    def __init__(self):
+        self.families = defaultdict(
+            lambda: {"calls": 0, "bytes_sent": 0, "bytes_received": 0, "seconds": 0}
+        )
+        self.lock = threading.Lock()
+
+    def record(self, family, response, seconds):
+        body = response.request.body if response.request is not None else None
+        with self.lock:
+            stats = self.families[family]
+            stats["calls"] += 1
+            stats["bytes_sent"] += len(body) if body else 0
+            stats["bytes_received"] += len(response.content or b"")
+            stats["seconds"] += seconds
+
+    def total(self, key):
+        with self.lock:
+            return sum(stats[key] for stats in self.families.values())
+
+    def as_dict(self):
+        with self.lock:
+            return {family: dict(stats) for family, stats in self.families.items()}
+
+
+class FailureCountingLogger(logging.LoggerAdapter):
+    """
+    Passes messages on to a logger, counting the errors logged
+    """
+
+    def __init__(self, logger):
+        super().__init__(logger, {})
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    def log(self, level, msg, *args, **kwargs):
+        if level >= logging.ERROR:
+            with self.lock:
+                self.failures += 1
+        super().log(level, msg, *args, **kwargs)
@@ -1,22 +1,45 @@
 import logging
+import threading
+import traceback
+import uuid
+
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
+from functools import partial
 
 from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import SuspiciousOperation
 from django.db import transaction
-from django.db.models import Count, F, Q
+from django.db.models import F, Q
+from django.utils import timezone
 from requests.exceptions import RequestException
 
+from .background import get_sync_backend
+from .budget import BudgetExhausted, SyncBudget
 from .emails import send_sync_rws_emails
 from .importer import Importer
+from .locking import LeaseLost, ProjectClaims, SyncLease
 from .models import (
     LanguageCloudFile,
     LanguageCloudProject,
     LanguageCloudProjectSettings,
     LanguageCloudStatus,
+    SyncJob,
+    SyncRun,
 )
+from .polling import get_next_poll_at
 from .rws_client import ApiClient, NotFound
+from .selection import ProjectSelection
 from .signals import translation_imported
+from .stats import FailureCountingLogger, PhaseTimer
+
+
+DEFAULT_CHUNK_SIZE = 100
+
+# the phases of _export(), which can be resumed, see budget.SyncBudget
+EXPORT_PHASES = ["local_create", "remote_create", "upload", "start"]
 
 
 def _get_project_templates_and_locations(client: ApiClient):
@@ -40,23 +63,150 @@ def _get_project_templates_and_locations(client: ApiClient):
     return cached_templates_and_locations
 
 
+class POCache:
+    """
+    Memoizes TranslationSource.export_po() for a sync run.
+
+    PO files are keyed on the source id and its last update, so a changed
+    source is exported again. Up to `maxsize` files are kept in memory.
+    When `timeout` is set they are also stored in the Django cache for that
+    many seconds, so later runs (e.g. retrying failed uploads) can reuse them.
+    """
+
+    cache_key_prefix = "RWS_PO"
+
+    def __init__(self, timeout=None, maxsize=128):
+        self.timeout = timeout
+        self.maxsize = maxsize
+        self.po_files = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            timeout=settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD.get("PO_CACHE_TIMEOUT")
+        )
+
+    def _remember(self, key, po_file):
+        self.po_files[key] = po_file
+        self.po_files.move_to_end(key)
+        while len(self.po_files) > self.maxsize:
+            self.po_files.popitem(last=False)
+
+    def get(self, translation_source):
+        key = (translation_source.pk, translation_source.last_updated_at)
+        if key in self.po_files:
+            self.hits += 1
+            self.po_files.move_to_end(key)
+            return self.po_files[key]
+
+        cache_key = (
+            f"{self.cache_key_prefix}_{key[0]}_{key[1].timestamp()}"
+            if self.timeout
+            else None
+        )
+        if cache_key:
+            po_file = cache.get(cache_key)
+            if po_file is not None:
+                self.hits += 1
+                self._remember(key, po_file)
+                return po_file
+
+        self.misses += 1
+        po_file = str(translation_source.export_po())
+        self._remember(key, po_file)
+        if cache_key:
+            cache.set(cache_key, po_file, self.timeout)
+        return po_file
+
+
 @transaction.atomic
-def _create_local_project(project_settings: LanguageCloudProjectSettings):
-    lc_project, _ = LanguageCloudProject.objects.get_or_create(
-        translation_source=project_settings.translation_source,
-        source_last_updated_at=project_settings.source_last_updated_at,
+def _create_local_project_batch(project_settings_batch):
+    """
+    Creates the LanguageCloudProjects and LanguageCloudFiles missing for a
+    batch of LanguageCloudProjectSettings and links the settings to their
+    projects, in a constant number of queries. Returns the linked projects.
+    """
+    # skip settings already processed, or being processed, by another worker
+    project_settings_batch = list(
+        LanguageCloudProjectSettings.objects.select_for_update(skip_locked=True)
+        .filter(
+            pk__in=[project_settings.pk for project_settings in project_settings_batch],
+            lc_project_id__isnull=True,
+        )
+        .order_by("pk")
+    )
+    if not project_settings_batch:
+        return []
+
+    projects = LanguageCloudProject.objects.bulk_create(
+        [
+            LanguageCloudProject(
+                translation_source_id=project_settings.translation_source_id,
+                source_last_updated_at=project_settings.source_last_updated_at,
+            )
+            for project_settings in project_settings_batch
+        ],
+        ignore_conflicts=True,
     )
-    # link the project settings with the project
-    project_settings.lc_project = lc_project
-    project_settings.save()
-
-    translations = project_settings.translations.all().filter(enabled=True)
-    for translation in translations:
-        LanguageCloudFile.objects.get_or_create(
-            translation=translation,
-            project=lc_project,
+    _count_rows(len(projects))
+    project_ids = {
+        (translation_source_id, source_last_updated_at): pk
+        for pk, translation_source_id, source_last_updated_at in (
+            LanguageCloudProject.objects.filter(
+                translation_source_id__in={
+                    project_settings.translation_source_id
+                    for project_settings in project_settings_batch
+                },
+                source_last_updated_at__in={
+                    project_settings.source_last_updated_at
+                    for project_settings in project_settings_batch
+                },
+            ).values_list("pk", "translation_source_id", "source_last_updated_at")
         )
-    return lc_project
+    }
+
+    # link the project settings with their project
+    for project_settings in project_settings_batch:
+        project_settings.lc_project_id = project_ids[
+            (
+                project_settings.translation_source_id,
+                project_settings.source_last_updated_at,
+            )
+        ]
+    LanguageCloudProjectSettings.objects.bulk_update(
+        project_settings_batch, ["lc_project"]
+    )
+    # bulk_update() only returns the number of rows from Django 4.0
+    _count_rows(len(project_settings_batch))
+
+    project_ids_by_settings = {
+        project_settings.pk: project_settings.lc_project_id
+        for project_settings in project_settings_batch
+    }
+    Translations = LanguageCloudProjectSettings.translations.through
+    files = LanguageCloudFile.objects.bulk_create(
+        [
+            LanguageCloudFile(
+                translation_id=translation_id,
+                project_id=project_ids_by_settings[project_settings_id],
+            )
+            for project_settings_id, translation_id in Translations.objects.filter(
+                languagecloudprojectsettings__in=project_ids_by_settings,
+                translation__enabled=True,
+            ).values_list("languagecloudprojectsettings_id", "translation_id")
+        ],
+        ignore_conflicts=True,
+    )
+    _count_rows(len(files))
+
+    # bulk_create() doesn't go through LanguageCloudFile.save()
+    lc_projects = LanguageCloudProject.objects.filter(
+        pk__in=project_ids_by_settings.values()
+    )
+    lc_projects.refresh_file_counts()
+    return list(lc_projects.order_by("pk"))
 
 
 def _create_remote_project(lc_project, project_templates_and_locations, client):
@@ -82,46 +232,34 @@ def _create_remote_project(lc_project, project_templates_and_locations, client):
         lc_project.lc_project_id = create_project_resp["id"]
         lc_project.lc_project_status = LanguageCloudStatus.CREATED
         lc_project.create_attempts = lc_project.create_attempts + 1
-        lc_project.save()
+        _count_rows(lc_project.save_changes())
         return create_project_resp["id"]
     except (RequestException, KeyError):
         lc_project.create_attempts = lc_project.create_attempts + 1
-        lc_project.save()
+        _count_rows(lc_project.save_changes())
         raise
 
 
-def _create_remote_source_file(
-    lc_source_file, client, project_id, po_file, filename, source_locale, target_locale
-):
-    try:
-        create_file_resp = client.create_source_file(
-            project_id, po_file, filename, source_locale, target_locale
-        )
-        lc_source_file.lc_source_file_id = create_file_resp["id"]
-        lc_source_file.create_attempts = lc_source_file.create_attempts + 1
-        lc_source_file.save()
-        return create_file_resp["id"]
-    except (RequestException, KeyError):
-        lc_source_file.create_attempts = lc_source_file.create_attempts + 1
-        lc_source_file.save()
-        raise
+def _record_source_file_upload(lc_source_files, source_file_id=""):
+    """
+    Counts an upload attempt for each LanguageCloudFile, linking them to the
+    created source file if the upload succeeded
+    """
+    with transaction.atomic():
+        for lc_source_file in lc_source_files:
+            if source_file_id:
+                lc_source_file.lc_source_file_id = source_file_id
+            lc_source_file.create_attempts = lc_source_file.create_attempts + 1
+            _count_rows(lc_source_file.save_changes())
 
 
-def _get_projects_to_export():
+def _get_projects_to_export(selection=None):
+    projects = LanguageCloudProject.objects.all()
+    if selection is not None:
+        projects = selection.filter_projects(projects)
     return (
-        LanguageCloudProject.objects.annotate(
-            files=Count("languagecloudfile"),
-            files_created=Count(
-                "languagecloudfile", filter=~Q(languagecloudfile__lc_source_file_id="")
-            ),
-            files_to_be_created=Count(
-                "languagecloudfile", filter=Q(languagecloudfile__lc_source_file_id="")
-            ),
-            files_exceeding_create_attempts=Count(
-                "languagecloudfile", filter=Q(languagecloudfile__create_attempts__gte=3)
-            ),
-        )
-        .filter(lc_settings__isnull=False)  # ensure they are tied to project settings
+        # ensure they are tied to project settings
+        projects.filter(lc_settings__isnull=False)
         .exclude(internal_status=LanguageCloudProject.STATUS_IMPORTED)  # imported
         .exclude(  # in progress, completed or archived in LanguageCloud
             lc_project_status__in=[
@@ -132,8 +270,8 @@ def _get_projects_to_export():
         )
         .exclude(  # created: project and all files created in LanguageCloud
             ~Q(lc_project_id=""),  # the project was created in LanguageCloud
-            files__gt=0,  # and has at least one file for translation
-            files_created=F("files"),  # and all files got created in LanguageCloud too
+            files_total__gt=0,  # and has at least one file for translation
+            files_created=F("files_total"),  # and all files got created too
         )
         .exclude(
             lc_project_id="", create_attempts__gte=3
@@ -147,23 +285,20 @@ def _get_projects_to_export():
             "translation_source__locale",
         )
         .order_by("pk")
-        .distinct()
     )
 
 
-def _get_projects_to_start():
+def _get_projects_to_start(selection=None):
     """
     Returns `LanguageCloudProject`s that should be started. They have been created remotely
-    and all their files have been created remotely too
+    and all their files have been created remotely too. With `selection`, only
+    the projects of that selection.ProjectSelection.
     """
+    projects = LanguageCloudProject.objects.all()
+    if selection is not None:
+        projects = selection.filter_projects(projects)
     return (
-        LanguageCloudProject.objects.annotate(
-            files=Count("languagecloudfile"),
-            files_created=Count(
-                "languagecloudfile", filter=~Q(languagecloudfile__lc_source_file_id="")
-            ),
-        )
-        .exclude(  # in progress, completed or archived in LanguageCloud
+        projects.exclude(  # in progress, completed or archived
             lc_project_status__in=[
                 LanguageCloudStatus.IN_PROGRESS,
                 LanguageCloudStatus.COMPLETED,
@@ -176,251 +311,1175 @@ def _get_projects_to_start():
         )
         .filter(  # created: project and all files created in LanguageCloud
             ~Q(lc_project_id=""),  # the project was created in LanguageCloud
-            files__gt=0,  # and has at least one file for translation
-            files_created=F("files"),  # and all files got created in LanguageCloud too
+            files_total__gt=0,  # and has at least one file for translation
+            files_created=F("files_total"),  # and all files got created too
         )
         .order_by("pk")
-        .distinct()
     )
 
 
-def _export(client, logger):
+def _get_projects_to_import(now, events_only=False, selection=None):
+    """
+    Returns `LanguageCloudProject`s created remotely, not imported or archived
+    yet, whose status is due for a poll at `now` or was reported by a webhook.
+    With `events_only`, only the latter. With `selection`, only the projects
+    of that selection.ProjectSelection.
+    """
+    projects = LanguageCloudProject.objects.all()
+    if selection is not None:
+        projects = selection.filter_projects(projects)
+    projects = (
+        projects.exclude(internal_status=LanguageCloudProject.STATUS_IMPORTED)
+        .exclude(lc_project_status=LanguageCloudStatus.ARCHIVED)
+        .exclude(lc_project_id="")
+    )
+    if events_only:
+        projects = projects.filter(event_received_at__isnull=False)
+    else:
+        projects = projects.filter(
+            Q(next_poll_at__isnull=True)
+            | Q(next_poll_at__lte=now)
+            | Q(event_received_at__isnull=False)
+        )
+    return projects.select_related("lc_settings").order_by("id")
+
+
+def _single_source_file_per_project():
+    return settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD.get(
+        "SINGLE_SOURCE_FILE_PER_PROJECT", False
+    )
+
+
+def _get_source_file_uploads(project, logger, po_cache):
+    """
+    Returns the source files of the project that still need uploading, as
+    (LanguageCloudFiles, ApiClient.create_source_file() arguments) pairs.
+
+    That is one source file per target locale, or a single source file for
+    all target locales with the SINGLE_SOURCE_FILE_PER_PROJECT setting.
+    """
+    project_id = project.lc_project_id
+    name = project.lc_settings.name
+    source_instance = project.translation_source.get_source_instance()
+    source_locale = project.translation_source.locale
+    lc_source_files = []
+    for lc_source_file in project.languagecloudfile_set.all().select_related(
+        "translation", "translation__target_locale"
+    ):
+        translation = lc_source_file.translation
+        if not translation.enabled:
+            logger.debug(
+                f"Skipping inactive translation {translation.uuid} for source file {lc_source_file}"
+            )
+            continue
+
+        logger.info(  # todo update message
+            f"Processing Translation {translation.uuid}\n"
+            f"       {str(source_instance)}\n"
+            f"       {source_locale} --> {str(translation.target_locale)} "
+        )
+        if lc_source_file.is_created:
+            logger.info(
+                f"Already created source file: {lc_source_file.lc_source_file_id}. Skipping.."
+            )
+            continue
+        lc_source_files.append(lc_source_file)
+
+    if not lc_source_files:
+        return []
+
+    po_file = po_cache.get(project.translation_source)
+    if _single_source_file_per_project():
+        return [
+            (
+                lc_source_files,
+                (
+                    project_id,
+                    po_file,
+                    f"{name}.po",
+                    source_locale.language_code,
+                    [
+                        lc_source_file.translation.target_locale.language_code
+                        for lc_source_file in lc_source_files
+                    ],
+                ),
+            )
+        ]
+
+    return [
+        (
+            [lc_source_file],
+            (
+                project_id,
+                po_file,
+                f"{name}_{str(lc_source_file.translation.target_locale)}.po",
+                source_locale.language_code,
+                lc_source_file.translation.target_locale.language_code,
+            ),
+        )
+        for lc_source_file in lc_source_files
+    ]
+
+
+def _iter_chunks(queryset, chunk_size=None, start_after=None):
+    """
+    Yields the objects of queryset in lists of up to chunk_size (the
+    SYNC_CHUNK_SIZE setting by default), ordered by pk.
+
+    Each chunk is fetched with its own query, starting after the last pk of
+    the previous chunk, so only one chunk is held in memory at a time and
+    objects that stop matching the queryset while earlier chunks are
+    processed don't shift the following chunks.
+
+    With start_after, the objects after that pk come first, followed by the
+    ones up to it, see budget.SyncBudget.
+    """
+    if chunk_size is None:
+        chunk_size = settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD.get(
+            "SYNC_CHUNK_SIZE", DEFAULT_CHUNK_SIZE
+        )
+    queryset = queryset.order_by("pk")
+    if start_after is not None:
+        yield from _iter_chunks(queryset.filter(pk__gt=start_after), chunk_size)
+        queryset = queryset.filter(pk__lte=start_after)
+    chunk = list(queryset[:chunk_size])
+    while chunk:
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        chunk = list(queryset.filter(pk__gt=chunk[-1].pk)[:chunk_size])
+
+
+def _iter_projects(queryset, heartbeat=None, claims=None, budget=None, phase=""):
+    """
+    Yields the projects of queryset, calling heartbeat before each of them.
+    Projects are fetched in chunks, see _iter_chunks(). With claims, only
+    yields projects claimed from the other workers.
+
+    Projects are reported to budget once processed, as part of `phase`, and
+    the caller reports the ones it worked on. The phase resumes where the
+    last sync stopped, see budget.SyncBudget.
+    """
+    budget = budget or SyncBudget(checkpoint_name=None)
+    budget.start(phase)
+    if claims is None:
+        batches = _iter_chunks(queryset, start_after=budget.resume_after(phase))
+    else:
+        batches = iter(partial(claims.claim, queryset), [])
+
+    for batch in batches:
+        for project in batch:
+            if heartbeat:
+                heartbeat()
+            yield project
+            budget.processed(project.pk)
+
+
+def _iter_source_file_uploads(
+    logger, po_cache, heartbeat=None, claims=None, budget=None, selection=None
+):
+    budget = budget or SyncBudget(checkpoint_name=None)
+    for project in _iter_projects(
+        _get_projects_to_export(selection).exclude(lc_project_id=""),
+        heartbeat,
+        claims,
+        budget=budget,
+        phase="upload",
+    ):
+        try:
+            uploads = _get_source_file_uploads(project, logger, po_cache)
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:  # noqa
+            logger.exception(
+                f"Failed to process project {project.lc_project_id} ({project.pk})"
+            )
+            continue
+        if uploads:
+            budget.worked_on(project.pk)
+        yield from uploads
+
+
+def _send_source_file(client, create_source_file_args):
+    return client.create_source_file(*create_source_file_args)["id"]
+
+
+def _save_source_file_upload(logger, lc_source_files, get_source_file_id):
+    """
+    Records the outcome of an upload. get_source_file_id returns the id of
+    the created source file, or raises if the upload failed.
+    """
+    try:
+        source_file_id = get_source_file_id()
+    except (RequestException, KeyError):
+        _record_source_file_upload(lc_source_files)
+        logger.error("Failed to create source file")
+        return
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except Exception:  # noqa
+        logger.exception("Failed to create source file")
+        return
+    _record_source_file_upload(lc_source_files, source_file_id)
+    logger.info(f"Created source file: {source_file_id}")
+
+
+def _upload_source_files_concurrently(client, logger, uploads, concurrency):
+    """
+    Sends the uploads from a pool of `concurrency` threads.
+
+    The worker threads only make API calls: PO files are exported and results
+    are saved to the database from the calling thread. At most twice as many
+    uploads as workers are queued at once, to bound the memory used by PO
+    files waiting to be sent.
+    """
+    pending = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            for lc_source_files, args in uploads:
+                if len(pending) >= concurrency * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        _save_source_file_upload(
+                            logger, pending.pop(future), future.result
+                        )
+                future = executor.submit(_send_source_file, client, args)
+                pending[future] = lc_source_files
+        finally:
+            # record the uploads already sent, even if we're stopping early
+            for future in as_completed(pending):
+                _save_source_file_upload(logger, pending[future], future.result)
+
+
+def _create_local_projects(logger, heartbeat=None, budget=None, selection=None):
     logger.info("Creating LanguageCloud translation projects")
+    budget = budget or SyncBudget(checkpoint_name=None)
+    budget.start("local_create")
     unprocessed_project_settings = LanguageCloudProjectSettings.objects.filter(
         lc_project_id__isnull=True
-    ).order_by("pk")
-    for project_settings in unprocessed_project_settings:
-        _create_local_project(project_settings)
+    )
+    if selection is not None:
+        unprocessed_project_settings = selection.filter_settings(
+            unprocessed_project_settings
+        )
+    for chunk in _iter_chunks(
+        unprocessed_project_settings,
+        start_after=budget.resume_after("local_create"),
+    ):
+        if heartbeat:
+            heartbeat()
+        # a chunk is processed at once, so don't let it go over max_projects
+        chunk = chunk[: budget.remaining_projects]
+        if not chunk:
+            break
+        for project in _create_local_project_batch(chunk):
+            budget.worked_on(project.pk)
+        budget.processed(chunk[-1].pk)
 
-    logger.info("Exporting translations to LanguageCloud...")
 
+def _create_remote_projects(
+    client, logger, heartbeat=None, claims=None, budget=None, selection=None
+):
+    logger.info("Creating projects in LanguageCloud...")
+    budget = budget or SyncBudget(checkpoint_name=None)
     project_templates_and_locations = _get_project_templates_and_locations(client)
-    for project in _get_projects_to_export():
-        project_id = project.lc_project_id
+    for project in _iter_projects(
+        _get_projects_to_export(selection).filter(lc_project_id=""),
+        heartbeat,
+        claims,
+        budget=budget,
+        phase="remote_create",
+    ):
+        budget.worked_on(project.pk)
         try:
-            name = project.lc_settings.name
-            if not project_id:
-                try:
-                    project_id = _create_remote_project(
-                        project, project_templates_and_locations, client
-                    )
-                except (RequestException, KeyError):
-                    logger.error("Failed to create project")
-                    continue
-                logger.info(f"Created project: {project_id}")
-            else:
-                logger.info(f"Already created project: {project_id}. Skipping..")
-
-            source_instance = project.translation_source.get_source_instance()
-            source_locale = project.translation_source.locale
-            lc_source_files = project.languagecloudfile_set.all().select_related(
-                "translation", "translation__target_locale"
+            project_id = _create_remote_project(
+                project, project_templates_and_locations, client
             )
-            for lc_source_file in lc_source_files:
-                translation = lc_source_file.translation
-                if not translation.enabled:
-                    logger.debug(
-                        f"Skipping inactive translation {translation.uuid} for source file {lc_source_file}"
-                    )
-                    continue
-
-                logger.info(  # todo update message
-                    f"Processing Translation {translation.uuid}\n"
-                    f"       {str(source_instance)}\n"
-                    f"       {source_locale} --> {str(translation.target_locale)} "
-                )
-                source_file_id = lc_source_file.lc_source_file_id
-                if not source_file_id:
-                    try:
-                        source_file_id = _create_remote_source_file(
-                            lc_source_file,
-                            client,
-                            project_id,
-                            str(project.translation_source.export_po()),
-                            f"{name}_{str(translation.target_locale)}.po",
-                            source_locale.language_code,
-                            translation.target_locale.language_code,
-                        )
-                    except (RequestException, KeyError):
-                        logger.error("Failed to create source file")
-                        continue
-                    logger.info(f"Created source file: {source_file_id}")
-                else:
-                    logger.info(
-                        f"Already created source file: {source_file_id}. Skipping.."
-                    )
-
+        except (RequestException, KeyError):
+            logger.error("Failed to create project")
+            continue
         except (KeyboardInterrupt, SystemExit):
             raise
         except Exception:  # noqa
-            logger.exception(f"Failed to process project {project_id} ({project.pk})")
+            logger.exception(f"Failed to process project ({project.pk})")
             continue
+        logger.info(f"Created project: {project_id}")
+
+
+def _upload_source_files(
+    client,
+    logger,
+    po_cache,
+    concurrency=1,
+    heartbeat=None,
+    claims=None,
+    budget=None,
+    selection=None,
+):
+    logger.info("Exporting translations to LanguageCloud...")
+    uploads = _iter_source_file_uploads(
+        logger,
+        po_cache,
+        heartbeat=heartbeat,
+        claims=claims,
+        budget=budget,
+        selection=selection,
+    )
+    if concurrency > 1:
+        _upload_source_files_concurrently(client, logger, uploads, concurrency)
+        return
+
+    for lc_source_files, args in uploads:
+        _save_source_file_upload(
+            logger, lc_source_files, partial(_send_source_file, client, args)
+        )
+
+
+def _start_projects(
+    client, logger, heartbeat=None, claims=None, budget=None, selection=None
+):
+    logger.info("Starting LanguageCloud projects...")
+    budget = budget or SyncBudget(checkpoint_name=None)
+    for project_to_start in _iter_projects(
+        _get_projects_to_start(selection),
+        heartbeat,
+        claims,
+        budget=budget,
+        phase="start",
+    ):
+        budget.worked_on(project_to_start.pk)
+        try:
+            client.start_project(project_to_start.lc_project_id)
+            project_to_start.lc_project_status = LanguageCloudStatus.IN_PROGRESS
+            project_to_start.status_changed_at = timezone.now()
+            _count_rows(project_to_start.save_changes())
+        except RequestException:
+            logger.exception(
+                f"Failed to start project {project_to_start.lc_project_id}"
+            )
+
+
+def _export(
+    client,
+    logger,
+    po_cache=None,
+    concurrency=1,
+    heartbeat=None,
+    claims=None,
+    timer=None,
+    budget=None,
+    selection=None,
+):
+    """
+    Exports pending translations to LanguageCloud in distinct phases, each of
+    which runs once per sync:
+
+    1. create local LanguageCloudProjects from their project settings
+    2. create the projects in LanguageCloud
+    3. upload their source files, from `concurrency` threads
+    4. start the projects that were fully created
+
+    heartbeat is called between projects, see locking.SyncLease. With
+    claims, each phase processes the projects it claims from the other
+    workers and releases them once done, see locking.ProjectClaims. The
+    time spent in each phase is added up by timer, a stats.PhaseTimer.
+    With selection, only the projects of that selection.ProjectSelection are
+    exported.
+
+    If the last sync ran out of time part way through a phase, that phase
+    runs first, see budget.SyncBudget.
+    """
+    po_cache = po_cache or POCache.from_settings()
+    timer = timer or PhaseTimer()
+    budget = budget or SyncBudget(checkpoint_name=None)
 
-        # Now try to start any project that are ready to start
-        for project_to_start in _get_projects_to_start():
+    phases = [
+        ("local_create", partial(_create_local_projects, logger)),
+        ("remote_create", partial(_create_remote_projects, client, logger)),
+        (
+            "upload",
+            partial(
+                _upload_source_files, client, logger, po_cache, concurrency=concurrency
+            ),
+        ),
+        ("start", partial(_start_projects, client, logger)),
+    ]
+    for name, phase in budget.order_phases(phases):
+        with timer.phase(name):
+            if name == "local_create":
+                # project settings aren't claimed
+                phase(heartbeat=heartbeat, budget=budget, selection=selection)
+                continue
             try:
-                client.start_project(project_to_start.lc_project_id)
-                project_to_start.lc_project_status = LanguageCloudStatus.IN_PROGRESS
-                project_to_start.save()
-            except RequestException:
-                logger.exception(
-                    f"Failed to start project {project_to_start.lc_project_id}"
+                phase(
+                    heartbeat=heartbeat,
+                    claims=claims,
+                    budget=budget,
+                    selection=selection,
                 )
+            finally:
+                if claims is not None:
+                    claims.release()
 
+    logger.info(f"PO file cache: {po_cache.hits} hits, {po_cache.misses} misses")
 
-def _import(client, logger):
-    logger.info("Importing translations from LanguageCloud...")
-    lc_projects = (
-        LanguageCloudProject.objects.all()
-        .exclude(internal_status=LanguageCloudProject.STATUS_IMPORTED)
-        .exclude(lc_project_status=LanguageCloudStatus.ARCHIVED)
-        .exclude(lc_project_id="")
-        .order_by("id")
+
+class ImportPipeline:
+    """
+    Downloads target files from a pool of `workers` threads while the calling
+    thread imports the files that have already been downloaded.
+
+    Downloads are handed back in the order they were queued, so the database
+    is only ever written to from the calling thread. At most `max_queued`
+    downloads are queued or in progress, and no download is queued while the
+    files waiting to be imported add up to `max_bytes` or more.
+
+    Downloads and imports are timed as the "download" and "import" phases of
+    timer, a stats.PhaseTimer. heartbeat is called before each download is
+    handed back, so the sync lease is renewed while the queue drains. When it
+    raises BudgetExhausted, the downloads already queued are still handed
+    back.
+    """
+
+    def __init__(
+        self,
+        client,
+        workers=1,
+        max_queued=10,
+        max_bytes=50 * 1024 * 1024,
+        timer=None,
+        heartbeat=None,
+    ):
+        self.client = client
+        self.timer = timer or PhaseTimer()
+        self.heartbeat = heartbeat
+        self.workers = max(workers, 1)
+        self.max_queued = max(max_queued, 1)
+        self.max_bytes = max_bytes
+        self.pending = deque()
+        self.queued = 0
+        self.queued_bytes = 0
+        self.lock = threading.Lock()
+        self.executor = None
+
+    @classmethod
+    def from_settings(cls, client, workers=1, timer=None, heartbeat=None):
+        lc_settings = settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD
+        kwargs = {}
+        if "IMPORT_QUEUE_SIZE" in lc_settings:
+            kwargs["max_queued"] = lc_settings["IMPORT_QUEUE_SIZE"]
+        if "IMPORT_QUEUE_MAX_BYTES" in lc_settings:
+            kwargs["max_bytes"] = lc_settings["IMPORT_QUEUE_MAX_BYTES"]
+        return cls(client, workers=workers, timer=timer, heartbeat=heartbeat, **kwargs)
+
+    def __enter__(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.drain()
+        finally:
+            for future, _ in self.pending:
+                if future is not None:
+                    future.cancel()
+            self.executor.shutdown(wait=True)
+
+    def _download(self, *args, **kwargs):
+        with self.timer.phase("download"):
+            target_file = self.client.download_target_file(*args, **kwargs)
+        with self.lock:
+            self.queued_bytes += len(target_file)
+        return target_file
+
+    def download(self, callback, *args, **kwargs):
+        """
+        Queues ApiClient.download_target_file(*args, **kwargs). callback is
+        later called from this thread with the download's Future.
+        """
+        while self.pending and (
+            self.queued >= self.max_queued or self.queued_bytes >= self.max_bytes
+        ):
+            self._consume()
+        future = self.executor.submit(self._download, *args, **kwargs)
+        self.pending.append((future, callback))
+        self.queued += 1
+
+    def then(self, callback):
+        """
+        Queues callback to be called without arguments, once all the
+        downloads queued before it have been handed back.
+        """
+        self.pending.append((None, callback))
+        # run callbacks no longer waiting for a download straight away, and
+        # don't let them pile up (holding on to their projects) behind one
+        while self.pending and (
+            self.pending[0][0] is None or len(self.pending) > self.max_queued
+        ):
+            self._consume()
+
+    def _consume(self):
+        if self.heartbeat:
+            try:
+                self.heartbeat()
+            except BudgetExhausted:
+                pass
+        future, callback = self.pending.popleft()
+        if future is None:
+            with self.timer.phase("import"):
+                callback()
+            return
+
+        self.queued -= 1
+        if future.exception() is None:
+            with self.lock:
+                self.queued_bytes -= len(future.result())
+        with self.timer.phase("import"):
+            callback(future)
+
+    def drain(self):
+        while self.pending:
+            self._consume()
+
+
+def _import_target_file(logger, db_project, db_source_file, download, imported=None):
+    """
+    Imports a downloaded target file, then adds db_source_file to the
+    `imported` list
+    """
+    try:
+        target_file = download.result()
+    except (RequestException, KeyError, NotFound):
+        logger.error(
+            f"Failed to download target file for source file {db_source_file.lc_source_file_id}"
+        )
+        return
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except Exception:  # noqa
+        logger.exception(
+            f"Failed to download target file for source file {db_source_file.lc_source_file_id}"
+        )
+        return
+
+    logger.info(
+        f"Importing translations from target file for {db_source_file.translation.uuid}"
+    )
+    importer = Importer(db_source_file, logger)
+
+    try:
+        importer.import_po(db_source_file.translation, target_file)
+        if settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD.get("SEND_EMAILS", False):
+            send_sync_rws_emails(db_source_file.translation)
+
+        translation_imported.send(
+            sender=LanguageCloudProject,
+            instance=db_project,
+            source_object=db_project.translation_source_object,
+            translated_object=db_source_file.translation.get_target_instance(),
+        )
+    except SuspiciousOperation as e:
+        logger.exception(e)
+        db_source_file.internal_status = LanguageCloudFile.STATUS_ERROR
+        _count_rows(db_source_file.save_changes())
+        return
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except Exception as e:  # noqa
+        logger.exception(e)
+        db_source_file.internal_status = LanguageCloudFile.STATUS_ERROR
+        _count_rows(db_source_file.save_changes())
+        return
+
+    logger.info(
+        f"Successfully imported translations for {db_source_file.translation.uuid}"
+    )
+    # the file the importer marked as imported
+    _count_rows(1)
+    if imported is not None:
+        imported.append(db_source_file)
+
+
+def _complete_imported_project(client, logger, db_project, lc_project_status):
+    try:
+        db_project.refresh_from_db()
+        if not db_project.all_files_imported:
+            return
+
+        db_project.internal_status = LanguageCloudProject.STATUS_IMPORTED
+        try:
+            if lc_project_status != "completed":
+                client.complete_project(db_project.lc_project_id)
+                db_project.lc_project_status = LanguageCloudStatus.COMPLETED
+        except RequestException:
+            pass
+        finally:
+            # one UPDATE for both changes
+            _count_rows(db_project.save_changes())
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except Exception:  # noqa
+        logger.exception(
+            f"Failed to process translation project {db_project.lc_project_id}"
+        )
+
+
+def _get_due_date(db_project):
+    try:
+        return db_project.lc_settings.due_date
+    except LanguageCloudProjectSettings.DoesNotExist:
+        return None
+
+
+def _set_project_status(db_project, status, now):
+    """
+    Records a polled status and schedules the project's next poll
+    """
+    if status != db_project.lc_project_status or db_project.status_changed_at is None:
+        db_project.status_changed_at = now
+    db_project.lc_project_status = status
+    db_project.next_poll_at = get_next_poll_at(
+        status,
+        now,
+        status_changed_at=db_project.status_changed_at,
+        due_date=_get_due_date(db_project),
     )
 
+
+def _list_project_statuses(client, logger):
+    try:
+        return client.list_project_statuses()
+    except (RequestException, KeyError):
+        logger.error("Failed to list project statuses")
+        return None
+
+
+def _update_project_statuses(logger, lc_projects, statuses, now):
+    """
+    Updates lc_project_status from a listing of all LanguageCloud projects.
+    Returns the projects missing from the listing, whose status has to be
+    fetched one by one, or all projects if the listing failed.
+    """
+    if statuses is None:
+        return lc_projects
+
+    changed = []
+    missing = []
+    status_changes = 0
     for db_project in lc_projects:
+        status = statuses.get(db_project.lc_project_id)
+        if status is None:
+            missing.append(db_project)
+            continue
+        if status != db_project.lc_project_status:
+            status_changes += 1
+        _set_project_status(db_project, status, now)
+        if db_project.get_changed_fields():
+            changed.append(db_project)
+
+    # flush the whole batch at once
+    fields = ["lc_project_status", "status_changed_at", "next_poll_at"]
+    LanguageCloudProject.objects.bulk_update(changed, fields)
+    _count_rows(len(changed))
+    for db_project in changed:
+        db_project.remember_db_values(fields)
+    logger.info(
+        f"Updated the status of {status_changes} of {len(lc_projects)} projects"
+    )
+    return missing
+
+
+def _fetch_project_status(client, logger, db_project, now):
+    try:
+        api_project = client.get_project(db_project.lc_project_id)
+    except RequestException:
+        logger.error(f"Failed to fetch status for project {db_project.lc_project_id}")
+        return False
+    _set_project_status(db_project, api_project["status"], now)
+    _count_rows(db_project.save_changes())
+    return True
+
+
+def _clear_project_event(db_project, event_received_at):
+    """
+    Marks the webhook event received at event_received_at as handled. An
+    event received since is left for the next sync.
+    """
+    _count_rows(
+        LanguageCloudProject.objects.filter(
+            pk=db_project.pk, event_received_at=event_received_at
+        ).update(event_received_at=None)
+    )
+    if db_project.event_received_at == event_received_at:
+        db_project.event_received_at = None
+        db_project.remember_db_values(["event_received_at"])
+
+
+def _clear_imported_project_event(
+    db_project, event_received_at, lc_source_files, imported
+):
+    """
+    Marks the webhook event as handled if all the files queued for import
+    were imported. Otherwise the next sync tries the import again.
+    """
+    if len(imported) == len(lc_source_files):
+        _clear_project_event(db_project, event_received_at)
+
+
+def _queue_project_import(client, logger, pipeline, db_project):
+    """
+    Queues the downloads and imports of the project's translated files on
+    pipeline. Returns False if there was nothing to import.
+    """
+    source_locale = db_project.translation_source.locale
+    logger.info(
+        f"Processing TranslationSource {str(db_project.translation_source.object.get_instance(source_locale))}"
+    )
+    lc_project_status = db_project.lc_project_status
+    if lc_project_status not in (
+        LanguageCloudStatus.IN_PROGRESS,
+        LanguageCloudStatus.COMPLETED,
+    ):
+        logger.info(f'LanguageCloud Project Status: "{lc_project_status}". Skipping..')
+        if db_project.event_received_at is not None:
+            # there is nothing to import
+            _clear_project_event(db_project, db_project.event_received_at)
+        return False
+
+    lc_source_files = list(
+        db_project.languagecloudfile_set.all()
+        .exclude(internal_status=LanguageCloudFile.STATUS_IMPORTED)
+        .exclude(lc_source_file_id="")
+        .order_by("id")
+    )
+
+    imported = []
+    target_files = {}
+    if lc_source_files:
         try:
-            source_locale = db_project.translation_source.locale
-            logger.info(
-                f"Processing TranslationSource {str(db_project.translation_source.object.get_instance(source_locale))}"
+            target_files = client.list_target_files(db_project.lc_project_id)
+        except (RequestException, KeyError):
+            logger.error(
+                f"Failed to list target files for project {db_project.lc_project_id}"
             )
-            try:
-                api_project = client.get_project(db_project.lc_project_id)
-            except RequestException:
-                logger.error(
-                    f"Failed to fetch status for project {db_project.lc_project_id}"
-                )
-                continue
-            db_project.lc_project_status = api_project["status"]
-            db_project.save()
+            return False
 
-            if api_project["status"] not in (
-                LanguageCloudStatus.IN_PROGRESS,
-                LanguageCloudStatus.COMPLETED,
-            ):
-                logger.info(
-                    f"LanguageCloud Project Status: \"{api_project['status']}\". Skipping.."
-                )
-                continue
+    for db_source_file in lc_source_files:
+        target_locale = db_source_file.translation.target_locale
+        logger.info(
+            f"Processing Translation {db_source_file.translation.uuid}\n"
+            f"       {str(source_locale)} --> {str(target_locale)} "
+        )
+        pipeline.download(
+            partial(
+                _import_target_file,
+                logger,
+                db_project,
+                db_source_file,
+                imported=imported,
+            ),
+            db_project.lc_project_id,
+            db_source_file.lc_source_file_id,
+            target_files=target_files,
+            target_locale=target_locale.language_code,
+        )
 
-            lc_source_files = (
-                db_project.languagecloudfile_set.all()
-                .exclude(internal_status=LanguageCloudFile.STATUS_IMPORTED)
-                .exclude(lc_source_file_id="")
-                .order_by("id")
+    pipeline.then(
+        partial(
+            _complete_imported_project,
+            client,
+            logger,
+            db_project,
+            lc_project_status,
+        )
+    )
+    if db_project.event_received_at is not None:
+        pipeline.then(
+            partial(
+                _clear_imported_project_event,
+                db_project,
+                db_project.event_received_at,
+                lc_source_files,
+                imported,
             )
+        )
+    return True
 
-            for db_source_file in lc_source_files:
-                target_locale = db_source_file.translation.target_locale
-                logger.info(
-                    f"Processing Translation {db_source_file.translation.uuid}\n"
-                    f"       {str(source_locale)} --> {str(target_locale)} "
-                )
 
-                try:
-                    target_file = client.download_target_file(
-                        db_project.lc_project_id,
-                        db_source_file.lc_source_file_id,
-                    )
-                except (RequestException, KeyError, NotFound):
-                    logger.error(
-                        f"Failed to download target file for source file {db_source_file.lc_source_file_id}"
-                    )
-                    continue
-
-                logger.info("Importing translations from target file")
-                importer = Importer(db_source_file, logger)
-
-                try:
-                    importer.import_po(db_source_file.translation, target_file)
-                    if settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD.get(
-                        "SEND_EMAILS", False
-                    ):
-                        send_sync_rws_emails(db_source_file.translation)
-
-                    translation_imported.send(
-                        sender=LanguageCloudProject,
-                        instance=db_project,
-                        source_object=db_project.translation_source_object,
-                        translated_object=db_source_file.translation.get_target_instance(),
-                    )
-                except SuspiciousOperation as e:
-                    logger.exception(e)
-                    db_source_file.internal_status = LanguageCloudFile.STATUS_ERROR
-                    db_source_file.save()
-                    continue
-                except (KeyboardInterrupt, SystemExit):
-                    raise
-                except Exception as e:  # noqa
-                    logger.exception(e)
-                    db_source_file.internal_status = LanguageCloudFile.STATUS_ERROR
-                    db_source_file.save()
-                    continue
-
-                logger.info(
-                    f"Successfully imported translations for {db_source_file.translation.uuid}"
-                )
+def _import(
+    client,
+    logger,
+    concurrency=1,
+    heartbeat=None,
+    claims=None,
+    events_only=False,
+    timer=None,
+    budget=None,
+    selection=None,
+):
+    """
+    Imports the target files of in progress and completed projects due for a
+    poll, see polling.get_next_poll_at(), or reported by a webhook, see
+    webhooks.py. With `events_only`, only the reported ones are imported.
+    Files are downloaded from `concurrency` threads through an ImportPipeline,
+    and the ones already queued are still imported if the budget runs out.
+    """
+    logger.info("Importing translations from LanguageCloud...")
+    timer = timer or PhaseTimer()
+    budget = budget or SyncBudget(checkpoint_name=None)
+    budget.start("import")
+    now = timezone.now()
+    lc_projects = _get_projects_to_import(
+        now, events_only=events_only, selection=selection
+    )
+    if claims is None:
+        batches = _iter_chunks(lc_projects, start_after=budget.resume_after("import"))
+    else:
+        batches = iter(partial(claims.claim, lc_projects), [])
+
+    statuses = None
+    polled = 0
+    reported = 0
+    try:
+        with ImportPipeline.from_settings(
+            client, workers=concurrency, timer=timer, heartbeat=heartbeat
+        ) as pipeline:
+            try:
+                for batch in batches:
+                    to_poll = [p for p in batch if p.event_received_at is None]
+                    reported += len(batch) - len(to_poll)
+                    unlisted_projects = set()
+                    if to_poll:
+                        with timer.phase("import_poll"):
+                            if not polled:
+                                statuses = _list_project_statuses(client, logger)
+                            unlisted_projects.update(
+                                _update_project_statuses(logger, to_poll, statuses, now)
+                            )
+                        polled += len(to_poll)
+
+                    for index, db_project in enumerate(batch):
+                        if heartbeat:
+                            try:
+                                heartbeat()
+                            except BudgetExhausted:
+                                # polled but not imported, so keep them due
+                                _count_rows(
+                                    LanguageCloudProject.objects.filter(
+                                        pk__in=[p.pk for p in batch[index:]]
+                                    ).update(next_poll_at=now)
+                                )
+                                raise
+                        try:
+                            if db_project.event_received_at is not None:
+                                # its status was recorded with the event, and
+                                # the event is cleared once it is imported
+                                _set_project_status(
+                                    db_project, db_project.lc_project_status, now
+                                )
+                                _count_rows(db_project.save_changes())
+                            elif db_project in unlisted_projects:
+                                with timer.phase("import_poll"):
+                                    fetched = _fetch_project_status(
+                                        client, logger, db_project, now
+                                    )
+                                if not fetched:
+                                    continue
+                            if _queue_project_import(
+                                client, logger, pipeline, db_project
+                            ):
+                                budget.worked_on(db_project.pk)
+                        except (KeyboardInterrupt, SystemExit, LeaseLost):
+                            # the pipeline renews the lease while it drains
+                            raise
+                        except Exception:  # noqa
+                            logger.exception(
+                                f"Failed to process translation project {db_project.lc_project_id}"
+                            )
+                            continue
+                        finally:
+                            budget.processed(db_project.pk)
+            except BudgetExhausted:
+                pipeline.drain()
+                raise
+    finally:
+        if claims is not None:
+            claims.release()
+
+    if reported:
+        logger.info(f"Imported {reported} projects reported by a webhook")
+    if not polled and not reported:
+        logger.info("No projects are due for a status poll")
+
+
+class RowWriteCounter:
+    """
+    Counts the rows written by a sync, as reported by the ORM calls writing
+    them, see _count_rows(). Bookkeeping writes, of the sync locks, project
+    claims, checkpoints and file counters, aren't counted.
+    """
+
+    def __init__(self):
+        self.rows = 0
+
+    @contextmanager
+    def counting(self):
+        """
+        Counts the rows written in this thread until the block exits
+        """
+        previous = getattr(_row_writes, "counter", None)
+        _row_writes.counter = self
+        try:
+            yield self
+        finally:
+            _row_writes.counter = previous
+
+
+# the RowWriteCounter of the sync running in each thread
+_row_writes = threading.local()
 
-            db_project.refresh_from_db()
-            if db_project.all_files_imported:
-                db_project.internal_status = LanguageCloudProject.STATUS_IMPORTED
-                db_project.save()
-
-                if api_project["status"] != "completed":
-                    try:
-                        client.complete_project(db_project.lc_project_id)
-                        db_project.lc_project_status = LanguageCloudStatus.COMPLETED
-                        db_project.save()
-                    except RequestException:
-                        pass
-        except (KeyboardInterrupt, SystemExit):
-            raise
-        except Exception:  # noqa
-            logger.exception(
-                f"Failed to process translation project {db_project.lc_project_id}"
-            )
-            continue
+
+def _count_rows(rows):
+    """
+    Adds `rows` to the RowWriteCounter of the sync running in this thread,
+    if any. Returns `rows`.
+    """
+    counter = getattr(_row_writes, "counter", None)
+    if counter is not None:
+        counter.rows += rows
+    return rows
+
+
+def _record_skipped_run():
+    """
+    Records a sync skipped because another sync held the lock. Syncs skipped
+    in a row share a SyncRun, so retries while a long sync runs don't flood
+    the report.
+    """
+    now = timezone.now()
+    last_run = SyncRun.objects.first()
+    if last_run is not None and last_run.status == SyncRun.STATUS_SKIPPED:
+        last_run.finished_at = now
+        last_run.save(update_fields=["finished_at"])
+    else:
+        SyncRun.objects.create(status=SyncRun.STATUS_SKIPPED, finished_at=now)
 
 
 class SyncManager:
     def __init__(self, logger=None):
         self.logger = logger or logging.getLogger(__name__)
+        self.rows_written = 0
+
+    def sync(
+        self,
+        concurrency=1,
+        parallel=False,
+        events_only=False,
+        max_seconds=None,
+        shard=None,
+        import_only=False,
+        export_only=False,
+        project_ids=None,
+        lc_project_ids=None,
+        locales=None,
+        max_projects=None,
+    ):
+        """
+        Imports completed translations from LanguageCloud, then exports
+        pending translations. Returns False straight away if another sync
+        holds a conflicting lock, or if this sync lost its lock part way
+        through. The options are those of the sync_rws command, described
+        in the README. Each call is recorded as a SyncRun.
+        """
+        if import_only and export_only:
+            raise ValueError("import_only and export_only can't both be set")
 
-    def sync(self):
-        self.logger.info("Syncing with RWS LanguageCloud...")
+        selection = ProjectSelection(shard, project_ids, lc_project_ids, locales)
+        lock_name = "sync" if shard is None else f"sync-{shard.name}"
+        if parallel:
+            # each worker holds a lock of its own
+            lock_name = f"sync-parallel-{uuid.uuid4().hex[:8]}"
+        if import_only:
+            lock_name += "-import"
+        elif export_only:
+            lock_name += "-export"
+        budget = SyncBudget(
+            max_seconds,
+            max_projects=max_projects,
+            checkpoint_name=(
+                None if parallel or events_only or selection.is_partial else lock_name
+            ),
+        )
+        lease = SyncLease(
+            lock_name,
+            shard=shard,
+            parallel=parallel,
+            phase="import" if import_only else "export" if export_only else "",
+        )
+        if not lease.acquire():
+            self.logger.info("Another sync is already running. Skipping..")
+            _record_skipped_run()
+            return False
+
+        run = SyncRun.objects.create()
+        status = SyncRun.STATUS_FAILED
+        error = ""
+        sync_kwargs = {
+            "events_only": events_only,
+            "import_only": import_only,
+            "export_only": export_only,
+            "run": run,
+            "budget": budget,
+            "selection": selection,
+        }
+        try:
+            claims = ProjectClaims() if parallel else None
+
+            def heartbeat():
+                lease.heartbeat()
+                if claims is not None:
+                    claims.heartbeat()
+
+            try:
+                self._sync(concurrency, heartbeat, claims=claims, **sync_kwargs)
+            except LeaseLost:
+                self.logger.error(
+                    "The sync lock was taken over by another sync. Stopping.."
+                )
+                status = SyncRun.STATUS_STOPPED
+                return False
+            except BudgetExhausted:
+                # saved while holding the lock, before the next sync loads it
+                budget.save_checkpoint()
+                raise
+            finally:
+                lease.release()
+            budget.clear_checkpoint()
+            status = SyncRun.STATUS_FINISHED
+            return True
+        except BudgetExhausted as e:
+            self.logger.info(
+                f"{e} in the {budget.phase} phase. "
+                "The next sync will carry on from there. Stopping.."
+            )
+            status = (
+                SyncRun.STATUS_PROJECT_LIMIT
+                if budget.projects_exhausted
+                else SyncRun.STATUS_OUT_OF_TIME
+            )
+            return True
+        except Exception:  # noqa
+            error = traceback.format_exc()
+            raise
+        finally:
+            run.status = status
+            run.error = error
+            run.finished_at = timezone.now()
+            run.save()
+
+    def _sync(
+        self,
+        concurrency,
+        heartbeat,
+        claims=None,
+        events_only=False,
+        import_only=False,
+        export_only=False,
+        run=None,
+        budget=None,
+        selection=None,
+    ):
+        shard = selection.shard if selection is not None else None
+        if shard is None:
+            self.logger.info("Syncing with RWS LanguageCloud...")
+        else:
+            self.logger.info(f"Syncing shard {shard} with RWS LanguageCloud...")
+        timer = PhaseTimer()
+        logger = FailureCountingLogger(self.logger)
+        budget = budget or SyncBudget(checkpoint_name=None)
+        heartbeat = budget.wrap_heartbeat(heartbeat)
 
         """
-        Calling authenticate() will request an OAUth token
-        which can be used for the duration of the session
+        Calling authenticate() will request an OAuth token, or reuse a cached
+        one, which can be used for the duration of the session
         (a token expires after 24 hours).
 
         We can't do anything without auth, so there is no try/except here.
         If we throw an exception invoking ApiClient() the error is fatal.
         """
-        client = ApiClient(self.logger)
-        client.authenticate()
+        client = ApiClient(logger)
 
-        _import(client, self.logger)
-        _export(client, self.logger)
+        # all database writes happen in this thread, see ImportPipeline
+        row_writes = RowWriteCounter()
+        try:
+            with timer.phase("auth"):
+                client.authenticate()
+            steps = []
+            if not export_only:
+                steps.append(partial(_import, events_only=events_only))
+            if not (events_only or import_only):
+                steps.append(_export)
+            if budget.resume_phase in EXPORT_PHASES:
+                # carry on with the export the last sync didn't finish
+                steps.reverse()
+            with row_writes.counting():
+                for step in steps:
+                    step(
+                        client,
+                        logger,
+                        concurrency=concurrency,
+                        heartbeat=heartbeat,
+                        claims=claims,
+                        timer=timer,
+                        budget=budget,
+                        selection=selection,
+                    )
+        finally:
+            self.rows_written = row_writes.rows
+            self.logger.info(f"Wrote {row_writes.rows} rows to the database")
+            if run is not None:
+                run.phase_durations = {
+                    phase: round(seconds, 3)
+                    for phase, seconds in timer.durations.items()
+                }
+                run.api_calls = client.stats.total("calls")
+                run.api_bytes_sent = client.stats.total("bytes_sent")
+                run.api_bytes_received = client.stats.total("bytes_received")
+                run.api_stats = client.stats.as_dict()
+                run.rows_written = row_writes.rows
+                run.failures = logger.failures
 
+        rate_limiter = client.rate_limiter
+        self.logger.info(
+            f"Waited {rate_limiter.total_wait_time:.1f}s for API rate limits ("
+            + ", ".join(
+                f"{family}: {wait_time:.1f}s"
+                for family, wait_time in rate_limiter.wait_time.items()
+            )
+            + ")"
+        )
         self.logger.info("...Done")
 
-    def trigger(self):
+    def trigger(self, scope=SyncJob.SCOPE_ALL):
         """
-        Called when user presses the "Sync" button in the admin
+        Called when user presses the "Sync" button in the admin, or with
+        `scope` SyncJob.SCOPE_EVENTS when a webhook reported changes
 
-        This should enqueue a background task to run the sync() function
+        Queues a sync with the backend set by the SYNC_BACKEND setting, which
+        runs it inline by default. See background.py
         """
-        self.sync()
+        return get_sync_backend().trigger(scope=scope)
 
     def is_queued(self):
         """
         Returns True if the background task is queued
         """
-        return False
+        return get_sync_backend().is_queued()
 
     def is_running(self):
         """
-        Returns True if the background task is currently running
+        Returns True if a sync, or a worker of a parallel sync, currently
+        holds a sync lock
         """
-        return False
+        return get_sync_backend().is_running()
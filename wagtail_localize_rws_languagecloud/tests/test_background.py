@@ -0,0 +1,172 @@
+from unittest.mock import Mock, patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..background import (
+    CallableBackend,
+    DatabaseQueueBackend,
+    InlineBackend,
+    get_sync_backend,
+    run_queued_jobs,
+)
+from ..locking import SyncLease
+from ..models import SyncJob
+from ..sync import SyncManager
+
+
+enqueue_mock = Mock()
+
+
+@patch("wagtail_localize_rws_languagecloud.sync.SyncManager.sync")
+class TestBackends(TestCase):
+    def test_inline_backend_runs_the_sync(self, sync_mock):
+        job = InlineBackend(concurrency=3).trigger()
+        sync_mock.assert_called_once_with(concurrency=3)
+        job.refresh_from_db()
+        self.assertEqual(job.status, SyncJob.STATUS_FINISHED)
+        self.assertIsNotNone(job.started_at)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_failed_sync_is_recorded(self, sync_mock):
+        sync_mock.side_effect = ValueError("oh no")
+        job = InlineBackend().trigger()
+        job.refresh_from_db()
+        self.assertEqual(job.status, SyncJob.STATUS_FAILED)
+        self.assertIn("ValueError: oh no", job.error)
+
+    def test_database_queue_backend_deduplicates_triggers(self, sync_mock):
+        backend = DatabaseQueueBackend()
+        self.assertFalse(backend.is_queued())
+        job = backend.trigger()
+        self.assertEqual(backend.trigger(), job)
+        self.assertEqual(SyncJob.objects.count(), 1)
+        self.assertTrue(backend.is_queued())
+        self.assertFalse(backend.is_running())
+        self.assertEqual(sync_mock.call_count, 0)
+
+        self.assertEqual(run_queued_jobs(), 1)
+        self.assertEqual(sync_mock.call_count, 1)
+        self.assertFalse(backend.is_queued())
+        self.assertEqual(run_queued_jobs(), 0)
+
+        # a sync can be queued again once the previous one was picked up
+        self.assertNotEqual(backend.trigger(), job)
+
+    def test_queued_jobs_are_run_together(self, sync_mock):
+        SyncJob.objects.create()
+        SyncJob.objects.create()
+        self.assertEqual(run_queued_jobs(), 2)
+        self.assertEqual(sync_mock.call_count, 1)
+        self.assertEqual(
+            SyncJob.objects.filter(status=SyncJob.STATUS_FINISHED).count(), 2
+        )
+
+    def test_event_jobs_only_sync_events(self, sync_mock):
+        backend = DatabaseQueueBackend()
+        job = backend.trigger(scope=SyncJob.SCOPE_EVENTS)
+        self.assertEqual(backend.trigger(scope=SyncJob.SCOPE_EVENTS), job)
+        self.assertEqual(run_queued_jobs(concurrency=2), 1)
+        sync_mock.assert_called_once_with(concurrency=2, events_only=True)
+
+    def test_full_sync_is_queued_behind_event_jobs(self, sync_mock):
+        backend = DatabaseQueueBackend()
+        events_job = backend.trigger(scope=SyncJob.SCOPE_EVENTS)
+        job = backend.trigger()
+        self.assertNotEqual(job, events_job)
+        # any queued sync imports the projects reported by webhooks
+        self.assertEqual(backend.trigger(scope=SyncJob.SCOPE_EVENTS), events_job)
+        self.assertEqual(backend.trigger(), job)
+
+        self.assertEqual(run_queued_jobs(), 2)
+        sync_mock.assert_called_once_with(concurrency=1)
+
+    def test_is_running(self, sync_mock):
+        backend = DatabaseQueueBackend()
+        states = []
+
+        def sync(concurrency):
+            lease = SyncLease()
+            lease.acquire()
+            states.append((backend.is_running(), backend.is_queued()))
+            lease.release()
+
+        sync_mock.side_effect = sync
+        backend.trigger()
+        run_queued_jobs()
+        self.assertEqual(states, [(True, False)])
+        self.assertFalse(backend.is_running())
+
+    def test_jobs_are_requeued_when_another_sync_holds_the_lock(self, sync_mock):
+        sync_mock.return_value = False
+        job = DatabaseQueueBackend().trigger()
+        self.assertEqual(run_queued_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, SyncJob.STATUS_QUEUED)
+        self.assertIsNone(job.started_at)
+
+    def test_inline_jobs_are_skipped_when_another_sync_holds_the_lock(self, sync_mock):
+        sync_mock.return_value = False
+        job = InlineBackend().trigger()
+        job.refresh_from_db()
+        self.assertEqual(job.status, SyncJob.STATUS_SKIPPED)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(InlineBackend().is_queued())
+
+    def test_callable_backend(self, sync_mock):
+        enqueue_mock.reset_mock()
+        backend = CallableBackend(
+            enqueue="wagtail_localize_rws_languagecloud.tests.test_background.enqueue_mock"
+        )
+        backend.trigger()
+        backend.trigger()
+        enqueue_mock.assert_called_once_with()
+        self.assertEqual(sync_mock.call_count, 0)
+
+    @override_settings(
+        WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={
+            "SYNC_BACKEND": "wagtail_localize_rws_languagecloud.background.DatabaseQueueBackend",
+            "SYNC_BACKEND_OPTIONS": {"concurrency": 2},
+        }
+    )
+    def test_sync_manager_uses_configured_backend(self, sync_mock):
+        backend = get_sync_backend()
+        self.assertIsInstance(backend, DatabaseQueueBackend)
+        self.assertEqual(backend.concurrency, 2)
+
+        manager = SyncManager()
+        manager.trigger()
+        self.assertTrue(manager.is_queued())
+        self.assertFalse(manager.is_running())
+        self.assertEqual(sync_mock.call_count, 0)
+
+    @override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={})
+    def test_default_backend(self, sync_mock):
+        self.assertIsInstance(get_sync_backend(), InlineBackend)
+
+
+@patch("wagtail_localize_rws_languagecloud.sync.SyncManager.sync")
+class TestRwsWorkerCommand(TestCase):
+    def test_once(self, sync_mock):
+        DatabaseQueueBackend().trigger()
+        call_command("rws_worker", "--once", "--concurrency", "4")
+        sync_mock.assert_called_once_with(concurrency=4)
+        self.assertEqual(SyncJob.objects.get().status, SyncJob.STATUS_FINISHED)
+
+    @patch(
+        "wagtail_localize_rws_languagecloud.management.commands.rws_worker.time.sleep"
+    )
+    def test_backs_off_while_another_sync_holds_the_lock(self, sleep_mock, sync_mock):
+        sync_mock.return_value = False
+        sleep_mock.side_effect = [None, None, None, KeyboardInterrupt]
+        DatabaseQueueBackend().trigger()
+        with self.assertRaises(KeyboardInterrupt):
+            call_command("rws_worker", "--sleep", "5", "--max-sleep", "30")
+        self.assertEqual(
+            [call.args[0] for call in sleep_mock.call_args_list], [10, 20, 30, 30]
+        )
+        self.assertEqual(SyncJob.objects.get().status, SyncJob.STATUS_QUEUED)
+
+    def test_once_with_nothing_queued(self, sync_mock):
+        call_command("rws_worker", "--once")
+        self.assertEqual(sync_mock.call_count, 0)
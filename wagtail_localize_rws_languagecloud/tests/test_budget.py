@@ -0,0 +1,87 @@
+from unittest.mock import Mock
+
+from django.test import TestCase
+
+from ..budget import BudgetExhausted, SyncBudget
+from ..models import SyncCheckpoint
+
+
+class TestSyncBudget(TestCase):
+    def test_check(self):
+        clock = Mock(side_effect=[0, 9, 10])
+        budget = SyncBudget(max_seconds=10, clock=clock)
+        budget.check()
+        with self.assertRaises(BudgetExhausted):
+            budget.check()
+
+    def test_unlimited(self):
+        budget = SyncBudget(clock=Mock(side_effect=AssertionError))
+        budget.check()
+
+    def test_heartbeat(self):
+        heartbeat = Mock()
+        budget = SyncBudget(max_seconds=10, clock=Mock(side_effect=[0, 5, 15]))
+        budget_heartbeat = budget.wrap_heartbeat(heartbeat)
+        budget_heartbeat()
+        self.assertEqual(heartbeat.call_count, 1)
+        with self.assertRaises(BudgetExhausted):
+            budget_heartbeat()
+        # the lease is still renewed while the sync stops
+        self.assertEqual(heartbeat.call_count, 2)
+
+    def test_checkpoint_is_saved_and_resumed(self):
+        budget = SyncBudget()
+        budget.start("import")
+        budget.processed(3)
+        budget.start("upload")
+        budget.processed(7)
+        budget.processed(8)
+        budget.save_checkpoint()
+
+        checkpoint = SyncCheckpoint.objects.get()
+        self.assertEqual((checkpoint.phase, checkpoint.last_pk), ("upload", 8))
+
+        budget = SyncBudget()
+        self.assertEqual(budget.resume_after("upload"), 8)
+        self.assertIsNone(budget.resume_after("import"))
+        phases = [(name, None) for name in ["local_create", "upload", "start"]]
+        self.assertEqual(
+            [name for name, _ in budget.order_phases(phases)],
+            ["upload", "start", "local_create"],
+        )
+
+        # stopping again before processing anything keeps the checkpoint
+        budget.start("upload")
+        budget.save_checkpoint()
+        self.assertEqual(SyncCheckpoint.objects.get().last_pk, 8)
+
+        budget.clear_checkpoint()
+        self.assertFalse(SyncCheckpoint.objects.exists())
+
+    def test_without_checkpoint_name(self):
+        SyncCheckpoint.objects.create(name="sync", phase="upload", last_pk=8)
+        budget = SyncBudget(checkpoint_name=None)
+        self.assertIsNone(budget.resume_after("upload"))
+        budget.start("import")
+        budget.processed(1)
+        budget.save_checkpoint()
+        budget.clear_checkpoint()
+        self.assertEqual(SyncCheckpoint.objects.get().phase, "upload")
+
+    def test_max_projects(self):
+        budget = SyncBudget(max_projects=3, checkpoint_name=None)
+        budget.start("import")
+        budget.worked_on(1)
+        budget.check()
+        self.assertEqual(budget.remaining_projects, 2)
+        # projects count once, whichever phases work on them
+        budget.start("upload")
+        budget.worked_on(1)
+        self.assertEqual(budget.remaining_projects, 2)
+        budget.worked_on(2)
+        budget.worked_on(5)
+        self.assertTrue(budget.projects_exhausted)
+        self.assertEqual(budget.remaining_projects, 0)
+        self.assertIsNone(SyncBudget().remaining_projects)
+        with self.assertRaises(BudgetExhausted):
+            budget.check()
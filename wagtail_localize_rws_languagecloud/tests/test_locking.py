@@ -0,0 +1,331 @@
+import datetime
+import logging
+
+from functools import partial
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..locking import LeaseLost, ProjectClaims, SyncLease
+from ..models import LanguageCloudProject, SyncLock, SyncRun
+from ..sharding import Shard
+from ..sync import SyncManager
+from .helpers import create_test_page
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSyncLease(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def _lease(self, **kwargs):
+        return SyncLease(timeout=600, clock=self.clock, **kwargs)
+
+    def test_only_one_lease_is_held_at_a_time(self):
+        first = self._lease()
+        second = self._lease()
+        self.assertFalse(SyncLease.is_held())
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        self.assertTrue(SyncLease.is_held())
+
+        first.release()
+        self.assertFalse(SyncLease.is_held())
+        self.assertTrue(second.acquire())
+
+    def test_leases_are_per_name(self):
+        self.assertTrue(self._lease(name="a", phase="import").acquire())
+        self.assertTrue(self._lease(name="b", phase="export").acquire())
+
+    def test_conflicting_leases_are_not_acquired(self):
+        self.assertTrue(self._lease(name="a").acquire())
+        b = self._lease(name="b")
+        self.assertFalse(b.acquire())
+        self.assertFalse(SyncLock.objects.filter(name="b").exists())
+
+    def test_conflicts_with(self):
+        def conflict(lease, **scope):
+            lock = SyncLock(name="other", **scope)
+            return self._lease(name="sync", **lease).conflicts_with(lock)
+
+        shard = Shard(0, 2)
+        # a full sync runs both phases
+        self.assertTrue(conflict({}))
+        self.assertTrue(conflict({}, phase="import"))
+        self.assertTrue(conflict({"phase": "export"}))
+        self.assertTrue(conflict({"phase": "export"}, phase="export"))
+        self.assertFalse(conflict({"phase": "import"}, phase="export"))
+
+        # shards only exclude the same shard, of the same count
+        self.assertTrue(conflict({"shard": shard}, shard_index=0, shard_count=2))
+        self.assertFalse(conflict({"shard": shard}, shard_index=1, shard_count=2))
+        self.assertTrue(conflict({"shard": shard}, shard_index=1, shard_count=3))
+        self.assertTrue(conflict({"shard": shard}))
+        self.assertTrue(conflict({}, shard_index=1, shard_count=2))
+        self.assertFalse(
+            conflict(
+                {"shard": shard, "phase": "import"},
+                shard_index=0,
+                shard_count=2,
+                phase="export",
+            )
+        )
+
+        # parallel workers only exclude other syncs
+        self.assertFalse(conflict({"parallel": True}, parallel=True))
+        self.assertTrue(conflict({"parallel": True}))
+        self.assertTrue(conflict({}, parallel=True))
+        self.assertTrue(conflict({"shard": shard}, parallel=True))
+        self.assertFalse(
+            conflict({"parallel": True, "phase": "import"}, phase="export")
+        )
+
+    def test_expired_lease_is_taken_over(self):
+        first = self._lease()
+        first.acquire()
+        SyncLock.objects.update(expires_at=timezone.now() - datetime.timedelta(1))
+        self.assertFalse(SyncLease.is_held())
+
+        second = self._lease()
+        self.assertTrue(second.acquire())
+        self.assertEqual(SyncLock.objects.get().owner, second.owner)
+
+        self.clock.now += 60
+        with self.assertRaises(LeaseLost):
+            first.heartbeat()
+
+        # releasing a lost lease leaves the new owner alone
+        first.release()
+        self.assertTrue(SyncLease.is_held())
+
+    def test_heartbeat_renews_the_lease(self):
+        lease = self._lease()
+        lease.acquire()
+        expires_at = timezone.now() + datetime.timedelta(seconds=1)
+        SyncLock.objects.update(expires_at=expires_at)
+
+        # not renewed until a tenth of the timeout has passed
+        self.clock.now += 59
+        lease.heartbeat()
+        self.assertEqual(SyncLock.objects.get().expires_at, expires_at)
+
+        self.clock.now += 1
+        lease.heartbeat()
+        self.assertGreater(
+            SyncLock.objects.get().expires_at,
+            timezone.now() + datetime.timedelta(seconds=590),
+        )
+
+    def test_heartbeat_without_lease(self):
+        with self.assertRaises(LeaseLost):
+            self._lease().heartbeat()
+
+    @override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={"SYNC_LOCK_TIMEOUT": 30})
+    def test_timeout_setting(self):
+        self.assertEqual(SyncLease().timeout, 30)
+
+
+class TestProjectClaims(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.projects = []
+        for i in range(5):
+            _, source = create_test_page(
+                title=f"Test page {i}",
+                slug=f"test-page-{i}",
+                test_charfield=f"Some test translatable content {i}",
+            )
+            cls.projects.append(
+                LanguageCloudProject.objects.create(
+                    translation_source=source,
+                    source_last_updated_at=source.last_updated_at,
+                    lc_project_id=f"proj{i}",
+                )
+            )
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.queryset = LanguageCloudProject.objects.order_by("pk")
+
+    def _claims(self, **kwargs):
+        return ProjectClaims(timeout=600, batch_size=2, clock=self.clock, **kwargs)
+
+    def test_workers_claim_disjoint_batches(self):
+        first = self._claims()
+        second = self._claims()
+        claimed = [
+            first.claim(self.queryset),
+            second.claim(self.queryset),
+            first.claim(self.queryset),
+            second.claim(self.queryset),
+        ]
+        self.assertEqual([len(batch) for batch in claimed], [2, 2, 1, 0])
+        claimed_ids = [project.pk for batch in claimed for project in batch]
+        self.assertEqual(sorted(claimed_ids), [p.pk for p in self.projects])
+        self.assertEqual(
+            LanguageCloudProject.objects.filter(claimed_by=first.owner).count(), 3
+        )
+
+    def test_contending_workers_claim_every_project(self):
+        first = self._claims()
+        second = self._claims()
+        queryset = self.queryset.exclude(lc_project_id="done")
+        contended = []
+
+        def contend(execute, sql, params, many, context):
+            # the second worker claims and processes the head of the queue
+            # while the first is claiming
+            if not contended and sql.startswith("SELECT"):
+                contended.append(None)
+                contended[0] = second.claim(queryset)
+                LanguageCloudProject.objects.filter(claimed_by=second.owner).update(
+                    lc_project_id="done"
+                )
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(contend):
+            batch = first.claim(queryset)
+        self.assertEqual(
+            [project.lc_project_id for project in batch], ["proj2", "proj3"]
+        )
+
+        self.assertEqual(len(contended[0]), 2)
+        # the batches only run out once every project is claimed
+        self.assertEqual(
+            [
+                [project.lc_project_id for project in batch]
+                for batch in iter(partial(second.claim, queryset), [])
+            ],
+            [["proj4"]],
+        )
+        self.assertEqual(first.claim(queryset), [])
+
+    def test_only_projects_matching_the_queryset_are_claimed(self):
+        claims = self._claims()
+        batch = claims.claim(self.queryset.exclude(lc_project_id="proj0"))
+        self.assertEqual(
+            [project.lc_project_id for project in batch], ["proj1", "proj2"]
+        )
+
+    def test_released_projects_return_to_the_pool(self):
+        first = self._claims()
+        first.claim(self.queryset)
+        first.release()
+        self.assertEqual(len(self._claims().claim(self.queryset)), 2)
+
+    def test_expired_claims_return_to_the_pool(self):
+        first = self._claims()
+        first.claim(self.queryset)
+        LanguageCloudProject.objects.filter(claimed_by=first.owner).update(
+            claimed_until=timezone.now() - datetime.timedelta(seconds=1)
+        )
+        second = self._claims()
+        self.assertEqual(
+            [project.lc_project_id for project in second.claim(self.queryset)],
+            ["proj0", "proj1"],
+        )
+
+        # the crashed worker can't release the projects it lost
+        first.release()
+        self.assertEqual(
+            LanguageCloudProject.objects.filter(claimed_by=second.owner).count(), 2
+        )
+
+    def test_heartbeat_renews_claims(self):
+        claims = self._claims()
+        claims.claim(self.queryset)
+        expires_at = timezone.now() + datetime.timedelta(seconds=1)
+        LanguageCloudProject.objects.filter(claimed_by=claims.owner).update(
+            claimed_until=expires_at
+        )
+
+        self.clock.now += 59
+        claims.heartbeat()
+        self.assertEqual(
+            self.queryset.filter(claimed_by=claims.owner).first().claimed_until,
+            expires_at,
+        )
+
+        self.clock.now += 1
+        claims.heartbeat()
+        self.assertGreater(
+            self.queryset.filter(claimed_by=claims.owner).first().claimed_until,
+            timezone.now() + datetime.timedelta(seconds=590),
+        )
+
+
+class TestSyncManagerLock(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.logger = logging.getLogger(__name__)
+        logging.disable()  # supress log output under test
+
+    @patch("wagtail_localize_rws_languagecloud.sync.SyncManager._sync")
+    def test_sync_skips_when_another_sync_holds_the_lock(self, sync_mock):
+        lease = SyncLease()
+        lease.acquire()
+        manager = SyncManager(logger=self.logger)
+        self.assertTrue(manager.is_running())
+        self.assertFalse(manager.sync())
+        self.assertEqual(sync_mock.call_count, 0)
+        self.assertEqual(SyncRun.objects.get().status, SyncRun.STATUS_SKIPPED)
+
+        # retries share the skipped run
+        for _ in range(4):
+            self.assertFalse(manager.sync())
+        self.assertEqual(SyncRun.objects.get().status, SyncRun.STATUS_SKIPPED)
+
+    @patch("wagtail_localize_rws_languagecloud.sync.SyncManager._sync")
+    def test_sync_holds_the_lock_while_running(self, sync_mock):
+        manager = SyncManager(logger=self.logger)
+        states = []
+        sync_mock.side_effect = lambda *args, **kwargs: states.append(
+            manager.is_running()
+        )
+        self.assertTrue(manager.sync())
+        self.assertEqual(states, [True])
+        self.assertFalse(manager.is_running())
+
+    @patch("wagtail_localize_rws_languagecloud.sync.SyncManager._sync")
+    def test_parallel_syncs_exclude_other_syncs(self, sync_mock):
+        manager = SyncManager(logger=self.logger)
+        states = []
+
+        def sync(*args, **kwargs):
+            sync_mock.side_effect = None
+            states.append(
+                (
+                    manager.is_running(),
+                    SyncManager(logger=self.logger).sync(),
+                    SyncManager(logger=self.logger).sync(export_only=True),
+                    # ...but not the other workers
+                    SyncManager(logger=self.logger).sync(parallel=True),
+                )
+            )
+
+        sync_mock.side_effect = sync
+        self.assertTrue(manager.sync(parallel=True, import_only=True))
+        self.assertEqual(states, [(True, False, True, True)])
+        self.assertIsInstance(sync_mock.call_args.kwargs["claims"], ProjectClaims)
+        self.assertFalse(manager.is_running())
+
+        lease = SyncLease()
+        lease.acquire()
+        self.assertFalse(manager.sync(parallel=True))
+
+    @patch("wagtail_localize_rws_languagecloud.sync.SyncManager._sync")
+    def test_sync_stops_when_the_lock_is_lost(self, sync_mock):
+        sync_mock.side_effect = LeaseLost()
+        manager = SyncManager(logger=self.logger)
+        self.assertFalse(manager.sync())
+        self.assertFalse(manager.is_running())
+        self.assertEqual(SyncRun.objects.get().status, SyncRun.STATUS_STOPPED)
@@ -1,7 +1,9 @@
 import datetime
 import logging
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 
 try:
@@ -246,3 +248,194 @@ class TestLanguageCloudProject(TestCase):
         project = LanguageCloudProject(lc_project_status="some-unknown-value")
 
         self.assertEqual("some-unknown-value", project.lc_project_status_label)
+
+
+class TestLanguageCloudProjectFileCounts(TestCase):
+    def setUp(self):
+        self.locale_fr = Locale.objects.create(language_code="fr")
+        self.locale_de = Locale.objects.create(language_code="de")
+        _, source = create_test_page(
+            title="Test page",
+            slug="test-page",
+            test_charfield="Some test translatable content",
+        )
+        self.translation_fr = Translation.objects.create(
+            source=source, target_locale=self.locale_fr
+        )
+        self.translation_de = Translation.objects.create(
+            source=source, target_locale=self.locale_de
+        )
+        self.project = LanguageCloudProject.objects.create(
+            translation_source=source,
+            source_last_updated_at=source.last_updated_at,
+        )
+
+    def _counts(self):
+        return LanguageCloudProject.objects.values(
+            "files_total",
+            "files_created",
+            "files_imported",
+            "files_errored",
+            "files_exceeding_create_attempts",
+        ).get(pk=self.project.pk)
+
+    def test_counts_follow_file_changes(self):
+        file_fr = LanguageCloudFile.objects.create(
+            translation=self.translation_fr, project=self.project
+        )
+        file_de = LanguageCloudFile.objects.create(
+            translation=self.translation_de, project=self.project
+        )
+        self.assertEqual(self._counts()["files_total"], 2)
+        self.assertFalse(self.project.is_created)
+
+        file_fr.lc_source_file_id = "abc"
+        file_fr.internal_status = LanguageCloudFile.STATUS_IMPORTED
+        file_fr.save()
+        file_de.create_attempts = 3
+        file_de.internal_status = LanguageCloudFile.STATUS_ERROR
+        file_de.save()
+        self.assertEqual(
+            self._counts(),
+            {
+                "files_total": 2,
+                "files_created": 1,
+                "files_imported": 1,
+                "files_errored": 1,
+                "files_exceeding_create_attempts": 1,
+            },
+        )
+
+        file_de.delete()
+        self.assertEqual(
+            self._counts(),
+            {
+                "files_total": 1,
+                "files_created": 1,
+                "files_imported": 1,
+                "files_errored": 0,
+                "files_exceeding_create_attempts": 0,
+            },
+        )
+
+    def test_cached_project_counts_are_refreshed(self):
+        file_fr = LanguageCloudFile.objects.create(
+            translation=self.translation_fr, project=self.project
+        )
+        self.project.lc_project_id = "12345"
+        file_fr.lc_source_file_id = "abc"
+        file_fr.internal_status = LanguageCloudFile.STATUS_IMPORTED
+        file_fr.save()
+        self.assertTrue(self.project.is_created)
+        self.assertTrue(self.project.all_files_imported)
+
+    def test_project_save_doesnt_overwrite_counts(self):
+        stale_project = LanguageCloudProject.objects.get(pk=self.project.pk)
+        LanguageCloudFile.objects.create(
+            translation=self.translation_fr, project=self.project
+        )
+        stale_project.lc_project_id = "12345"
+        stale_project.save()
+        self.assertEqual(self._counts()["files_total"], 1)
+
+    def test_properties_dont_query_files(self):
+        LanguageCloudFile.objects.create(
+            translation=self.translation_fr,
+            project=self.project,
+            lc_source_file_id="abc",
+            internal_status=LanguageCloudFile.STATUS_IMPORTED,
+        )
+        project = LanguageCloudProject.objects.get(pk=self.project.pk)
+        project.lc_project_id = "12345"
+        with self.assertNumQueries(0):
+            self.assertTrue(project.is_created)
+            self.assertTrue(project.all_files_imported)
+
+    def test_refresh_file_counts(self):
+        LanguageCloudFile.objects.create(
+            translation=self.translation_fr, project=self.project
+        )
+        LanguageCloudProject.objects.update(files_total=0)
+        LanguageCloudProject.objects.all().refresh_file_counts()
+        self.assertEqual(self._counts()["files_total"], 1)
+
+
+def _writes(queries_context):
+    return [
+        query["sql"].split()[0]
+        for query in queries_context.captured_queries
+        if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+    ]
+
+
+class TestChangeTracking(TestCase):
+    def setUp(self):
+        locale_fr = Locale.objects.create(language_code="fr")
+        _, source = create_test_page(
+            title="Test page",
+            slug="test-page",
+            test_charfield="Some test translatable content",
+        )
+        self.translation = Translation.objects.create(
+            source=source, target_locale=locale_fr
+        )
+        project = LanguageCloudProject.objects.create(
+            translation_source=source,
+            source_last_updated_at=source.last_updated_at,
+        )
+        LanguageCloudFile.objects.create(translation=self.translation, project=project)
+        self.project = LanguageCloudProject.objects.get(pk=project.pk)
+        self.file = LanguageCloudFile.objects.get(project=project)
+
+    def test_new_instances_have_no_changed_fields(self):
+        self.assertIsNone(LanguageCloudProject().get_changed_fields())
+
+    def test_unchanged_instance_is_not_written(self):
+        self.project.lc_project_status = ""
+        self.assertEqual(self.project.get_changed_fields(), [])
+        with self.assertNumQueries(0):
+            self.assertFalse(self.project.save_changes())
+
+    def test_only_changed_fields_are_written(self):
+        self.project.lc_project_id = "12345"
+        self.project.lc_project_status = LanguageCloudStatus.CREATED
+        self.assertEqual(
+            self.project.get_changed_fields(), ["lc_project_id", "lc_project_status"]
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(self.project.save_changes())
+        self.assertEqual(_writes(ctx), ["UPDATE"])
+        self.assertEqual(self.project.get_changed_fields(), [])
+        self.assertEqual(
+            LanguageCloudProject.objects.get(pk=self.project.pk).lc_project_id,
+            "12345",
+        )
+
+    def test_refresh_from_db_resets_changes(self):
+        self.project.lc_project_id = "12345"
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.get_changed_fields(), [])
+
+    def test_refresh_from_db_of_some_fields_keeps_other_changes(self):
+        for args, kwargs in [
+            ((None, ["lc_project_id"]), {}),
+            ((), {"fields": ["lc_project_id"]}),
+        ]:
+            self.project.lc_project_id = "12345"
+            self.project.lc_project_status = LanguageCloudStatus.CREATED
+            self.project.refresh_from_db(*args, **kwargs)
+            self.assertEqual(self.project.lc_project_id, "")
+            self.assertEqual(self.project.get_changed_fields(), ["lc_project_status"])
+
+    def test_file_counters_are_only_refreshed_for_counted_fields(self):
+        self.file.revision = None
+        with CaptureQueriesContext(connection) as ctx:
+            self.file.save(update_fields=["revision"])
+        # no UPDATE of the project counters
+        self.assertEqual(_writes(ctx), ["UPDATE"])
+
+        self.file.internal_status = LanguageCloudFile.STATUS_IMPORTED
+        self.file.save_changes()
+        self.assertEqual(
+            LanguageCloudProject.objects.get(pk=self.project.pk).files_imported, 1
+        )
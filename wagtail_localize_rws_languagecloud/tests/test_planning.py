@@ -0,0 +1,135 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+try:
+    from wagtail.models import Locale
+except ImportError:
+    from wagtail.core.models import Locale
+
+from wagtail_localize.models import Translation
+
+from ..models import (
+    LanguageCloudFile,
+    LanguageCloudProject,
+    LanguageCloudStatus,
+    SyncRun,
+)
+from ..planning import get_recent_latencies, plan_sync
+from ..selection import ProjectSelection
+from .helpers import create_test_page, create_test_project_settings
+
+
+@patch("requests.Session.request", side_effect=AssertionError("no API calls"))
+class TestPlanSync(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        locale_fr = Locale.objects.create(language_code="fr")
+        locale_de = Locale.objects.create(language_code="de")
+
+        def create_source(i):
+            _, source = create_test_page(title=f"Test page {i}", slug=f"test-page-{i}")
+            translations = [
+                Translation.objects.create(source=source, target_locale=locale)
+                for locale in [locale_fr, locale_de]
+            ]
+            return source, translations
+
+        def create_project(i, lc_project_id="", status="", file_ids=("", "")):
+            source, translations = create_source(i)
+            project = LanguageCloudProject.objects.create(
+                translation_source=source,
+                source_last_updated_at=source.last_updated_at,
+                lc_project_id=lc_project_id,
+                lc_project_status=status,
+            )
+            create_test_project_settings(source, translations, lc_project=project)
+            for translation, file_id in zip(translations, file_ids):
+                LanguageCloudFile.objects.create(
+                    translation=translation, project=project, lc_source_file_id=file_id
+                )
+
+        # settings waiting for a project
+        source, translations = create_source(0)
+        create_test_project_settings(source, translations)
+        # a project waiting to be created in LanguageCloud
+        create_project(1)
+        # a project in progress, waiting for a poll
+        create_project(
+            2, "proj2", LanguageCloudStatus.IN_PROGRESS, file_ids=("f1", "f2")
+        )
+        # a project created in LanguageCloud, waiting to be started
+        create_project(3, "proj3", LanguageCloudStatus.CREATED, file_ids=("f3", "f4"))
+
+        SyncRun.objects.create(
+            api_calls=3,
+            api_stats={
+                "project": {"calls": 2, "seconds": 1},
+                "source_file": {"calls": 1, "seconds": 2},
+            },
+        )
+
+    def test_plan(self, request_mock):
+        plan = plan_sync(concurrency=2)
+
+        self.assertEqual(
+            dict(plan.counts),
+            {
+                "local_projects_to_create": 1,
+                "projects_to_create": 2,
+                "files_to_upload": 4,
+                "projects_to_start": 3,
+                "projects_to_poll": 2,
+                "projects_reported": 0,
+                "files_to_download": 2,
+            },
+        )
+        # listing, templates, 2 creates and 3 starts
+        self.assertEqual(plan.api_calls["project"], 7)
+        self.assertEqual(plan.api_calls["source_file"], 4)
+        # one listing and 2 downloads
+        self.assertEqual(plan.api_calls["target_file"], 3)
+        self.assertEqual(plan.total_api_calls, 15)
+        self.assertEqual(plan.unknown_latencies, ["auth", "target_file"])
+        # 7 project calls at 0.5s, then 4 uploads at 2s, 2 at a time
+        self.assertEqual(plan.estimated_seconds, 7.5)
+
+    def test_plan_import_only(self, request_mock):
+        plan = plan_sync(import_only=True)
+        self.assertEqual(
+            set(plan.counts),
+            {"projects_to_poll", "projects_reported", "files_to_download"},
+        )
+        self.assertEqual(plan.total_api_calls, 5)
+
+    def test_plan_selected_projects(self, request_mock):
+        plan = plan_sync(
+            export_only=True, selection=ProjectSelection(lc_project_ids=["proj3"])
+        )
+        self.assertEqual(plan.counts["projects_to_create"], 0)
+        self.assertEqual(plan.counts["files_to_upload"], 0)
+        self.assertEqual(plan.counts["projects_to_start"], 1)
+
+    def test_no_recent_runs(self, request_mock):
+        SyncRun.objects.all().delete()
+        self.assertEqual(get_recent_latencies(), {})
+        self.assertIsNone(plan_sync().estimated_seconds)
+
+    def test_command(self, request_mock):
+        stdout = StringIO()
+        with patch(
+            "wagtail_localize_rws_languagecloud.sync.SyncManager.sync"
+        ) as sync_mock:
+            call_command("sync_rws", "--plan", "--concurrency", "2", stdout=stdout)
+        self.assertFalse(sync_mock.called)
+        output = stdout.getvalue()
+        self.assertIn("Projects to create: 2 (1 from new project settings)", output)
+        self.assertIn("Target files to download: 2", output)
+        self.assertIn("API calls: 15", output)
+        self.assertIn("  project: 7, 0.500s per call", output)
+        self.assertIn(
+            "Estimated duration: 8s, not counting auth, target_file calls", output
+        )
@@ -0,0 +1,98 @@
+import datetime
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import LanguageCloudStatus
+from ..polling import get_next_poll_at
+
+
+@override_settings(
+    WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={
+        "MIN_POLL_INTERVAL": 600,
+        "MAX_POLL_INTERVAL": 24 * 60 * 60,
+    }
+)
+class TestGetNextPollAt(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+
+    def assertPollsIn(self, next_poll_at, **kwargs):
+        self.assertEqual(next_poll_at - self.now, datetime.timedelta(**kwargs))
+
+    def test_completed_and_unknown_statuses_poll_on_the_next_run(self):
+        for status in (LanguageCloudStatus.COMPLETED, ""):
+            self.assertPollsIn(
+                get_next_poll_at(
+                    status,
+                    self.now,
+                    status_changed_at=self.now - datetime.timedelta(days=30),
+                ),
+                minutes=10,
+            )
+
+    def test_recently_changed_status_polls_on_the_next_run(self):
+        self.assertPollsIn(
+            get_next_poll_at(LanguageCloudStatus.IN_PROGRESS, self.now), minutes=10
+        )
+        self.assertPollsIn(
+            get_next_poll_at(
+                LanguageCloudStatus.IN_PROGRESS,
+                self.now,
+                status_changed_at=self.now - datetime.timedelta(minutes=20),
+            ),
+            minutes=10,
+        )
+
+    def test_idle_projects_back_off(self):
+        self.assertPollsIn(
+            get_next_poll_at(
+                LanguageCloudStatus.IN_PROGRESS,
+                self.now,
+                status_changed_at=self.now - datetime.timedelta(hours=8),
+            ),
+            hours=2,
+        )
+        self.assertPollsIn(
+            get_next_poll_at(
+                LanguageCloudStatus.CREATED,
+                self.now,
+                status_changed_at=self.now - datetime.timedelta(days=60),
+            ),
+            hours=24,
+        )
+
+    def test_polls_tighten_near_the_due_date(self):
+        status_changed_at = self.now - datetime.timedelta(days=60)
+        self.assertPollsIn(
+            get_next_poll_at(
+                LanguageCloudStatus.IN_PROGRESS,
+                self.now,
+                status_changed_at=status_changed_at,
+                due_date=self.now + datetime.timedelta(hours=4),
+            ),
+            hours=1,
+        )
+        self.assertPollsIn(
+            get_next_poll_at(
+                LanguageCloudStatus.IN_PROGRESS,
+                self.now,
+                status_changed_at=status_changed_at,
+                due_date=self.now - datetime.timedelta(days=1),
+            ),
+            minutes=10,
+        )
+
+    @override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={})
+    def test_default_intervals(self):
+        self.assertPollsIn(
+            get_next_poll_at(LanguageCloudStatus.COMPLETED, self.now), minutes=10
+        )
+        self.assertPollsIn(
+            get_next_poll_at(
+                LanguageCloudStatus.IN_PROGRESS,
+                self.now,
+                status_changed_at=self.now - datetime.timedelta(days=60),
+            ),
+            hours=24,
+        )
@@ -0,0 +1,131 @@
+from django.test import TestCase, override_settings
+from freezegun import freeze_time
+
+from ..rate_limit import RateLimiter, TokenBucket, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def _bucket(self, **kwargs):
+        return TokenBucket(clock=self.clock, sleep=self.clock.sleep, **kwargs)
+
+    def test_unlimited_bucket_never_waits(self):
+        bucket = self._bucket()
+        for _ in range(100):
+            self.assertEqual(bucket.acquire(), 0)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_burst_is_allowed_without_waiting(self):
+        bucket = self._bucket(rate=1, burst=3)
+        for _ in range(3):
+            self.assertEqual(bucket.acquire(), 0)
+        self.assertEqual(bucket.acquire(), 1)
+        self.assertEqual(self.clock.sleeps, [1])
+
+    def test_requests_are_spaced_by_the_rate(self):
+        bucket = self._bucket(rate=4)
+        bucket.acquire()
+        self.assertEqual(bucket.acquire(), 0.25)
+        self.assertEqual(bucket.acquire(), 0.25)
+
+    def test_tokens_refill_over_time(self):
+        bucket = self._bucket(rate=1, burst=2)
+        bucket.acquire()
+        bucket.acquire()
+        self.clock.now += 2
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertEqual(bucket.acquire(), 0)
+
+    def test_throttle_blocks_and_halves_rate(self):
+        bucket = self._bucket(rate=4)
+        bucket.throttle(5)
+        self.assertEqual(bucket.rate, 2)
+        self.assertEqual(bucket.acquire(), 5)
+
+    def test_throttle_blocks_unlimited_bucket(self):
+        bucket = self._bucket()
+        bucket.throttle(3)
+        self.assertEqual(bucket.acquire(), 3)
+        self.assertEqual(bucket.acquire(), 0)
+
+    def test_rate_recovers_after_successes(self):
+        bucket = self._bucket(rate=20)
+        bucket.throttle(0)
+        self.assertEqual(bucket.rate, 10)
+        for _ in range(10):
+            bucket.succeed()
+        self.assertEqual(bucket.rate, 20)
+        bucket.succeed()
+        self.assertEqual(bucket.rate, 20)
+
+
+class TestRateLimiter(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_wait_time_is_tracked_per_family(self):
+        limiter = RateLimiter(
+            {"project": {"rate": 2}}, clock=self.clock, sleep=self.clock.sleep
+        )
+        limiter.wait("project")
+        limiter.wait("project")
+        limiter.wait("target_file")
+        self.assertEqual(limiter.wait_time["project"], 0.5)
+        self.assertEqual(limiter.wait_time["target_file"], 0)
+        self.assertEqual(limiter.total_wait_time, 0.5)
+
+    def test_throttled_uses_exponential_backoff_without_retry_after(self):
+        limiter = RateLimiter(clock=self.clock, sleep=self.clock.sleep)
+        self.assertEqual(limiter.throttled("auth", attempt=0), 1)
+        self.assertEqual(limiter.throttled("auth", attempt=2), 4)
+        self.assertEqual(limiter.throttled("auth", attempt=10), 60)
+        self.assertEqual(limiter.throttled("auth", retry_after=7), 7)
+        self.assertEqual(limiter.throttled_count["auth"], 4)
+
+    @override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={})
+    def test_from_settings_defaults_to_unlimited(self):
+        limiter = RateLimiter.from_settings()
+        for bucket in limiter.buckets.values():
+            self.assertIsNone(bucket.rate)
+
+    @override_settings(
+        WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={
+            "API_SLEEP_SECONDS": 5,
+            "RATE_LIMITS": {"target_file": {"rate": 10, "burst": 20}},
+        }
+    )
+    def test_from_settings(self):
+        limiter = RateLimiter.from_settings()
+        self.assertEqual(limiter.buckets["target_file"].rate, 10)
+        self.assertEqual(limiter.buckets["target_file"].burst, 20)
+        self.assertEqual(limiter.buckets["project"].rate, 0.2)
+        self.assertEqual(limiter.buckets["project"].burst, 1)
+
+
+class TestParseRetryAfter(TestCase):
+    def test_seconds(self):
+        self.assertEqual(parse_retry_after("120"), 120)
+
+    def test_missing_or_invalid(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+
+    @freeze_time("2022-01-01 12:00:00")
+    def test_http_date(self):
+        self.assertEqual(parse_retry_after("Sat, 01 Jan 2022 12:00:30 GMT"), 30)
+        self.assertEqual(parse_retry_after("Sat, 01 Jan 2022 11:00:00 GMT"), 0)
@@ -1,13 +1,23 @@
+import datetime
 import json
 
+from unittest.mock import Mock, patch
 from urllib.parse import parse_qs
 
 import responses
 
 from django.test import TestCase, override_settings
+from freezegun import freeze_time
 from requests.exceptions import RequestException
 
-from ..rws_client import ApiClient, NotAuthenticated, NotFound, rws_language_code
+from ..rate_limit import RateLimiter
+from ..rws_client import (
+    ApiClient,
+    NotAuthenticated,
+    NotFound,
+    get_session,
+    rws_language_code,
+)
 
 
 class TestApiClient(TestCase):
@@ -48,6 +58,100 @@ class TestApiClient(TestCase):
             "https://fakeapibase.example.com/",
         )
 
+    def test_clients_share_a_pooled_session(self):
+        self.assertIs(ApiClient().session, ApiClient().session)
+        self.assertIs(ApiClient().session, get_session())
+
+    @override_settings(
+        WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={"POOL_CONNECTIONS": 2, "POOL_MAXSIZE": 20},
+    )
+    def test_session_pool_uses_settings(self):
+        adapter = ApiClient().session.get_adapter(
+            "https://lc-api.sdl.com/public-api/v1"
+        )
+        self.assertEqual(adapter._pool_connections, 2)
+        self.assertEqual(adapter._pool_maxsize, 20)
+
+    @override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={"KEEP_ALIVE": False})
+    def test_session_without_keep_alive(self):
+        self.assertEqual(ApiClient().session.headers["Connection"], "close")
+
+    def test_init_with_session(self):
+        session = Mock()
+        self.assertIs(ApiClient(session=session).session, session)
+
+    @responses.activate
+    def test_requests_are_sent_through_the_session(self):
+        responses.add(
+            responses.GET,
+            "https://lc-api.sdl.com/public-api/v1/projects/fakeproject",
+            json={"id": "123456", "status": "inProgress"},
+            status=200,
+        )
+        session = get_session()
+        client = ApiClient(session=session)
+
+        # fake the auth step
+        client.is_authenticated = True
+        client.headers = {}
+
+        with patch.object(session, "request", wraps=session.request) as session_request:
+            client.get_project("fakeproject")
+        self.assertEqual(session_request.call_count, 1)
+
+    @responses.activate
+    def test_throttled_request_is_retried_after_retry_after(self):
+        responses.add(
+            responses.GET,
+            "https://lc-api.sdl.com/public-api/v1/projects/fakeproject",
+            status=429,
+            headers={"Retry-After": "2"},
+        )
+        responses.add(
+            responses.GET,
+            "https://lc-api.sdl.com/public-api/v1/projects/fakeproject",
+            json={"id": "123456", "status": "inProgress"},
+            status=200,
+        )
+        sleep = Mock()
+        client = ApiClient(logger=Mock(), rate_limiter=RateLimiter(sleep=sleep))
+
+        # fake the auth step
+        client.is_authenticated = True
+        client.headers = {}
+
+        resp = client.get_project("fakeproject")
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(resp, {"id": "123456", "status": "inProgress"})
+        self.assertEqual(sleep.call_count, 1)
+        self.assertAlmostEqual(sleep.call_args[0][0], 2, places=1)
+        self.assertEqual(client.rate_limiter.throttled_count["project"], 1)
+        self.assertGreater(client.rate_limiter.wait_time["project"], 0)
+        # both attempts are recorded
+        self.assertEqual(client.stats.as_dict()["project"]["calls"], 2)
+        self.assertEqual(
+            client.stats.total("bytes_received"),
+            len(b'{"id": "123456", "status": "inProgress"}'),
+        )
+
+    @override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={"RATE_LIMIT_MAX_RETRIES": 1})
+    @responses.activate
+    def test_throttled_request_gives_up_after_max_retries(self):
+        responses.add(
+            responses.GET,
+            "https://lc-api.sdl.com/public-api/v1/projects/fakeproject",
+            status=429,
+        )
+        client = ApiClient(logger=Mock(), rate_limiter=RateLimiter(sleep=Mock()))
+
+        # fake the auth step
+        client.is_authenticated = True
+        client.headers = {}
+
+        with self.assertRaises(RequestException):
+            client.get_project("fakeproject")
+        self.assertEqual(len(responses.calls), 2)
+
     @override_settings(
         WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={
             "CLIENT_ID": "fakeid",
@@ -106,6 +210,134 @@ class TestApiClient(TestCase):
             client.authenticate()
         self.assertEqual(len(responses.calls), 1)
 
+    @override_settings(
+        WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={
+            "CLIENT_ID": "fakeid",
+            "CLIENT_SECRET": "fakesecret",
+            "ACCOUNT_ID": "fakeaccount",
+        },
+    )
+    @responses.activate
+    def test_authenticate_reuses_cached_token(self):
+        responses.add(
+            responses.POST,
+            "https://sdl-prod.eu.auth0.com/oauth/token",
+            json={"access_token": "abc123", "expires_in": 86400},
+            status=200,
+        )
+        ApiClient().authenticate()
+        client = ApiClient()
+        client.authenticate()
+
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(client.token, "abc123")
+        self.assertEqual(client.headers["Authorization"], "Bearer abc123")
+
+        client.authenticate(force=True)
+        self.assertEqual(len(responses.calls), 2)
+
+    @override_settings(
+        WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={
+            "CLIENT_ID": "fakeid",
+            "CLIENT_SECRET": "fakesecret",
+            "ACCOUNT_ID": "fakeaccount",
+        },
+    )
+    @responses.activate
+    def test_authenticate_refreshes_token_before_it_expires(self):
+        responses.add(
+            responses.POST,
+            "https://sdl-prod.eu.auth0.com/oauth/token",
+            json={"access_token": "abc123", "expires_in": 3600},
+            status=200,
+        )
+        with freeze_time("2022-01-01 12:00:00") as frozen_time:
+            ApiClient().authenticate()
+            frozen_time.tick(datetime.timedelta(minutes=50))
+            ApiClient().authenticate()
+            self.assertEqual(len(responses.calls), 1)
+
+            # within 5 minutes of the expiry
+            frozen_time.tick(datetime.timedelta(minutes=6))
+            ApiClient().authenticate()
+            self.assertEqual(len(responses.calls), 2)
+
+    @override_settings(
+        WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={
+            "CLIENT_ID": "fakeid",
+            "CLIENT_SECRET": "fakesecret",
+            "ACCOUNT_ID": "fakeaccount",
+        },
+    )
+    @responses.activate
+    def test_rejected_token_is_refreshed_once(self):
+        responses.add(
+            responses.POST,
+            "https://sdl-prod.eu.auth0.com/oauth/token",
+            json={"access_token": "abc123", "expires_in": 86400},
+            status=200,
+        )
+        responses.add(
+            responses.POST,
+            "https://sdl-prod.eu.auth0.com/oauth/token",
+            json={"access_token": "def456", "expires_in": 86400},
+            status=200,
+        )
+        responses.add(
+            responses.GET,
+            "https://lc-api.sdl.com/public-api/v1/projects/fakeproject",
+            status=401,
+        )
+        responses.add(
+            responses.GET,
+            "https://lc-api.sdl.com/public-api/v1/projects/fakeproject",
+            json={"id": "123456", "status": "inProgress"},
+            status=200,
+        )
+        client = ApiClient()
+        client.authenticate()
+
+        resp = client.get_project("fakeproject")
+        self.assertEqual(resp, {"id": "123456", "status": "inProgress"})
+        self.assertEqual(len(responses.calls), 4)
+        self.assertEqual(
+            responses.calls[3].request.headers["Authorization"], "Bearer def456"
+        )
+
+        # the refreshed token is shared with new clients
+        client = ApiClient()
+        client.authenticate()
+        self.assertEqual(client.token, "def456")
+        self.assertEqual(len(responses.calls), 4)
+
+    @override_settings(
+        WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={
+            "CLIENT_ID": "fakeid",
+            "CLIENT_SECRET": "fakesecret",
+            "ACCOUNT_ID": "fakeaccount",
+        },
+    )
+    @responses.activate
+    def test_rejected_token_is_not_refreshed_twice(self):
+        responses.add(
+            responses.POST,
+            "https://sdl-prod.eu.auth0.com/oauth/token",
+            json={"access_token": "abc123", "expires_in": 86400},
+            status=200,
+        )
+        responses.add(
+            responses.GET,
+            "https://lc-api.sdl.com/public-api/v1/projects/fakeproject",
+            status=401,
+        )
+        client = ApiClient()
+        client.authenticate()
+
+        with self.assertRaises(RequestException):
+            client.get_project("fakeproject")
+        # auth, get, re-auth, get
+        self.assertEqual(len(responses.calls), 4)
+
     def test_create_project_not_authenticated(self):
         client = ApiClient()
         with self.assertRaises(NotAuthenticated):
@@ -268,6 +500,28 @@ class TestApiClient(TestCase):
         # TODO: assert POST body/files contents
         self.assertEqual(resp, {"id": "123456"})
 
+    @responses.activate
+    def test_create_source_file_with_many_target_locales(self):
+        responses.add(
+            responses.POST,
+            "https://lc-api.sdl.com/public-api/v1/projects/fakeproject/source-files",
+            json={"id": "123456"},
+            status=200,
+        )
+        client = ApiClient()
+
+        # fake the auth step
+        client.is_authenticated = True
+        client.headers = {}
+
+        resp = client.create_source_file(
+            "fakeproject", "fakepo", "fakefilename.po", "en-US", ["fr-CA", "de-DE"]
+        )
+        self.assertEqual(len(responses.calls), 1)
+        request_body = responses.calls[0].request.body.decode("utf-8")
+        self.assertIn('"targetLanguages": ["fr-CA", "de-DE"]', request_body)
+        self.assertEqual(resp, {"id": "123456"})
+
     @responses.activate
     def test_create_source_file_fail(self):
         responses.add(
@@ -492,6 +746,190 @@ class TestApiClient(TestCase):
             client.download_target_file("fakeproject", "faketargetfile")
         self.assertEqual(len(responses.calls), 2)
 
+    @responses.activate
+    def test_list_project_statuses_follows_pagination(self):
+        url = "https://lc-api.sdl.com/public-api/v1/projects"
+        responses.add(
+            responses.GET,
+            url,
+            match=[
+                responses.matchers.query_param_matcher(
+                    {"fields": "id,status", "top": "100", "skip": "0"}
+                )
+            ],
+            json={
+                "items": [
+                    {"id": f"proj{i}", "status": "inProgress"} for i in range(100)
+                ],
+                "itemCount": 101,
+            },
+        )
+        responses.add(
+            responses.GET,
+            url,
+            match=[
+                responses.matchers.query_param_matcher(
+                    {"fields": "id,status", "top": "100", "skip": "100"}
+                )
+            ],
+            json={
+                "items": [{"id": "proj100", "status": "completed"}],
+                "itemCount": 101,
+            },
+        )
+        client = ApiClient()
+
+        # fake the auth step
+        client.is_authenticated = True
+        client.headers = {}
+
+        statuses = client.list_project_statuses()
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(len(statuses), 101)
+        self.assertEqual(statuses["proj0"], "inProgress")
+        self.assertEqual(statuses["proj100"], "completed")
+
+    def test_list_project_statuses_requires_auth(self):
+        with self.assertRaises(NotAuthenticated):
+            ApiClient().list_project_statuses()
+
+    @responses.activate
+    def test_list_target_files_follows_pagination(self):
+        def target_file(id_, source_file_id, type_="native"):
+            return {
+                "id": id_,
+                "latestVersion": {"id": f"v{id_}", "type": type_},
+                "sourceFile": {"id": source_file_id, "role": "translatable"},
+            }
+
+        url = "https://lc-api.sdl.com/public-api/v1/projects/fakeproject/target-files"
+        responses.add(
+            responses.GET,
+            url,
+            match=[
+                responses.matchers.query_param_matcher(
+                    {
+                        "fields": "sourceFile,latestVersion,languageDirection",
+                        "top": "100",
+                        "skip": "0",
+                    }
+                )
+            ],
+            json={
+                "items": [target_file(str(i), f"source{i}") for i in range(100)],
+                "itemCount": 102,
+            },
+        )
+        responses.add(
+            responses.GET,
+            url,
+            match=[
+                responses.matchers.query_param_matcher(
+                    {
+                        "fields": "sourceFile,latestVersion,languageDirection",
+                        "top": "100",
+                        "skip": "100",
+                    }
+                )
+            ],
+            json={
+                "items": [
+                    target_file("100", "source0", type_="bcm"),
+                    target_file("101", "source1"),
+                ],
+                "itemCount": 102,
+            },
+        )
+        client = ApiClient()
+
+        # fake the auth step
+        client.is_authenticated = True
+        client.headers = {}
+
+        target_files = client.list_target_files("fakeproject")
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(len(target_files), 100)
+        self.assertEqual(target_files["source0"], [target_file("0", "source0")])
+        self.assertEqual(
+            target_files["source1"],
+            [target_file("1", "source1"), target_file("101", "source1")],
+        )
+
+    @responses.activate
+    def test_download_target_file_with_target_files(self):
+        responses.add(
+            responses.GET,
+            "https://lc-api.sdl.com/public-api/v1/projects/fakeproject/target-files/12345/versions/678910/download",
+            body='msgid ""...',
+            status=200,
+        )
+        client = ApiClient()
+
+        # fake the auth step
+        client.is_authenticated = True
+        client.headers = {}
+
+        resp = client.download_target_file(
+            "fakeproject",
+            "faketargetfile",
+            target_files={
+                "faketargetfile": [
+                    {
+                        "id": "12345",
+                        "latestVersion": {"id": "678910", "type": "native"},
+                        "sourceFile": {"id": "faketargetfile"},
+                    }
+                ]
+            },
+        )
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(resp, 'msgid ""...')
+
+    @override_settings(
+        WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={"LANGUAGE_CODE_MAP": {"de": "de-DE"}}
+    )
+    @responses.activate
+    def test_download_target_file_for_target_locale(self):
+        responses.add(
+            responses.GET,
+            "https://lc-api.sdl.com/public-api/v1/projects/fakeproject/target-files/2/versions/v2/download",
+            body='msgid ""...',
+            status=200,
+        )
+        client = ApiClient()
+
+        # fake the auth step
+        client.is_authenticated = True
+        client.headers = {}
+
+        target_files = {
+            "fakesourcefile": [
+                {
+                    "id": id_,
+                    "latestVersion": {"id": f"v{id_}", "type": "native"},
+                    "sourceFile": {"id": "fakesourcefile"},
+                    "languageDirection": {"targetLanguage": {"languageCode": code}},
+                }
+                for id_, code in [("1", "fr-FR"), ("2", "de-DE")]
+            ]
+        }
+        resp = client.download_target_file(
+            "fakeproject",
+            "fakesourcefile",
+            target_files=target_files,
+            target_locale="de",
+        )
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(resp, 'msgid ""...')
+
+        with self.assertRaises(NotFound):
+            client.download_target_file(
+                "fakeproject",
+                "fakesourcefile",
+                target_files=target_files,
+                target_locale="es",
+            )
+
     @responses.activate
     def test_get_project_templates_success(self):
         responses.add(
@@ -0,0 +1,110 @@
+from django.test import TestCase
+
+
+try:
+    from wagtail.models import Locale
+except ImportError:
+    from wagtail.core.models import Locale
+
+from wagtail_localize.models import Translation
+
+from ..models import (
+    LanguageCloudFile,
+    LanguageCloudProject,
+    LanguageCloudProjectSettings,
+)
+from ..selection import ProjectSelection
+from ..sharding import Shard
+from .helpers import create_test_page, create_test_project_settings
+
+
+class TestProjectSelection(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        locale_fr = Locale.objects.create(language_code="fr")
+        locale_de = Locale.objects.create(language_code="de")
+        cls.projects = []
+        cls.settings = []
+        for i, locales in enumerate([[locale_fr], [locale_de], [locale_fr, locale_de]]):
+            _, source = create_test_page(title=f"Test page {i}", slug=f"test-page-{i}")
+            translations = [
+                Translation.objects.create(source=source, target_locale=locale)
+                for locale in locales
+            ]
+            project_settings, _ = create_test_project_settings(source, translations)
+            cls.settings.append(project_settings)
+            project = LanguageCloudProject.objects.create(
+                translation_source=source,
+                source_last_updated_at=source.last_updated_at,
+                lc_project_id=f"proj{i}",
+            )
+            for translation in translations:
+                LanguageCloudFile.objects.create(
+                    translation=translation, project=project
+                )
+            cls.projects.append(project)
+
+    def assertSelects(self, selection, projects, settings):
+        self.assertEqual(
+            list(
+                selection.filter_projects(LanguageCloudProject.objects.order_by("pk"))
+            ),
+            projects,
+        )
+        self.assertEqual(
+            list(
+                selection.filter_settings(
+                    LanguageCloudProjectSettings.objects.order_by("pk")
+                )
+            ),
+            settings,
+        )
+
+    def test_everything(self):
+        selection = ProjectSelection()
+        self.assertFalse(selection.is_partial)
+        self.assertSelects(selection, self.projects, self.settings)
+
+    def test_locales(self):
+        selection = ProjectSelection(locales=["fr"])
+        self.assertTrue(selection.is_partial)
+        self.assertSelects(
+            selection,
+            [self.projects[0], self.projects[2]],
+            [self.settings[0], self.settings[2]],
+        )
+
+    def test_ids(self):
+        self.assertSelects(
+            ProjectSelection(project_ids=[self.projects[1].pk]), [self.projects[1]], []
+        )
+        self.assertSelects(
+            ProjectSelection(lc_project_ids=["proj0", "proj2"]),
+            [self.projects[0], self.projects[2]],
+            [],
+        )
+
+    def test_criteria_are_combined(self):
+        shard = Shard(self.projects[2].translation_source_id % 2, 2)
+        selection = ProjectSelection(
+            shard=shard, lc_project_ids=["proj1", "proj2"], locales=["fr"]
+        )
+        self.assertSelects(selection, [self.projects[2]], [])
+
+    def test_shard(self):
+        for index in range(2):
+            selection = ProjectSelection(shard=Shard(index, 2))
+            self.assertFalse(selection.is_partial)
+            self.assertSelects(
+                selection,
+                [
+                    project
+                    for project in self.projects
+                    if project.translation_source_id % 2 == index
+                ],
+                [
+                    settings
+                    for settings in self.settings
+                    if settings.translation_source_id % 2 == index
+                ],
+            )
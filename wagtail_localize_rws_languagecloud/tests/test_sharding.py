@@ -0,0 +1,233 @@
+import logging
+
+from collections import Counter
+from unittest.mock import Mock, patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+
+try:
+    from wagtail.models import Locale
+except ImportError:
+    from wagtail.core.models import Locale
+
+from wagtail_localize.models import Translation
+
+from ..locking import SyncLease
+from ..models import (
+    LanguageCloudFile,
+    LanguageCloudProject,
+    LanguageCloudProjectSettings,
+    LanguageCloudStatus,
+    SyncRun,
+)
+from ..rws_client import ApiClient
+from ..sharding import Shard
+from ..sync import SyncManager
+from .helpers import create_test_page, create_test_po, create_test_project_settings
+
+
+class TestShard(TestCase):
+    def test_parse(self):
+        self.assertEqual(Shard.parse("1/4"), Shard(1, 4))
+        for value in ["4/4", "-1/4", "0/0", "1", "1/2/3", "a/b"]:
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                Shard.parse(value)
+
+    def test_shards_partition_the_queryset(self):
+        _, source = create_test_page(title="Test page", slug="test-page")
+        for _ in range(7):
+            LanguageCloudProject.objects.create(
+                translation_source=source, source_last_updated_at=timezone.now()
+            )
+        all_pks = set(LanguageCloudProject.objects.values_list("pk", flat=True))
+
+        for count in range(1, 5):
+            pks = Counter(
+                pk
+                for index in range(count)
+                for pk in Shard(index, count)
+                .filter(LanguageCloudProject.objects.all())
+                .values_list("pk", flat=True)
+            )
+            self.assertEqual(set(pks), all_pks)
+            self.assertEqual(set(pks.values()), {1})
+
+
+class FakeLanguageCloud:
+    """
+    Stands in for the LanguageCloud API, recording the calls that act on a
+    single project
+    """
+
+    def __init__(self, po_files):
+        self.po_files = po_files
+        self.project_ids = {}
+        self.statuses = {}
+        self.calls = Counter()
+
+    def get_project_templates(self, should_sleep=True):
+        return {"items": [], "itemCount": 0}
+
+    def create_project(self, name, *args):
+        self.calls["create_project", name] += 1
+        project_id = f"proj-{name}"
+        self.project_ids[project_id] = name
+        self.statuses[project_id] = LanguageCloudStatus.CREATED
+        return {"id": project_id}
+
+    def create_source_file(
+        self, project_id, po_file, filename, source_locale, target_locale
+    ):
+        self.calls["create_source_file", project_id] += 1
+        return {"id": f"file-{project_id}"}
+
+    def start_project(self, project_id):
+        self.calls["start_project", project_id] += 1
+        self.statuses[project_id] = LanguageCloudStatus.IN_PROGRESS
+
+    def complete_all(self):
+        for project_id in self.statuses:
+            self.statuses[project_id] = LanguageCloudStatus.COMPLETED
+
+    def list_project_statuses(self):
+        return dict(self.statuses)
+
+    def get_project(self, project_id):
+        return {"status": self.statuses[project_id]}
+
+    def list_target_files(self, project_id):
+        self.calls["list_target_files", project_id] += 1
+        return {}
+
+    def download_target_file(
+        self, project_id, source_file_id, target_files=None, target_locale=None
+    ):
+        self.calls["download_target_file", project_id] += 1
+        return str(self.po_files[self.project_ids[project_id]])
+
+    def complete_project(self, project_id):
+        self.calls["complete_project", project_id] += 1
+
+
+@override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={"LOCATION_ID": "1"})
+class TestShardedSync(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        locale_fr = Locale.objects.create(language_code="fr")
+        cls.po_files = {}
+        for i in range(7):
+            content = f"Some test translatable content {i}"
+            _, source = create_test_page(
+                title=f"Test page {i}", slug=f"test-page-{i}", test_charfield=content
+            )
+            translation = Translation.objects.create(
+                source=source, target_locale=locale_fr
+            )
+            create_test_project_settings(source, [translation], name=f"project{i}")
+            # the name of the project created for the settings
+            cls.po_files[f"project{i}_Test page {i}"] = create_test_po(
+                [("test_charfield", content, f"Contenu traduisible {i}")]
+            )
+        logging.disable()  # supress log output under test
+
+    def sync_shards(self, api, count):
+        """
+        Syncs each of `count` shards, interleaving their work. The first call
+        a shard makes about a single project starts the sync of the next
+        shard, which runs to completion before the call goes through. By
+        then, the shard making the call has already fetched the projects it
+        works on, and carries on with them once the next shard is done.
+        """
+        pending = [Shard(index, count) for index in range(1, count)]
+
+        def hand_off(method):
+            def call(*args, **kwargs):
+                if pending:
+                    self.assertTrue(SyncManager().sync(shard=pending.pop(0)))
+                return method(*args, **kwargs)
+
+            return call
+
+        methods = {
+            name: Mock(side_effect=getattr(api, name))
+            for name in [
+                "get_project_templates",
+                "create_source_file",
+                "list_project_statuses",
+                "get_project",
+                "download_target_file",
+            ]
+        }
+        # the calls made from the main thread, where the next sync can run
+        methods.update(
+            {
+                name: Mock(side_effect=hand_off(getattr(api, name)))
+                for name in [
+                    "create_project",
+                    "start_project",
+                    "list_target_files",
+                    "complete_project",
+                ]
+            }
+        )
+        with patch.multiple(ApiClient, authenticate=Mock(), **methods):
+            self.assertTrue(SyncManager().sync(shard=Shard(0, count)))
+        self.assertEqual(pending, [])
+
+    def test_shards_dont_do_the_same_work_twice(self):
+        api = FakeLanguageCloud(self.po_files)
+
+        # create and start the projects...
+        self.sync_shards(api, 3)
+        # ...then import them once they're complete
+        api.complete_all()
+        self.sync_shards(api, 3)
+
+        self.assertEqual(
+            set(SyncRun.objects.values_list("status", flat=True)),
+            {SyncRun.STATUS_FINISHED},
+        )
+        self.assertEqual(SyncRun.objects.count(), 6)
+        self.assertEqual(set(api.calls.values()), {1})
+        self.assertEqual(
+            Counter(method for method, _ in api.calls),
+            {
+                "create_project": 7,
+                "create_source_file": 7,
+                "start_project": 7,
+                "list_target_files": 7,
+                "download_target_file": 7,
+            },
+        )
+        self.assertEqual(LanguageCloudProjectSettings.objects.count(), 7)
+        self.assertEqual(
+            LanguageCloudProject.objects.filter(
+                internal_status=LanguageCloudProject.STATUS_IMPORTED
+            ).count(),
+            7,
+        )
+        self.assertEqual(
+            LanguageCloudFile.objects.filter(
+                internal_status=LanguageCloudFile.STATUS_IMPORTED
+            ).count(),
+            7,
+        )
+
+    def test_shards_have_their_own_lock(self):
+        lease = SyncLease("sync-shard-0-2", shard=Shard(0, 2))
+        self.assertTrue(lease.acquire())
+        with patch.object(ApiClient, "authenticate"), patch(
+            "wagtail_localize_rws_languagecloud.sync._import"
+        ), patch("wagtail_localize_rws_languagecloud.sync._export"):
+            self.assertFalse(SyncManager().sync(shard=Shard(0, 2)))
+            self.assertTrue(SyncManager().sync(shard=Shard(1, 2)))
+            # their projects overlap those of the shard
+            self.assertFalse(SyncManager().sync())
+            self.assertFalse(SyncManager().sync(shard=Shard(1, 3)))
+
+            lease.release()
+            lease = SyncLease()
+            self.assertTrue(lease.acquire())
+            self.assertFalse(SyncManager().sync(shard=Shard(0, 2)))
@@ -66,6 +66,8 @@ class TestSignals(TestCase):
         )
         client.download_target_file = Mock(side_effect=[str(self.po_file)], spec=True)
         client.complete_project = Mock(spec=True)
+        client.list_project_statuses = Mock(return_value={}, spec=True)
+        client.list_target_files = Mock(return_value={}, spec=True)
 
         # Run sync import
         sync._import(client, self.logger)
@@ -0,0 +1,71 @@
+import logging
+
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import Mock
+
+from ..stats import ApiStats, FailureCountingLogger, PhaseTimer
+
+
+class TestPhaseTimer(TestCase):
+    def test_phases_add_up(self):
+        clock = Mock(side_effect=[0, 2, 10, 11.5])
+        timer = PhaseTimer(clock=clock)
+        with timer.phase("import"):
+            pass
+        with timer.phase("import"):
+            pass
+        self.assertEqual(timer.durations, {"import": 3.5})
+
+    def test_failed_phases_are_timed(self):
+        timer = PhaseTimer(clock=Mock(side_effect=[0, 1]))
+        with self.assertRaises(ValueError), timer.phase("upload"):
+            raise ValueError
+        self.assertEqual(timer.durations, {"upload": 1})
+
+
+class TestApiStats(TestCase):
+    def test_record(self):
+        stats = ApiStats()
+        upload = SimpleNamespace(
+            request=SimpleNamespace(body=b"po file"), content=b'{"id": "1"}'
+        )
+        download = SimpleNamespace(
+            request=SimpleNamespace(body=None), content=b"target file"
+        )
+        stats.record("source_file", upload, 0.25)
+        stats.record("target_file", download, 0.5)
+        stats.record("target_file", download, 0.5)
+
+        self.assertEqual(
+            stats.as_dict(),
+            {
+                "source_file": {
+                    "calls": 1,
+                    "bytes_sent": 7,
+                    "bytes_received": 11,
+                    "seconds": 0.25,
+                },
+                "target_file": {
+                    "calls": 2,
+                    "bytes_sent": 0,
+                    "bytes_received": 22,
+                    "seconds": 1,
+                },
+            },
+        )
+        self.assertEqual(stats.total("calls"), 3)
+        self.assertEqual(stats.total("bytes_received"), 33)
+
+
+class TestFailureCountingLogger(TestCase):
+    def test_counts_errors(self):
+        logger = FailureCountingLogger(logging.getLogger(__name__))
+        logger.info("Created project")
+        logger.warning("Throttled by LanguageCloud")
+        logger.error("Failed to create project")
+        try:
+            raise ValueError
+        except ValueError:
+            logger.exception("Failed to process project")
+        self.assertEqual(logger.failures, 2)
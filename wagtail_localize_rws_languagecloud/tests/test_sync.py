@@ -1,8 +1,14 @@
+import datetime
 import logging
 
-from unittest.mock import Mock
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
 
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from requests.exceptions import RequestException
 
 
@@ -13,10 +19,20 @@ except ImportError:
 
 import wagtail_localize_rws_languagecloud.sync as sync
 
-from wagtail_localize.models import Translation
-
-from ..models import LanguageCloudFile, LanguageCloudProject, LanguageCloudStatus
+from wagtail_localize.models import Translation, TranslationSource
+
+from ..budget import BudgetExhausted, SyncBudget
+from ..locking import LeaseLost, ProjectClaims, SyncLease
+from ..models import (
+    LanguageCloudFile,
+    LanguageCloudProject,
+    LanguageCloudStatus,
+    SyncCheckpoint,
+    SyncRun,
+)
 from ..rws_client import ApiClient
+from ..sharding import Shard
+from ..sync import SyncManager
 from .helpers import create_test_page, create_test_po, create_test_project_settings
 
 
@@ -79,6 +95,8 @@ class TestImport(TestCase):
             side_effect=[str(self.po_files[0]), str(self.po_files[1])], spec=True
         )
         client.complete_project = Mock(spec=True)
+        client.list_project_statuses = Mock(return_value={}, spec=True)
+        client.list_target_files = Mock(return_value={}, spec=True)
         sync._import(client, self.logger)
         self.assertEqual(client.get_project.call_count, 2)
         self.assertEqual(client.download_target_file.call_count, 2)
@@ -92,6 +110,79 @@ class TestImport(TestCase):
             self.assertEqual(file_.internal_status, LanguageCloudFile.STATUS_IMPORTED)
             self.assertEqual(file_.combined_status, "Translations ready for review")
 
+    def test_import_lists_target_files_once_per_project(self):
+        client = ApiClient()
+        client.is_authorized = True
+        client.get_project = Mock(
+            side_effect=[{"status": "inProgress"}, {"status": "inProgress"}],
+            spec=True,
+        )
+        target_files = {"file0": [{"id": "tf0"}]}
+        client.list_project_statuses = Mock(return_value={}, spec=True)
+        client.list_target_files = Mock(return_value=target_files, spec=True)
+        client.download_target_file = Mock(
+            side_effect=[str(self.po_files[0]), str(self.po_files[1])], spec=True
+        )
+        client.complete_project = Mock(spec=True)
+        sync._import(client, self.logger)
+
+        self.assertEqual(client.list_target_files.call_count, 2)
+        client.list_target_files.assert_any_call("proj0")
+        client.list_target_files.assert_any_call("proj1")
+        client.download_target_file.assert_any_call(
+            "proj0", "file0", target_files=target_files, target_locale="fr"
+        )
+
+    @override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={"SYNC_CHUNK_SIZE": 1})
+    def test_import_processes_projects_in_chunks(self):
+        client = ApiClient()
+        client.is_authorized = True
+        client.list_project_statuses = Mock(
+            return_value={"proj0": "inProgress", "proj1": "inProgress"}, spec=True
+        )
+        client.list_target_files = Mock(return_value={}, spec=True)
+        client.download_target_file = Mock(
+            side_effect=[str(self.po_files[0]), str(self.po_files[1])], spec=True
+        )
+        client.complete_project = Mock(spec=True)
+        with CaptureQueriesContext(connection) as ctx:
+            sync._import(client, self.logger)
+
+        # the project statuses are still only listed once
+        self.assertEqual(client.list_project_statuses.call_count, 1)
+        self.assertEqual(client.complete_project.call_count, 2)
+        project_selects = [
+            query
+            for query in ctx.captured_queries
+            if query["sql"].startswith("SELECT") and '"next_poll_at" <=' in query["sql"]
+        ]
+        # one query per chunk, the last one finding no more projects
+        self.assertEqual(len(project_selects), 3)
+        self.assertNotIn('"id" >', project_selects[0]["sql"])
+        self.assertIn('"id" >', project_selects[1]["sql"])
+
+    def test_import_list_target_files_fails(self):
+        client = ApiClient()
+        client.is_authorized = True
+        client.get_project = Mock(
+            side_effect=[{"status": "inProgress"}, {"status": "inProgress"}],
+            spec=True,
+        )
+        client.list_project_statuses = Mock(return_value={}, spec=True)
+        client.list_target_files = Mock(
+            side_effect=[RequestException("oh no"), {}], spec=True
+        )
+        client.download_target_file = Mock(
+            side_effect=[str(self.po_files[1])], spec=True
+        )
+        client.complete_project = Mock(spec=True)
+        sync._import(client, self.logger)
+
+        self.assertEqual(client.download_target_file.call_count, 1)
+        self.assertEqual(client.complete_project.call_count, 1)
+        self.lc_files[0].refresh_from_db()
+        self.assertEqual(self.lc_files[0].internal_status, LanguageCloudFile.STATUS_NEW)
+
     def test_import_all_get_project_calls_fail(self):
         client = ApiClient()
         client.is_authorized = True
@@ -100,6 +191,8 @@ class TestImport(TestCase):
             side_effect=ValueError("this should never be called"), spec=True
         )
         client.complete_project = Mock(spec=True)
+        client.list_project_statuses = Mock(return_value={}, spec=True)
+        client.list_target_files = Mock(return_value={}, spec=True)
         sync._import(client, self.logger)
         self.assertEqual(client.get_project.call_count, 2)
         self.assertEqual(client.download_target_file.call_count, 0)
@@ -124,6 +217,8 @@ class TestImport(TestCase):
             side_effect=[str(self.po_files[0]), str(self.po_files[1])], spec=True
         )
         client.complete_project = Mock(spec=True)
+        client.list_project_statuses = Mock(return_value={}, spec=True)
+        client.list_target_files = Mock(return_value={}, spec=True)
         sync._import(client, self.logger)
         self.assertEqual(client.get_project.call_count, 2)
         self.assertEqual(client.download_target_file.call_count, 1)
@@ -170,6 +265,8 @@ class TestImport(TestCase):
             side_effect=[self.po_files[0], self.po_files[1]], spec=True
         )
         client.complete_project = Mock(spec=True)
+        client.list_project_statuses = Mock(return_value={}, spec=True)
+        client.list_target_files = Mock(return_value={}, spec=True)
         sync._import(client, self.logger)
         self.assertEqual(client.get_project.call_count, 0)
         self.assertEqual(client.download_target_file.call_count, 0)
@@ -185,6 +282,8 @@ class TestImport(TestCase):
             side_effect=[str(self.po_files[0]), str(self.po_files[1])], spec=True
         )
         client.complete_project = Mock(spec=True)
+        client.list_project_statuses = Mock(return_value={}, spec=True)
+        client.list_target_files = Mock(return_value={}, spec=True)
 
         sync._import(client, self.logger)
         self.assertEqual(client.get_project.call_count, 2)
@@ -213,6 +312,441 @@ class TestImport(TestCase):
             self.lc_files[1].combined_status, "Translations happening in LanguageCloud"
         )
 
+    def test_import_uses_project_status_listing(self):
+        self.lc_projects[1].lc_project_status = LanguageCloudStatus.IN_PROGRESS
+        self.lc_projects[1].save()
+
+        client = ApiClient()
+        client.is_authorized = True
+        client.get_project = Mock(
+            side_effect=ValueError("this should never be called"), spec=True
+        )
+        client.list_project_statuses = Mock(
+            return_value={
+                "proj0": LanguageCloudStatus.COMPLETED,
+                "proj1": LanguageCloudStatus.IN_PROGRESS,
+            },
+            spec=True,
+        )
+        client.list_target_files = Mock(return_value={}, spec=True)
+        client.download_target_file = Mock(
+            side_effect=[str(self.po_files[0]), str(self.po_files[1])], spec=True
+        )
+        client.complete_project = Mock(spec=True)
+
+        sync._import(client, self.logger)
+        self.assertEqual(client.get_project.call_count, 0)
+        self.assertEqual(client.list_project_statuses.call_count, 1)
+        self.assertEqual(client.download_target_file.call_count, 2)
+        # proj1 was in progress and gets completed after the import
+        client.complete_project.assert_called_once_with("proj1")
+        for proj in self.lc_projects:
+            proj.refresh_from_db()
+            self.assertEqual(proj.internal_status, LanguageCloudProject.STATUS_IMPORTED)
+
+    def test_import_counts_the_projects_it_imports(self):
+        client = ApiClient()
+        client.is_authorized = True
+        client.list_project_statuses = Mock(
+            return_value={
+                "proj0": LanguageCloudStatus.COMPLETED,
+                "proj1": LanguageCloudStatus.CREATED,
+            },
+            spec=True,
+        )
+        client.list_target_files = Mock(return_value={}, spec=True)
+        client.download_target_file = Mock(
+            return_value=str(self.po_files[0]), spec=True
+        )
+        client.complete_project = Mock(spec=True)
+        budget = SyncBudget(checkpoint_name=None)
+
+        sync._import(client, self.logger, budget=budget)
+
+        # proj1 isn't ready, so there was nothing to do for it
+        self.assertEqual(budget.projects_worked_on, {self.lc_projects[0].pk})
+        self.assertEqual(budget.last_pk, self.lc_projects[1].pk)
+
+    def test_import_stops_when_the_budget_runs_out(self):
+        client = ApiClient()
+        client.is_authorized = True
+        client.list_project_statuses = Mock(
+            return_value={
+                "proj0": LanguageCloudStatus.COMPLETED,
+                "proj1": LanguageCloudStatus.COMPLETED,
+            },
+            spec=True,
+        )
+        client.list_target_files = Mock(return_value={}, spec=True)
+        client.download_target_file = Mock(
+            return_value=str(self.po_files[0]), spec=True
+        )
+        client.complete_project = Mock(spec=True)
+        heartbeat = Mock(side_effect=[None] + [BudgetExhausted()] * 10)
+        budget = SyncBudget(checkpoint_name=None)
+
+        with self.assertRaises(BudgetExhausted):
+            sync._import(client, self.logger, heartbeat=heartbeat, budget=budget)
+
+        # the download queued before the budget ran out is still imported
+        self.assertEqual(budget.last_pk, self.lc_projects[0].pk)
+        self.lc_projects[0].refresh_from_db()
+        self.assertEqual(
+            self.lc_projects[0].internal_status, LanguageCloudProject.STATUS_IMPORTED
+        )
+        # the other one was polled but not imported, so it stays due
+        self.lc_projects[1].refresh_from_db()
+        self.assertEqual(
+            self.lc_projects[1].internal_status, LanguageCloudProject.STATUS_NEW
+        )
+        self.assertLessEqual(self.lc_projects[1].next_poll_at, timezone.now())
+
+    def test_import_skips_projects_listed_with_other_statuses(self):
+        client = ApiClient()
+        client.is_authorized = True
+        client.get_project = Mock(
+            side_effect=ValueError("this should never be called"), spec=True
+        )
+        client.list_project_statuses = Mock(
+            return_value={"proj0": "created", "proj1": LanguageCloudStatus.ARCHIVED},
+            spec=True,
+        )
+        client.list_target_files = Mock(return_value={}, spec=True)
+        client.download_target_file = Mock(spec=True)
+        client.complete_project = Mock(spec=True)
+        sync._import(client, self.logger)
+
+        self.assertEqual(client.download_target_file.call_count, 0)
+        self.lc_projects[0].refresh_from_db()
+        self.lc_projects[1].refresh_from_db()
+        self.assertEqual(self.lc_projects[0].lc_project_status, "created")
+        self.assertEqual(
+            self.lc_projects[1].lc_project_status, LanguageCloudStatus.ARCHIVED
+        )
+
+    def test_import_falls_back_to_get_project(self):
+        client = ApiClient()
+        client.is_authorized = True
+        client.list_project_statuses = Mock(
+            side_effect=RequestException("oh no"), spec=True
+        )
+        client.get_project = Mock(
+            side_effect=[{"status": "completed"}, {"status": "completed"}], spec=True
+        )
+        client.list_target_files = Mock(return_value={}, spec=True)
+        client.download_target_file = Mock(
+            side_effect=[str(self.po_files[0]), str(self.po_files[1])], spec=True
+        )
+        client.complete_project = Mock(spec=True)
+        sync._import(client, self.logger)
+
+        self.assertEqual(client.get_project.call_count, 2)
+        self.assertEqual(client.download_target_file.call_count, 2)
+
+    def test_import_fetches_projects_missing_from_listing(self):
+        client = ApiClient()
+        client.is_authorized = True
+        client.list_project_statuses = Mock(
+            return_value={"proj0": LanguageCloudStatus.COMPLETED}, spec=True
+        )
+        client.get_project = Mock(return_value={"status": "completed"}, spec=True)
+        client.list_target_files = Mock(return_value={}, spec=True)
+        client.download_target_file = Mock(
+            side_effect=[str(self.po_files[0]), str(self.po_files[1])], spec=True
+        )
+        client.complete_project = Mock(spec=True)
+        sync._import(client, self.logger)
+
+        client.get_project.assert_called_once_with("proj1")
+        self.assertEqual(client.download_target_file.call_count, 2)
+
+    def test_import_only_polls_projects_that_are_due(self):
+        now = timezone.now()
+        self.lc_projects[0].next_poll_at = now + datetime.timedelta(hours=1)
+        self.lc_projects[0].save()
+        self.lc_projects[1].lc_project_status = LanguageCloudStatus.IN_PROGRESS
+        self.lc_projects[1].status_changed_at = now - datetime.timedelta(days=2)
+        self.lc_projects[1].next_poll_at = now - datetime.timedelta(minutes=1)
+        self.lc_projects[1].save()
+
+        client = ApiClient()
+        client.is_authorized = True
+        client.list_project_statuses = Mock(
+            return_value={
+                "proj0": LanguageCloudStatus.COMPLETED,
+                "proj1": LanguageCloudStatus.IN_PROGRESS,
+            },
+            spec=True,
+        )
+        client.get_project = Mock(spec=True)
+        client.list_target_files = Mock(
+            side_effect=RequestException("not ready"), spec=True
+        )
+        client.download_target_file = Mock(spec=True)
+        client.complete_project = Mock(spec=True)
+        sync._import(client, self.logger)
+
+        client.list_target_files.assert_called_once_with("proj1")
+        self.lc_projects[0].refresh_from_db()
+        self.assertEqual(self.lc_projects[0].lc_project_status, "")
+
+        self.lc_projects[1].refresh_from_db()
+        self.assertEqual(
+            self.lc_projects[1].status_changed_at, now - datetime.timedelta(days=2)
+        )
+        # idle for 2 days, so the next poll backs off to 12 hours from now
+        self.assertGreater(
+            self.lc_projects[1].next_poll_at, now + datetime.timedelta(hours=11)
+        )
+
+    def test_import_does_not_list_statuses_when_no_project_is_due(self):
+        LanguageCloudProject.objects.update(
+            next_poll_at=timezone.now() + datetime.timedelta(hours=1)
+        )
+        client = ApiClient()
+        client.is_authorized = True
+        client.list_project_statuses = Mock(spec=True)
+        client.get_project = Mock(spec=True)
+        sync._import(client, self.logger)
+
+        self.assertEqual(client.list_project_statuses.call_count, 0)
+        self.assertEqual(client.get_project.call_count, 0)
+
+    def test_import_projects_reported_by_a_webhook_without_polling(self):
+        now = timezone.now()
+        LanguageCloudProject.objects.update(
+            next_poll_at=now + datetime.timedelta(hours=1)
+        )
+        LanguageCloudProject.objects.filter(pk=self.lc_projects[0].pk).update(
+            lc_project_status=LanguageCloudStatus.IN_PROGRESS, event_received_at=now
+        )
+        client = ApiClient()
+        client.is_authorized = True
+        client.list_project_statuses = Mock(spec=True)
+        client.get_project = Mock(spec=True)
+        client.list_target_files = Mock(return_value={}, spec=True)
+        client.download_target_file = Mock(
+            side_effect=[str(self.po_files[0])], spec=True
+        )
+        client.complete_project = Mock(spec=True)
+        sync._import(client, self.logger, events_only=True)
+
+        self.assertEqual(client.list_project_statuses.call_count, 0)
+        self.assertEqual(client.get_project.call_count, 0)
+        client.list_target_files.assert_called_once_with("proj0")
+        for proj in self.lc_projects:
+            proj.refresh_from_db()
+        self.assertEqual(
+            self.lc_projects[0].internal_status, LanguageCloudProject.STATUS_IMPORTED
+        )
+        self.assertIsNone(self.lc_projects[0].event_received_at)
+        self.assertEqual(
+            self.lc_projects[1].internal_status, LanguageCloudProject.STATUS_NEW
+        )
+
+    @override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={"IMPORT_QUEUE_SIZE": 1})
+    def test_import_stops_when_the_lease_is_lost_while_draining(self):
+        LanguageCloudProject.objects.update(
+            lc_project_status=LanguageCloudStatus.IN_PROGRESS,
+            event_received_at=timezone.now(),
+        )
+        client = ApiClient()
+        client.is_authorized = True
+        client.list_target_files = Mock(return_value={}, spec=True)
+        client.download_target_file = Mock(
+            side_effect=[str(po_file) for po_file in self.po_files], spec=True
+        )
+        client.complete_project = Mock(spec=True)
+        # renewed before the first project, then by the pipeline
+        heartbeat = Mock(side_effect=[None, LeaseLost()])
+        with self.assertRaises(LeaseLost):
+            sync._import(client, self.logger, events_only=True, heartbeat=heartbeat)
+
+    def test_clear_project_event_keeps_newer_events(self):
+        now = timezone.now()
+        project = self.lc_projects[0]
+        project.lc_project_status = LanguageCloudStatus.CREATED
+        project.event_received_at = now - datetime.timedelta(minutes=1)
+        project.save()
+        LanguageCloudProject.objects.filter(pk=project.pk).update(event_received_at=now)
+
+        sync._clear_project_event(project, project.event_received_at)
+        project.refresh_from_db()
+        self.assertEqual(project.event_received_at, now)
+
+    def test_events_are_kept_until_the_project_is_imported(self):
+        now = timezone.now()
+        LanguageCloudProject.objects.update(
+            next_poll_at=now + datetime.timedelta(hours=1)
+        )
+        LanguageCloudProject.objects.filter(pk=self.lc_projects[0].pk).update(
+            lc_project_status=LanguageCloudStatus.IN_PROGRESS, event_received_at=now
+        )
+        client = ApiClient()
+        client.is_authorized = True
+        client.list_target_files = Mock(return_value={}, spec=True)
+        client.download_target_file = Mock(
+            side_effect=[RequestException(), str(self.po_files[0])], spec=True
+        )
+        client.complete_project = Mock(spec=True)
+
+        sync._import(client, self.logger, events_only=True)
+        self.lc_projects[0].refresh_from_db()
+        self.assertEqual(self.lc_projects[0].event_received_at, now)
+        self.assertIsNotNone(self.lc_projects[0].next_poll_at)
+
+        sync._import(client, self.logger, events_only=True)
+        self.lc_projects[0].refresh_from_db()
+        self.assertIsNone(self.lc_projects[0].event_received_at)
+        self.assertEqual(
+            self.lc_projects[0].internal_status, LanguageCloudProject.STATUS_IMPORTED
+        )
+
+    def test_import_skips_projects_claimed_by_another_worker(self):
+        other_worker = ProjectClaims(batch_size=1)
+        other_worker.claim(LanguageCloudProject.objects.order_by("pk"))
+
+        client = ApiClient()
+        client.is_authorized = True
+        client.list_project_statuses = Mock(
+            return_value={"proj0": "inProgress", "proj1": "inProgress"}, spec=True
+        )
+        client.list_target_files = Mock(return_value={}, spec=True)
+        client.download_target_file = Mock(
+            side_effect=[str(self.po_files[1])], spec=True
+        )
+        client.complete_project = Mock(spec=True)
+        claims = ProjectClaims(batch_size=1)
+        sync._import(client, self.logger, claims=claims)
+
+        client.list_project_statuses.assert_called_once_with()
+        client.list_target_files.assert_called_once_with("proj1")
+        for proj in self.lc_projects:
+            proj.refresh_from_db()
+        self.assertEqual(
+            self.lc_projects[0].internal_status, LanguageCloudProject.STATUS_NEW
+        )
+        self.assertEqual(self.lc_projects[0].claimed_by, other_worker.owner)
+        self.assertEqual(
+            self.lc_projects[1].internal_status, LanguageCloudProject.STATUS_IMPORTED
+        )
+        self.assertEqual(self.lc_projects[1].claimed_by, "")
+
+    def test_import_concurrent_downloads(self):
+        po_files = {
+            "file0": str(self.po_files[0]),
+            "file1": str(self.po_files[1]),
+        }
+
+        client = ApiClient()
+        client.is_authorized = True
+        client.get_project = Mock(return_value={"status": "completed"}, spec=True)
+        client.list_project_statuses = Mock(return_value={}, spec=True)
+        client.list_target_files = Mock(return_value={}, spec=True)
+        client.download_target_file = Mock(
+            side_effect=lambda project_id, source_file_id, **kwargs: po_files[
+                source_file_id
+            ],
+            spec=True,
+        )
+        client.complete_project = Mock(spec=True)
+        sync._import(client, self.logger, concurrency=2)
+
+        self.assertEqual(client.download_target_file.call_count, 2)
+        for proj in self.lc_projects:
+            proj.refresh_from_db()
+            self.assertEqual(proj.internal_status, LanguageCloudProject.STATUS_IMPORTED)
+        for file_ in self.lc_files:
+            file_.refresh_from_db()
+            self.assertEqual(file_.internal_status, LanguageCloudFile.STATUS_IMPORTED)
+
+
+class TestImportPipeline(TestCase):
+    def setUp(self):
+        self.client = ApiClient()
+        self.client.download_target_file = Mock(
+            side_effect=lambda name: name * 10, spec=True
+        )
+
+    def test_downloads_are_handed_back_in_order(self):
+        results = []
+        with sync.ImportPipeline(self.client, workers=4) as pipeline:
+            for name in "abcdef":
+                pipeline.download(lambda future: results.append(future.result()), name)
+            pipeline.then(lambda: results.append("done"))
+
+        self.assertEqual(
+            results,
+            ["a" * 10, "b" * 10, "c" * 10, "d" * 10, "e" * 10, "f" * 10, "done"],
+        )
+
+    def test_queue_size_is_capped(self):
+        queued = []
+        with sync.ImportPipeline(self.client, workers=2, max_queued=2) as pipeline:
+            for name in "abcdef":
+                pipeline.download(lambda future: None, name)
+                queued.append(pipeline.queued)
+        self.assertLessEqual(max(queued), 2)
+        self.assertEqual(pipeline.queued, 0)
+        self.assertEqual(pipeline.queued_bytes, 0)
+
+    def test_queued_bytes_are_capped(self):
+        imported = []
+        with sync.ImportPipeline(self.client, max_bytes=15) as pipeline:
+            for name in "abc":
+                pipeline.download(lambda future: imported.append(future.result()), name)
+                pipeline.pending[-1][0].result()  # wait for the download
+
+            # "a" and "b" were waiting with 20 bytes, so "a" was imported
+            # before "c" was queued
+            self.assertEqual(imported, ["a" * 10])
+            self.assertEqual(pipeline.queued_bytes, 20)
+        self.assertEqual(imported, ["a" * 10, "b" * 10, "c" * 10])
+
+    def test_callbacks_dont_pile_up(self):
+        results = []
+        with sync.ImportPipeline(self.client, max_queued=2) as pipeline:
+            # nothing to wait for
+            pipeline.then(lambda: results.append("first"))
+            self.assertEqual(results, ["first"])
+            self.assertEqual(len(pipeline.pending), 0)
+
+            pipeline.download(lambda future: results.append(future.result()), "a")
+            for _ in range(5):
+                pipeline.then(lambda: None)
+                self.assertLessEqual(len(pipeline.pending), 2)
+        self.assertEqual(results, ["first", "a" * 10])
+
+    def test_failed_downloads_are_handed_back(self):
+        self.client.download_target_file.side_effect = RequestException("oh no")
+        errors = []
+        with sync.ImportPipeline(self.client) as pipeline:
+            pipeline.download(lambda future: errors.append(future.exception()), "a")
+        self.assertIsInstance(errors[0], RequestException)
+        self.assertEqual(pipeline.queued_bytes, 0)
+
+    def test_heartbeat_while_draining(self):
+        heartbeat = Mock(side_effect=BudgetExhausted())
+        imported = []
+        with sync.ImportPipeline(self.client, heartbeat=heartbeat) as pipeline:
+            for name in "abc":
+                pipeline.download(lambda future: imported.append(future.result()), name)
+        # out of budget, but the lease is renewed and the queue drained
+        self.assertEqual(heartbeat.call_count, 3)
+        self.assertEqual(len(imported), 3)
+
+    @override_settings(
+        WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={
+            "IMPORT_QUEUE_SIZE": 3,
+            "IMPORT_QUEUE_MAX_BYTES": 1024,
+        }
+    )
+    def test_from_settings(self):
+        pipeline = sync.ImportPipeline.from_settings(self.client, workers=5)
+        self.assertEqual(pipeline.workers, 5)
+        self.assertEqual(pipeline.max_queued, 3)
+        self.assertEqual(pipeline.max_bytes, 1024)
+
 
 @override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={"LOCATION_ID": 123})
 class TestExport(TestCase):
@@ -326,6 +860,182 @@ class TestExport(TestCase):
             proj2_files[1].combined_status, "Translations happening in LanguageCloud"
         )
 
+    @override_settings(
+        WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={
+            "LOCATION_ID": 123,
+            "SINGLE_SOURCE_FILE_PER_PROJECT": True,
+        }
+    )
+    def test_export_single_source_file_per_project(self):
+        client = ApiClient()
+        client.is_authorized = True
+        client.create_project = Mock(
+            side_effect=[{"id": "proj1"}, {"id": "proj2"}], spec=True
+        )
+        client.create_source_file = Mock(
+            side_effect=[{"id": "file1"}, RequestException("oh no")], spec=True
+        )
+        client.get_project_templates = self.get_project_templates_mock
+        client.start_project = Mock()
+
+        sync._export(client, self.logger)
+
+        self.assertEqual(client.create_project.call_count, 2)
+        self.assertEqual(client.create_source_file.call_count, 2)
+        self.assertEqual(client.start_project.call_count, 1)
+        client.start_project.assert_called_with("proj1")
+        (
+            _,
+            _,
+            filename,
+            source_locale,
+            target_locales,
+        ) = client.create_source_file.call_args_list[0][0]
+        self.assertEqual(filename, "my project_Test page 0.po")
+        self.assertEqual(source_locale, "en")
+        self.assertEqual(sorted(target_locales), ["de", "fr"])
+
+        proj1_files = LanguageCloudFile.objects.filter(project__lc_project_id="proj1")
+        self.assertEqual(len(proj1_files), 2)
+        for file_ in proj1_files:
+            self.assertEqual(file_.lc_source_file_id, "file1")
+            self.assertEqual(file_.create_attempts, 1)
+
+        proj2_files = LanguageCloudFile.objects.filter(project__lc_project_id="proj2")
+        self.assertEqual(len(proj2_files), 2)
+        for file_ in proj2_files:
+            self.assertEqual(file_.lc_source_file_id, "")
+            self.assertEqual(file_.create_attempts, 1)
+
+    def test_export_concurrent_uploads(self):
+        def create_source_file(project_id, po_file, filename, source, target):
+            if target == "de":
+                raise RequestException("oh no")
+            return {"id": f"{project_id}-{filename}"}
+
+        client = ApiClient()
+        client.is_authorized = True
+        client.create_project = Mock(
+            side_effect=[{"id": "proj1"}, {"id": "proj2"}], spec=True
+        )
+        client.create_source_file = Mock(side_effect=create_source_file, spec=True)
+        client.get_project_templates = self.get_project_templates_mock
+        client.start_project = Mock()
+
+        sync._export(client, self.logger, concurrency=3)
+
+        self.assertEqual(client.create_source_file.call_count, 4)
+        self.assertEqual(client.start_project.call_count, 0)
+        for file_ in LanguageCloudFile.objects.all().select_related(
+            "project", "translation__target_locale"
+        ):
+            self.assertEqual(file_.create_attempts, 1)
+            if file_.translation.target_locale == self.locale_de:
+                self.assertEqual(file_.lc_source_file_id, "")
+            else:
+                self.assertTrue(
+                    file_.lc_source_file_id.startswith(
+                        f"{file_.project.lc_project_id}-"
+                    )
+                )
+                self.assertIn(str(self.locale_fr), file_.lc_source_file_id)
+
+    def test_export_stops_when_the_sync_lock_is_lost(self):
+        client = ApiClient()
+        client.is_authorized = True
+        client.create_project = Mock(spec=True)
+        client.get_project_templates = self.get_project_templates_mock
+        heartbeat = Mock(side_effect=[None, LeaseLost()])
+
+        with self.assertRaises(LeaseLost):
+            sync._export(client, self.logger, heartbeat=heartbeat)
+
+        # both local projects were created in one batch, then the lock was lost
+        self.assertEqual(LanguageCloudProject.objects.count(), 2)
+        self.assertEqual(client.create_project.call_count, 0)
+
+    def test_export_skips_projects_claimed_by_another_worker(self):
+        client = ApiClient()
+        client.is_authorized = True
+        client.create_project = Mock(side_effect=[{"id": "proj1"}], spec=True)
+        client.create_source_file = Mock(
+            side_effect=[{"id": "file1"}, {"id": "file2"}], spec=True
+        )
+        client.get_project_templates = self.get_project_templates_mock
+        client.start_project = Mock(spec=True)
+
+        sync._create_local_projects(self.logger)
+        other_worker = ProjectClaims(batch_size=1)
+        other_project = other_worker.claim(LanguageCloudProject.objects.order_by("pk"))
+
+        claims = ProjectClaims()
+        sync._export(client, self.logger, claims=claims)
+
+        self.assertEqual(client.create_project.call_count, 1)
+        self.assertEqual(client.create_source_file.call_count, 2)
+        client.start_project.assert_called_once_with("proj1")
+        self.assertEqual(
+            LanguageCloudProject.objects.filter(claimed_by=claims.owner).count(), 0
+        )
+        other_project = LanguageCloudProject.objects.get(pk=other_project[0].pk)
+        self.assertEqual(other_project.lc_project_id, "")
+        self.assertEqual(other_project.claimed_by, other_worker.owner)
+
+    def test_local_projects_stop_at_max_projects(self):
+        budget = SyncBudget(max_projects=1, checkpoint_name=None)
+        sync._create_local_projects(
+            self.logger, heartbeat=budget.wrap_heartbeat(Mock()), budget=budget
+        )
+        self.assertEqual(LanguageCloudProject.objects.count(), 1)
+        self.assertTrue(budget.projects_exhausted)
+
+    def test_export_counts_each_project_once(self):
+        client = ApiClient()
+        client.is_authorized = True
+        client.create_project = Mock(
+            side_effect=[{"id": "proj1"}, {"id": "proj2"}], spec=True
+        )
+        client.create_source_file = Mock(return_value={"id": "file"}, spec=True)
+        client.get_project_templates = self.get_project_templates_mock
+        client.start_project = Mock(spec=True)
+
+        budget = SyncBudget(checkpoint_name=None)
+        sync._export(client, self.logger, budget=budget)
+        # each project went through every phase
+        self.assertEqual(client.start_project.call_count, 2)
+        self.assertEqual(budget.projects, 2)
+
+        # there is nothing left to do
+        budget = SyncBudget(checkpoint_name=None)
+        sync._export(client, self.logger, budget=budget)
+        self.assertEqual(budget.projects, 0)
+
+    def test_export_exports_po_once_per_source(self):
+        client = ApiClient()
+        client.is_authorized = True
+        client.create_project = Mock(
+            side_effect=[{"id": "proj1"}, {"id": "proj2"}], spec=True
+        )
+        client.create_source_file = Mock(
+            side_effect=[
+                {"id": "file1"},
+                {"id": "file2"},
+                {"id": "file3"},
+                {"id": "file4"},
+            ],
+            spec=True,
+        )
+        client.get_project_templates = self.get_project_templates_mock
+        client.start_project = Mock()
+        po_cache = sync.POCache()
+
+        sync._export(client, self.logger, po_cache=po_cache)
+
+        self.assertEqual(client.create_source_file.call_count, 4)
+        # the PO file is exported once and shared by the project's uploads
+        self.assertEqual(po_cache.misses, 2)
+        self.assertEqual(po_cache.hits, 0)
+
     def test_export_all_create_project_api_calls_fail(self):
         client = ApiClient()
         client.is_authorized = True
@@ -594,6 +1304,101 @@ class TestExport(TestCase):
         )
 
 
+@override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={"LOCATION_ID": 123})
+class TestExportQueryCount(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.locale_fr = Locale.objects.create(language_code="fr")
+        cls.locale_de = Locale.objects.create(language_code="de")
+        cls.sources = []
+        for i in range(0, 4):
+            _, source = create_test_page(
+                title=f"Test page {i}",
+                slug=f"test-page-{i}",
+                test_charfield=f"Some test translatable content {i}",
+            )
+            cls.sources.append(source)
+
+        cls.logger = logging.getLogger(__name__)
+        logging.disable()  # supress log output under test
+
+    def _get_client(self):
+        client = ApiClient()
+        client.is_authorized = True
+        client.get_project_templates = Mock(return_value={"items": []}, spec=True)
+        client.create_project = Mock(return_value={"id": "proj"}, spec=True)
+        client.create_source_file = Mock(return_value={"id": "file"}, spec=True)
+        client.start_project = Mock(spec=True)
+        return client
+
+    def _count_export_queries(self, number_of_projects):
+        """
+        Returns the number of queries used to export `number_of_projects`
+        projects with two locales each, rolling back the changes afterwards
+        """
+        with transaction.atomic():
+            for source in self.sources[:number_of_projects]:
+                translations = [
+                    Translation.objects.create(source=source, target_locale=locale)
+                    for locale in [self.locale_fr, self.locale_de]
+                ]
+                create_test_project_settings(source, translations)
+
+            client = self._get_client()
+            ContentType.objects.clear_cache()
+            with CaptureQueriesContext(connection) as queries:
+                sync._export(client, self.logger)
+
+            self.assertEqual(client.start_project.call_count, number_of_projects)
+            transaction.set_rollback(True)
+        return len(queries)
+
+    def test_export_queries_grow_linearly_with_projects(self):
+        query_counts = [self._count_export_queries(n) for n in range(1, 5)]
+        per_project = {
+            query_counts[i + 1] - query_counts[i] for i in range(len(query_counts) - 1)
+        }
+        self.assertEqual(len(per_project), 1, query_counts)
+
+    def _count_local_project_creation_queries(self, number_of_projects):
+        with transaction.atomic():
+            for source in self.sources[:number_of_projects]:
+                translations = [
+                    Translation.objects.create(source=source, target_locale=locale)
+                    for locale in [self.locale_fr, self.locale_de]
+                ]
+                create_test_project_settings(source, translations)
+
+            with CaptureQueriesContext(connection) as queries:
+                sync._create_local_projects(self.logger)
+
+            self.assertEqual(LanguageCloudFile.objects.count(), number_of_projects * 2)
+            transaction.set_rollback(True)
+        return len(queries)
+
+    def test_local_project_creation_queries_are_constant(self):
+        query_counts = {
+            self._count_local_project_creation_queries(n) for n in range(1, 5)
+        }
+        self.assertEqual(len(query_counts), 1, query_counts)
+
+    def test_projects_to_start_are_fetched_once(self):
+        with transaction.atomic():
+            for source in self.sources:
+                translation = Translation.objects.create(
+                    source=source, target_locale=self.locale_fr
+                )
+                create_test_project_settings(source, [translation])
+
+            with patch.object(
+                sync, "_get_projects_to_start", wraps=sync._get_projects_to_start
+            ) as get_projects_to_start:
+                sync._export(self._get_client(), self.logger)
+            transaction.set_rollback(True)
+
+        self.assertEqual(get_projects_to_start.call_count, 1)
+
+
 class TestHelpers(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -621,6 +1426,138 @@ class TestHelpers(TestCase):
         )
         return settings
 
+    def test_iter_chunks(self):
+        projects = [
+            LanguageCloudProject.objects.create(
+                translation_source=self.translation.source,
+                source_last_updated_at=timezone.now() + datetime.timedelta(seconds=i),
+            )
+            for i in range(5)
+        ]
+        queryset = LanguageCloudProject.objects.filter(lc_project_id="")
+
+        chunks = []
+        for chunk in sync._iter_chunks(queryset, chunk_size=2):
+            chunks.append([project.pk for project in chunk])
+            # processed projects dropping out of the queryset don't shift
+            # the following chunks
+            LanguageCloudProject.objects.filter(
+                pk__in=[project.pk for project in chunk]
+            ).update(lc_project_id="done")
+
+        pks = [project.pk for project in projects]
+        self.assertEqual(chunks, [pks[0:2], pks[2:4], pks[4:]])
+
+    def test_iter_chunks_start_after(self):
+        projects = [
+            LanguageCloudProject.objects.create(
+                translation_source=self.translation.source,
+                source_last_updated_at=timezone.now(),
+            )
+            for i in range(5)
+        ]
+        pks = [project.pk for project in projects]
+
+        chunks = [
+            [project.pk for project in chunk]
+            for chunk in sync._iter_chunks(
+                LanguageCloudProject.objects.all(), chunk_size=2, start_after=pks[2]
+            )
+        ]
+        self.assertEqual(chunks, [pks[3:5], pks[0:2], pks[2:3]])
+
+    def test_iter_chunks_empty(self):
+        self.assertEqual(
+            list(sync._iter_chunks(LanguageCloudProject.objects.none())), []
+        )
+
+    def test_create_local_project_batch(self):
+        disabled = Translation.objects.create(
+            source=self.translation.source,
+            target_locale=self.locale_en,
+            enabled=False,
+        )
+        settings, _ = create_test_project_settings(
+            translation_source=self.translation.source,
+            translations=[self.translation, disabled],
+        )
+        # left behind by an earlier attempt
+        existing_project = LanguageCloudProject.objects.create(
+            translation_source=settings.translation_source,
+            source_last_updated_at=settings.source_last_updated_at,
+        )
+        LanguageCloudFile.objects.create(
+            translation=self.translation, project=existing_project
+        )
+
+        lc_projects = sync._create_local_project_batch([settings])
+
+        self.assertEqual(lc_projects, [existing_project])
+        settings.refresh_from_db()
+        self.assertEqual(settings.lc_project, existing_project)
+        self.assertEqual(
+            list(existing_project.languagecloudfile_set.values_list("translation")),
+            [(self.translation.pk,)],
+        )
+        self.assertEqual(lc_projects[0].files_total, 1)
+
+    def test_create_local_project_batch_skips_processed_settings(self):
+        lc_project = LanguageCloudProject.objects.create(
+            translation_source=self.translation.source,
+            source_last_updated_at=self.translation.source.last_updated_at,
+        )
+        settings = self._create_project_settings(lc_project)
+        self.assertEqual(sync._create_local_project_batch([settings]), [])
+
+    def test_update_project_statuses_only_writes_changed_projects(self):
+        now = timezone.now()
+        projects = [
+            LanguageCloudProject.objects.create(
+                translation_source=self.translation.source,
+                source_last_updated_at=now + datetime.timedelta(seconds=i),
+                lc_project_id=f"proj{i}",
+            )
+            for i in range(3)
+        ]
+        statuses = {f"proj{i}": LanguageCloudStatus.IN_PROGRESS for i in range(3)}
+
+        def count_updates():
+            with CaptureQueriesContext(connection) as ctx:
+                sync._update_project_statuses(self.logger, projects, statuses, now)
+            return sum(
+                query["sql"].startswith("UPDATE") for query in ctx.captured_queries
+            )
+
+        # one bulk UPDATE for the batch, nothing once the statuses are recorded
+        self.assertEqual(count_updates(), 1)
+        self.assertEqual(count_updates(), 0)
+
+        statuses["proj1"] = LanguageCloudStatus.COMPLETED
+        self.assertEqual(count_updates(), 1)
+        projects[1].refresh_from_db()
+        self.assertEqual(projects[1].lc_project_status, LanguageCloudStatus.COMPLETED)
+
+    def test_row_write_counter(self):
+        now = timezone.now()
+        lc_project = LanguageCloudProject.objects.create(
+            translation_source=self.translation.source,
+            source_last_updated_at=now,
+            event_received_at=now,
+        )
+        row_writes = sync.RowWriteCounter()
+        with row_writes.counting():
+            sync._clear_project_event(lc_project, now)
+            # nothing left to clear
+            sync._clear_project_event(lc_project, now)
+            with sync.RowWriteCounter().counting() as nested:
+                sync._count_rows(2)
+            # bookkeeping isn't counted
+            LanguageCloudProject.objects.refresh_file_counts()
+        self.assertEqual((row_writes.rows, nested.rows), (1, 2))
+
+        sync._count_rows(1)
+        self.assertEqual(row_writes.rows, 1)
+
     @override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={"LOCATION_ID": 123})
     def test_create_remote_project_success(self):
         lc_project = LanguageCloudProject.objects.create(
@@ -661,7 +1598,7 @@ class TestHelpers(TestCase):
         self.assertEqual(lc_project.lc_project_id, "")
         self.assertEqual(lc_project.create_attempts, 1)
 
-    def test_create_remote_source_file_success(self):
+    def test_save_source_file_upload_success(self):
         lc_project = LanguageCloudProject.objects.create(
             translation_source=self.translation.source,
             source_last_updated_at=self.translation.source.last_updated_at,
@@ -670,23 +1607,14 @@ class TestHelpers(TestCase):
             translation=self.translation,
             project=lc_project,
         )
-        client = ApiClient()
-        client.is_authorized = True
-        client.create_source_file = Mock(return_value={"id": "abc123"}, spec=True)
-        sync._create_remote_source_file(
-            lc_source_file,
-            client,
-            "fakeproject",
-            "fakepo",
-            "fakefilename.po",
-            "en-US",
-            "fr-CA",
+        sync._save_source_file_upload(
+            self.logger, [lc_source_file], Mock(return_value="abc123")
         )
         lc_source_file.refresh_from_db()
         self.assertEqual(lc_source_file.lc_source_file_id, "abc123")
         self.assertEqual(lc_source_file.create_attempts, 1)
 
-    def test_create_remote_source_file_fail(self):
+    def test_save_source_file_upload_fail(self):
         lc_project = LanguageCloudProject.objects.create(
             translation_source=self.translation.source,
             source_last_updated_at=self.translation.source.last_updated_at,
@@ -695,21 +1623,9 @@ class TestHelpers(TestCase):
             translation=self.translation,
             project=lc_project,
         )
-        client = ApiClient()
-        client.is_authorized = True
-        client.create_source_file = Mock(
-            side_effect=RequestException("oh no"), spec=True
+        sync._save_source_file_upload(
+            self.logger, [lc_source_file], Mock(side_effect=RequestException("oh no"))
         )
-        with self.assertRaises(RequestException):
-            sync._create_remote_source_file(
-                lc_source_file,
-                client,
-                "fakeproject",
-                "fakepo",
-                "fakefilename.po",
-                "en-US",
-                "fr-CA",
-            )
         lc_source_file.refresh_from_db()
         self.assertEqual(lc_source_file.lc_source_file_id, "")
         self.assertEqual(lc_source_file.create_attempts, 1)
@@ -747,7 +1663,8 @@ class TestProjectsToExportLogic(TestCase):
         return settings
 
     def _add_project_from_settings(self):
-        return sync._create_local_project(self._add_settings())
+        [project] = sync._create_local_project_batch([self._add_settings()])
+        return project
 
     def test_project_without_settings_will_not_considered(self):
         LanguageCloudProject.objects.get_or_create(
@@ -879,7 +1796,8 @@ class TestProjectsToStartLogic(TestCase):
         return settings
 
     def _add_project_from_settings(self):
-        return sync._create_local_project(self._add_settings())
+        [project] = sync._create_local_project_batch([self._add_settings()])
+        return project
 
     def test_project_without_settings_is_excluded(self):
         LanguageCloudProject.objects.get_or_create(
@@ -961,3 +1879,227 @@ class TestProjectsToStartLogic(TestCase):
             lc_file.save()
 
         self.assertEqual(sync._get_projects_to_start().count(), 1)
+
+
+class TestPOCache(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _, cls.source = create_test_page(
+            title="Test page",
+            slug="test-page",
+            test_charfield="Some test translatable content",
+        )
+
+    def test_po_is_exported_once_per_source_version(self):
+        po_cache = sync.POCache()
+        with patch.object(
+            TranslationSource, "export_po", autospec=True, return_value="po"
+        ) as export_po:
+            self.assertEqual(po_cache.get(self.source), "po")
+            self.assertEqual(po_cache.get(self.source), "po")
+            self.assertEqual(export_po.call_count, 1)
+
+            self.source.last_updated_at += datetime.timedelta(seconds=1)
+            po_cache.get(self.source)
+            self.assertEqual(export_po.call_count, 2)
+
+        self.assertEqual(po_cache.hits, 1)
+        self.assertEqual(po_cache.misses, 2)
+
+    def test_po_cache_evicts_least_recently_used(self):
+        _, other_source = create_test_page(
+            title="Other page",
+            slug="other-page",
+            test_charfield="Some other translatable content",
+        )
+        po_cache = sync.POCache(maxsize=1)
+        po_cache.get(self.source)
+        po_cache.get(other_source)
+        po_cache.get(self.source)
+        self.assertEqual(len(po_cache.po_files), 1)
+        self.assertEqual(po_cache.misses, 3)
+
+    def test_po_cache_without_timeout_is_not_persisted(self):
+        sync.POCache().get(self.source)
+        with patch.object(
+            TranslationSource, "export_po", autospec=True, return_value="po"
+        ) as export_po:
+            sync.POCache().get(self.source)
+        self.assertEqual(export_po.call_count, 1)
+
+    @override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={"PO_CACHE_TIMEOUT": 60})
+    def test_po_cache_persisted_across_runs(self):
+        po_file = sync.POCache.from_settings().get(self.source)
+
+        po_cache = sync.POCache.from_settings()
+        with patch.object(TranslationSource, "export_po", autospec=True) as export_po:
+            self.assertEqual(po_cache.get(self.source), po_file)
+        self.assertEqual(export_po.call_count, 0)
+        self.assertEqual(po_cache.hits, 1)
+        self.assertEqual(po_cache.misses, 0)
+
+
+@patch.object(ApiClient, "authenticate")
+class TestSyncRun(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        logging.disable()  # supress log output under test
+
+    @patch("wagtail_localize_rws_languagecloud.sync._export")
+    @patch("wagtail_localize_rws_languagecloud.sync._import")
+    def test_sync_records_a_run(self, import_mock, export_mock, authenticate_mock):
+        def import_(client, logger, timer, **kwargs):
+            with timer.phase("import_poll"):
+                response = SimpleNamespace(
+                    request=SimpleNamespace(body=b"sent"), content=b"received"
+                )
+                client.stats.record("project", response, 0.5)
+                client.stats.record("target_file", response, 1)
+            logger.error("Failed to download target file")
+            sync._count_rows(1)
+
+        import_mock.side_effect = import_
+        self.assertTrue(SyncManager().sync())
+
+        run = SyncRun.objects.get()
+        self.assertEqual(run.status, SyncRun.STATUS_FINISHED)
+        self.assertIsNotNone(run.finished_at)
+        self.assertEqual(set(run.phase_durations), {"auth", "import_poll"})
+        self.assertEqual(run.api_calls, 2)
+        self.assertEqual(run.api_bytes_sent, 8)
+        self.assertEqual(run.api_bytes_received, 16)
+        self.assertEqual(
+            run.api_stats["target_file"],
+            {"calls": 1, "bytes_sent": 4, "bytes_received": 8, "seconds": 1},
+        )
+        self.assertEqual(run.rows_written, 1)
+        self.assertEqual(run.failures, 1)
+        self.assertIs(
+            export_mock.call_args.kwargs["timer"], import_mock.call_args.kwargs["timer"]
+        )
+
+    @patch("wagtail_localize_rws_languagecloud.sync._import")
+    def test_failed_sync_is_recorded(self, import_mock, authenticate_mock):
+        import_mock.side_effect = ValueError("oh no")
+        with self.assertRaises(ValueError):
+            SyncManager().sync()
+
+        run = SyncRun.objects.get()
+        self.assertEqual(run.status, SyncRun.STATUS_FAILED)
+        self.assertIn("ValueError: oh no", run.error)
+        self.assertIn("auth", run.phase_durations)
+
+    @patch("wagtail_localize_rws_languagecloud.sync._export")
+    @patch("wagtail_localize_rws_languagecloud.sync._import")
+    def test_sync_out_of_time_resumes_from_a_checkpoint(
+        self, import_mock, export_mock, authenticate_mock
+    ):
+        def export(client, logger, budget, **kwargs):
+            budget.start("upload")
+            budget.processed(42)
+            raise BudgetExhausted()
+
+        export_mock.side_effect = export
+        self.assertTrue(SyncManager().sync(max_seconds=60))
+
+        self.assertEqual(SyncRun.objects.get().status, SyncRun.STATUS_OUT_OF_TIME)
+        checkpoint = SyncCheckpoint.objects.get()
+        self.assertEqual((checkpoint.phase, checkpoint.last_pk), ("upload", 42))
+
+        calls = []
+        import_mock.side_effect = lambda *args, **kwargs: calls.append("import")
+        export_mock.side_effect = lambda *args, **kwargs: calls.append("export")
+        self.assertTrue(SyncManager().sync(max_seconds=60))
+
+        # the export the last sync didn't finish runs first
+        self.assertEqual(calls, ["export", "import"])
+        self.assertEqual(export_mock.call_args[1]["budget"].resume_after("upload"), 42)
+        self.assertFalse(SyncCheckpoint.objects.exists())
+
+    @patch("wagtail_localize_rws_languagecloud.sync._import")
+    def test_parallel_sync_out_of_time_has_no_checkpoint(
+        self, import_mock, authenticate_mock
+    ):
+        def import_(client, logger, budget, **kwargs):
+            budget.start("import")
+            budget.processed(42)
+            raise BudgetExhausted()
+
+        import_mock.side_effect = import_
+        self.assertTrue(SyncManager().sync(parallel=True, max_seconds=60))
+        self.assertEqual(SyncRun.objects.get().status, SyncRun.STATUS_OUT_OF_TIME)
+        self.assertFalse(SyncCheckpoint.objects.exists())
+
+    @patch("wagtail_localize_rws_languagecloud.sync._export")
+    @patch("wagtail_localize_rws_languagecloud.sync._import")
+    def test_import_only_and_export_only(
+        self, import_mock, export_mock, authenticate_mock
+    ):
+        def sync_holding(lease, **kwargs):
+            self.assertTrue(lease.acquire())
+            try:
+                return SyncManager().sync(**kwargs)
+            finally:
+                lease.release()
+
+        def export_lease(**kwargs):
+            return SyncLease("sync-export", phase="export", **kwargs)
+
+        def import_lease(**kwargs):
+            return SyncLease("sync-import", phase="import", **kwargs)
+
+        # they take their own locks, so they run while the other one does
+        self.assertTrue(sync_holding(export_lease(), import_only=True))
+        self.assertEqual((import_mock.call_count, export_mock.call_count), (1, 0))
+        self.assertTrue(sync_holding(import_lease(), export_only=True))
+        self.assertEqual((import_mock.call_count, export_mock.call_count), (1, 1))
+
+        # but not alongside a full sync, which runs both halves
+        self.assertFalse(sync_holding(SyncLease("sync"), import_only=True))
+        self.assertFalse(sync_holding(SyncLease("sync"), export_only=True))
+        self.assertFalse(sync_holding(import_lease()))
+        self.assertFalse(sync_holding(export_lease()))
+        shard = Shard(0, 2)
+        self.assertTrue(
+            sync_holding(
+                SyncLease("sync-shard-0-2-export", shard=shard, phase="export"),
+                import_only=True,
+            )
+        )
+        self.assertFalse(
+            sync_holding(SyncLease("sync-shard-0-2", shard=shard), import_only=True)
+        )
+        self.assertEqual((import_mock.call_count, export_mock.call_count), (2, 1))
+
+        with self.assertRaises(ValueError):
+            SyncManager().sync(import_only=True, export_only=True)
+
+    @patch("wagtail_localize_rws_languagecloud.sync._export")
+    @patch("wagtail_localize_rws_languagecloud.sync._import")
+    def test_max_projects(self, import_mock, export_mock, authenticate_mock):
+        def import_(client, logger, heartbeat, budget, **kwargs):
+            budget.start("import")
+            for pk in range(1, 5):
+                heartbeat()
+                budget.worked_on(pk)
+                budget.processed(pk)
+
+        import_mock.side_effect = import_
+        self.assertTrue(SyncManager().sync(max_projects=2))
+
+        self.assertEqual(SyncRun.objects.get().status, SyncRun.STATUS_PROJECT_LIMIT)
+        self.assertEqual(SyncCheckpoint.objects.get().last_pk, 2)
+        self.assertFalse(export_mock.called)
+
+    @patch("wagtail_localize_rws_languagecloud.sync._export")
+    @patch("wagtail_localize_rws_languagecloud.sync._import")
+    def test_selected_projects(self, import_mock, export_mock, authenticate_mock):
+        SyncCheckpoint.objects.create(name="sync", phase="upload", last_pk=1)
+        self.assertTrue(SyncManager().sync(locales=["fr"], project_ids=[1]))
+
+        selection = export_mock.call_args[1]["selection"]
+        self.assertEqual((selection.locales, selection.project_ids), (["fr"], [1]))
+        self.assertIs(import_mock.call_args[1]["selection"], selection)
+        # syncs of selected projects don't use the checkpoint
+        self.assertIsNone(export_mock.call_args[1]["budget"].resume_after("upload"))
+        self.assertTrue(SyncCheckpoint.objects.exists())
@@ -0,0 +1,90 @@
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..sharding import Shard
+
+
+DEFAULT_SYNC_KWARGS = {
+    "concurrency": 1,
+    "parallel": False,
+    "max_seconds": None,
+    "shard": None,
+    "import_only": False,
+    "export_only": False,
+    "project_ids": None,
+    "lc_project_ids": None,
+    "locales": None,
+    "max_projects": None,
+}
+
+
+@patch("wagtail_localize_rws_languagecloud.sync.SyncManager.sync")
+class TestSyncRwsCommand(TestCase):
+    def test_default_concurrency(self, sync_mock):
+        call_command("sync_rws")
+        sync_mock.assert_called_once_with(**DEFAULT_SYNC_KWARGS)
+
+    def test_concurrency(self, sync_mock):
+        call_command("sync_rws", "--concurrency", "4")
+        sync_mock.assert_called_once_with(**{**DEFAULT_SYNC_KWARGS, "concurrency": 4})
+
+    def test_parallel(self, sync_mock):
+        call_command("sync_rws", "--parallel")
+        sync_mock.assert_called_once_with(**{**DEFAULT_SYNC_KWARGS, "parallel": True})
+
+    def test_max_seconds(self, sync_mock):
+        call_command("sync_rws", "--max-seconds", "300")
+        sync_mock.assert_called_once_with(**{**DEFAULT_SYNC_KWARGS, "max_seconds": 300})
+
+    def test_shard(self, sync_mock):
+        call_command("sync_rws", "--shard", "1/4")
+        self.assertEqual(sync_mock.call_args[1]["shard"], Shard(1, 4))
+
+    def test_invalid_shard(self, sync_mock):
+        for value in ["4/4", "1", "a/b", "0/0"]:
+            with self.subTest(value=value), self.assertRaises(CommandError):
+                call_command("sync_rws", "--shard", value)
+        self.assertFalse(sync_mock.called)
+
+    def test_import_only(self, sync_mock):
+        call_command("sync_rws", "--import-only")
+        sync_mock.assert_called_once_with(
+            **{**DEFAULT_SYNC_KWARGS, "import_only": True}
+        )
+
+    def test_export_only(self, sync_mock):
+        call_command("sync_rws", "--export-only")
+        sync_mock.assert_called_once_with(
+            **{**DEFAULT_SYNC_KWARGS, "export_only": True}
+        )
+
+    def test_import_and_export_only_are_exclusive(self, sync_mock):
+        with self.assertRaises(CommandError):
+            call_command("sync_rws", "--import-only", "--export-only")
+        self.assertFalse(sync_mock.called)
+
+    def test_selection(self, sync_mock):
+        call_command(
+            "sync_rws",
+            "--project",
+            "1",
+            "--project",
+            "2",
+            "--lc-project-id",
+            "abc",
+            "--locale",
+            "fr",
+            "--max-projects",
+            "10",
+        )
+        sync_mock.assert_called_once_with(
+            **{
+                **DEFAULT_SYNC_KWARGS,
+                "project_ids": [1, 2],
+                "lc_project_ids": ["abc"],
+                "locales": ["fr"],
+                "max_projects": 10,
+            }
+        )
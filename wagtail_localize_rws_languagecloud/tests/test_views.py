@@ -11,7 +11,12 @@ except ImportError:
 
 from wagtail_localize.models import Translation
 
-from ..models import LanguageCloudFile, LanguageCloudProject, LanguageCloudStatus
+from ..models import (
+    LanguageCloudFile,
+    LanguageCloudProject,
+    LanguageCloudStatus,
+    SyncRun,
+)
 from .helpers import create_editor_user, create_test_page
 
 
@@ -121,3 +126,38 @@ class TestUpdateTranslationsOverride(TestCase):
                 self.assertTemplateUsed(
                     response, "wagtail_localize/admin/update_translations.html"
                 )
+
+
+class TestSyncRunReport(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_editor_user()
+        cls.sync_run = SyncRun.objects.create(
+            status=SyncRun.STATUS_FINISHED,
+            finished_at=timezone.now(),
+            phase_durations={"upload": 12.5, "auth": 0.2},
+            api_calls=42,
+            api_bytes_received=2048,
+            rows_written=7,
+            failures=1,
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_lists_runs(self):
+        response = self.client.get(
+            reverse("wagtail_localize_rws_languagecloud:sync_run_report")
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["object_list"]), [self.sync_run])
+        self.assertContains(response, "Authentication: 0.2s<br>")
+        self.assertContains(response, "Uploads: 12.5s")
+        self.assertContains(response, "2.0\xa0KB")
+
+    def test_filter_by_status(self):
+        response = self.client.get(
+            reverse("wagtail_localize_rws_languagecloud:sync_run_report"),
+            {"status": SyncRun.STATUS_FAILED},
+        )
+        self.assertEqual(list(response.context["object_list"]), [])
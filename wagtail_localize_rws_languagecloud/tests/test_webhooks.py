@@ -0,0 +1,172 @@
+import datetime
+import json
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import LanguageCloudProject, LanguageCloudStatus, SyncJob
+from ..webhooks import get_signature, parse_events, record_events
+from .helpers import create_test_page
+
+
+WEBHOOK_SETTINGS = {
+    "WEBHOOK_SECRET": "s3cret",
+    "SYNC_BACKEND": "wagtail_localize_rws_languagecloud.background.DatabaseQueueBackend",
+}
+
+
+@override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD=WEBHOOK_SETTINGS)
+class TestWebhook(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _, source = create_test_page(
+            title="Test page", slug="test-page", test_charfield="Some content"
+        )
+        cls.project = LanguageCloudProject.objects.create(
+            translation_source=source,
+            source_last_updated_at=source.last_updated_at,
+            lc_project_id="proj",
+            lc_project_status=LanguageCloudStatus.IN_PROGRESS,
+        )
+        cls.url = reverse("wagtail_localize_rws_languagecloud_webhooks:webhook")
+
+    def post(self, payload, secret="s3cret"):
+        body = json.dumps(payload).encode()
+        return self.client.post(
+            self.url,
+            data=body,
+            content_type="application/json",
+            HTTP_X_LC_SIGNATURE=get_signature(secret, body),
+        )
+
+    def test_project_event(self):
+        response = self.post(
+            {
+                "eventType": "PROJECT.STATUS.CHANGED",
+                "data": {"projectId": "proj", "status": "completed"},
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"projects": 1})
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.lc_project_status, LanguageCloudStatus.COMPLETED)
+        self.assertIsNotNone(self.project.status_changed_at)
+        self.assertIsNotNone(self.project.event_received_at)
+        self.assertEqual(SyncJob.objects.get().scope, SyncJob.SCOPE_EVENTS)
+
+    def test_several_events(self):
+        response = self.post(
+            {
+                "events": [
+                    {"eventType": "TARGET_FILE.UPDATED", "data": {"projectId": "proj"}},
+                    {"eventType": "USER.CREATED", "data": {"userId": "someone"}},
+                    {"eventType": "PROJECT.CREATED", "data": {"projectId": "other"}},
+                ]
+            }
+        )
+        self.assertEqual(response.json(), {"projects": 1})
+        self.project.refresh_from_db()
+        self.assertEqual(
+            self.project.lc_project_status, LanguageCloudStatus.IN_PROGRESS
+        )
+        self.assertIsNotNone(self.project.event_received_at)
+
+    @override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={"WEBHOOK_SECRET": "s3cret"})
+    @patch("wagtail_localize_rws_languagecloud.background.run_queued_jobs")
+    def test_events_are_left_for_the_next_sync_with_the_inline_backend(self, run_mock):
+        response = self.post(
+            {"eventType": "PROJECT.STATUS.CHANGED", "data": {"projectId": "proj"}}
+        )
+        self.assertEqual(response.json(), {"projects": 1})
+        self.assertEqual(run_mock.call_count, 0)
+        self.assertFalse(SyncJob.objects.exists())
+        self.project.refresh_from_db()
+        self.assertIsNotNone(self.project.event_received_at)
+
+    def test_events_for_unknown_projects_dont_queue_a_sync(self):
+        response = self.post(
+            {"eventType": "PROJECT.STATUS.CHANGED", "data": {"projectId": "other"}}
+        )
+        self.assertEqual(response.json(), {"projects": 0})
+        self.assertFalse(SyncJob.objects.exists())
+
+    def test_invalid_signature(self):
+        response = self.post(
+            {"eventType": "PROJECT.STATUS.CHANGED", "data": {"projectId": "proj"}},
+            secret="wrong",
+        )
+        self.assertEqual(response.status_code, 403)
+        self.project.refresh_from_db()
+        self.assertIsNone(self.project.event_received_at)
+
+    def test_invalid_payload(self):
+        response = self.post({"eventType": "PROJECT.STATUS.CHANGED", "data": []})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD={})
+    def test_disabled_without_secret(self):
+        response = self.post(
+            {"eventType": "PROJECT.STATUS.CHANGED", "data": {"projectId": "proj"}}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_not_allowed(self):
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+    def test_imported_projects_are_left_alone(self):
+        self.project.internal_status = LanguageCloudProject.STATUS_IMPORTED
+        self.project.save()
+        self.assertEqual(record_events([("proj", "completed")]), 0)
+
+    def test_parse_events(self):
+        self.assertEqual(
+            parse_events(
+                b'{"eventType": "PROJECT.STATUS.CHANGED",'
+                b' "data": {"projectId": "proj", "status": "completed"}}'
+            ),
+            [("proj", "completed")],
+        )
+        for body in [b"not json", b"[]", b'{"events": {}}', b'{"data": "proj"}']:
+            with self.subTest(body=body), self.assertRaises(ValueError):
+                parse_events(body)
+
+    def test_status_changed_at_is_kept_if_the_status_is_unchanged(self):
+        changed_at = timezone.now() - datetime.timedelta(days=1)
+        self.project.status_changed_at = changed_at
+        self.project.save()
+        record_events([("proj", LanguageCloudStatus.IN_PROGRESS)])
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.status_changed_at, changed_at)
+
+
+@override_settings(WAGTAILLOCALIZE_RWS_LANGUAGECLOUD=WEBHOOK_SETTINGS)
+class TestSimulateWebhookCommand(TestCase):
+    def test_in_process(self):
+        stdout = StringIO()
+        call_command(
+            "simulate_rws_webhook", "proj", "--status", "completed", stdout=stdout
+        )
+        self.assertEqual(stdout.getvalue().strip(), '200 {"projects": 0}')
+
+    @patch("requests.post")
+    def test_url(self, post_mock):
+        post_mock.return_value.status_code = 200
+        post_mock.return_value.content = b'{"projects": 1}'
+        call_command(
+            "simulate_rws_webhook",
+            "proj",
+            "--url",
+            "https://example.com/rws/webhook/",
+            stdout=StringIO(),
+        )
+        body = post_mock.call_args[1]["data"]
+        self.assertEqual(
+            post_mock.call_args[1]["headers"]["X-LC-Signature"],
+            get_signature("s3cret", body),
+        )
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+
+app_name = "wagtail_localize_rws_languagecloud_webhooks"
+
+urlpatterns = [
+    path("webhook/", views.webhook, name="webhook"),
+]
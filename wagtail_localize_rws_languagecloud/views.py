@@ -1,7 +1,18 @@
+import logging
+
 import django_filters
 
+from django.conf import settings
+from django.http import (
+    Http404,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    JsonResponse,
+)
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.views.generic.base import TemplateView
 from django.views.generic.detail import SingleObjectMixin
 from django_filters.constants import EMPTY_VALUES
@@ -13,7 +24,18 @@ from wagtail.core.models import Locale
 from wagtail_localize.models import TranslationSource
 from wagtail_localize.views.update_translations import UpdateTranslationsView
 
-from .models import LanguageCloudFile, LanguageCloudProject, LanguageCloudStatus
+from . import webhooks
+from .background import get_sync_backend
+from .models import (
+    LanguageCloudFile,
+    LanguageCloudProject,
+    LanguageCloudStatus,
+    SyncJob,
+    SyncRun,
+)
+
+
+logger = logging.getLogger(__name__)
 
 
 class SourceTitleFilter(django_filters.CharFilter):
@@ -80,6 +102,38 @@ class LanguageCloudReportView(ReportView):
         )
 
 
+class SyncRunReportFilterSet(WagtailFilterSet):
+    status = django_filters.ChoiceFilter(
+        label=gettext_lazy("Status"), choices=SyncRun.STATUS_CHOICES
+    )
+    started_at = django_filters.DateRangeFilter(label=gettext_lazy("Started at"))
+
+    class Meta:
+        model = SyncRun
+        fields = ["status", "started_at"]
+
+
+class SyncRunReportView(ReportView):
+    template_name = "wagtail_localize_rws_languagecloud/admin/sync_run_report.html"
+    title = gettext_lazy("LanguageCloud syncs")
+    header_icon = "repeat"
+    filterset_class = SyncRunReportFilterSet
+    list_export = [
+        "started_at",
+        "finished_at",
+        "status",
+        "phase_durations",
+        "api_calls",
+        "api_bytes_sent",
+        "api_bytes_received",
+        "rows_written",
+        "failures",
+    ]
+
+    def get_queryset(self):
+        return SyncRun.objects.all()
+
+
 default_update_translations_view = UpdateTranslationsView.as_view()
 
 
@@ -139,3 +193,35 @@ class UpdateTranslationsOverrideView(SingleObjectMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         context["back_url"] = get_valid_next_url_from_request(self.request)
         return context
+
+
+@csrf_exempt
+@require_POST
+def webhook(request):
+    """
+    Receives LanguageCloud events signed with the WEBHOOK_SECRET setting,
+    marks the projects they report for import and queues a sync of them.
+    See webhooks.py
+
+    A sync is never run while responding: with a backend that runs syncs
+    inline, the marked projects are left for the next scheduled sync.
+    """
+    secret = settings.WAGTAILLOCALIZE_RWS_LANGUAGECLOUD.get("WEBHOOK_SECRET")
+    if not secret:
+        raise Http404
+
+    signature = request.headers.get(webhooks.SIGNATURE_HEADER, "")
+    if not webhooks.is_valid_signature(secret, request.body, signature):
+        logger.warning("Rejected a LanguageCloud webhook with an invalid signature")
+        return HttpResponseForbidden()
+
+    try:
+        changes = webhooks.parse_events(request.body)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    marked = webhooks.record_events(changes)
+    backend = get_sync_backend()
+    if marked and not backend.runs_inline:
+        backend.trigger(scope=SyncJob.SCOPE_EVENTS)
+    return JsonResponse({"projects": marked})
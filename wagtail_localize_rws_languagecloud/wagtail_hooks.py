@@ -18,6 +18,11 @@ def register_admin_urls():
             views.LanguageCloudReportView.as_view(),
             name="languagecloud_report",
         ),
+        path(
+            "reports/languagecloud/syncs/",
+            views.SyncRunReportView.as_view(),
+            name="sync_run_report",
+        ),
     ]
 
     return [
@@ -57,6 +62,16 @@ def register_languagecloud_report_menu_item():
     )
 
 
+@hooks.register("register_reports_menu_item")
+def register_sync_run_report_menu_item():
+    return LanguageCloudReportMenuItem(
+        _("LanguageCloud syncs"),
+        reverse("wagtail_localize_rws_languagecloud:sync_run_report"),
+        icon_name="repeat",
+        order=9002,
+    )
+
+
 class TranslatePageMenuItem(ActionMenuItem):
     label = _("Translate this page")
     name = "action-translate"
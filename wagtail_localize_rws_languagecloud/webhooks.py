@@ -0,0 +1,82 @@
+import hashlib
+import hmac
+import json
+
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import LanguageCloudProject
+
+
+SIGNATURE_HEADER = "X-LC-Signature"
+
+# the events that report a change worth importing. Others are ignored
+EVENT_PREFIXES = ("PROJECT.", "TARGET_FILE.")
+
+
+def get_signature(secret, body):
+    """
+    Returns the signature of a webhook request body, as sent in the
+    X-LC-Signature header
+    """
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def is_valid_signature(secret, body, signature):
+    return hmac.compare_digest(get_signature(secret, body), signature or "")
+
+
+def parse_events(body):
+    """
+    Returns (project id, status) pairs from a webhook request body, either a
+    single event or {"events": [...]}. Each event looks like
+
+        {"eventType": "PROJECT.STATUS.CHANGED",
+         "data": {"projectId": "abc123", "status": "completed"}}
+
+    The status is optional, e.g. for TARGET_FILE.* events.
+    Raises ValueError if the body isn't valid.
+    """
+    payload = json.loads(body)
+    if not isinstance(payload, dict):
+        raise ValueError("Expected a JSON object")
+    events = payload.get("events", [payload])
+    if not isinstance(events, list):
+        raise ValueError("Expected a list of events")
+
+    changes = []
+    for event in events:
+        if not isinstance(event, dict) or not isinstance(event.get("data"), dict):
+            raise ValueError("Expected an event object with data")
+        if not str(event.get("eventType", "")).startswith(EVENT_PREFIXES):
+            continue
+        project_id = event["data"].get("projectId")
+        if not project_id:
+            raise ValueError("Event without a projectId")
+        changes.append((str(project_id), event["data"].get("status") or ""))
+    return changes
+
+
+def record_events(changes, now=None):
+    """
+    Marks the projects changed by webhook events for import by the next sync,
+    recording their new status if the event had one. Returns the number of
+    projects marked.
+    """
+    now = now or timezone.now()
+    marked = 0
+    for project_id, status in changes:
+        updates = {"event_received_at": now, "next_poll_at": now}
+        if status:
+            updates["lc_project_status"] = status
+            updates["status_changed_at"] = Case(
+                When(lc_project_status=status, then=F("status_changed_at")),
+                default=Value(now),
+            )
+        marked += (
+            LanguageCloudProject.objects.filter(lc_project_id=project_id)
+            .exclude(internal_status=LanguageCloudProject.STATUS_IMPORTED)
+            .update(**updates)
+        )
+    return marked